@@ -1,23 +1,151 @@
-"""Authentication dependencies for FastAPI."""
+"""Authentication dependencies for FastAPI.
+
+The authenticated principal (id, role, display name) is stored in the signed
+session cookie together with the user's ``auth_stamp``, a random token kept in
+the ``users`` table. Admin changes to a user (role, active flag, password)
+call ``invalidate_user`` in their transaction, which gives the user a new
+stamp: every session holding the old one, in any worker process, reloads the
+user from the database on its next request.
+
+Checking the stamp is a one-row lookup; an in-process LRU remembers it for
+USER_CACHE_TTL seconds, so that is also how long another worker may still
+accept a revoked session.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Optional
 
 from fastapi import Depends, HTTPException, Request
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import get_db
 from app.models.user import User
 
+_CACHE_MAX_USERS = 256
+
+_cache: "OrderedDict[int, tuple]" = OrderedDict()  # user_id -> (auth_stamp, expires_at)
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The signed-in user as seen by routes and templates."""
+    id: int
+    role: str
+    display_name: str
+
+
+def ensure_user_auth_stamp_column(bind) -> None:
+    """Add User.auth_stamp to a database created before it, one token per user.
+
+    create_all() does not alter existing tables.
+    """
+    with bind.begin() as conn:
+        existing = {row[1] for row in conn.execute(text("PRAGMA table_info(users)"))}
+        if "auth_stamp" in existing:
+            return
+        conn.execute(text("ALTER TABLE users ADD COLUMN auth_stamp VARCHAR NOT NULL DEFAULT ''"))
+        for (user_id,) in conn.execute(text("SELECT id FROM users")).all():
+            conn.execute(
+                text("UPDATE users SET auth_stamp = :stamp WHERE id = :id"),
+                {"stamp": secrets.token_hex(16), "id": user_id},
+            )
+
+
+def _cached_stamp(user_id: int) -> Optional[str]:
+    with _cache_lock:
+        entry = _cache.get(user_id)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del _cache[user_id]
+            return None
+        _cache.move_to_end(user_id)
+        return entry[0]
+
+
+def _cache_stamp(user_id: int, stamp: str) -> None:
+    if settings.USER_CACHE_TTL <= 0:
+        return
+    with _cache_lock:
+        _cache[user_id] = (stamp, time.monotonic() + settings.USER_CACHE_TTL)
+        _cache.move_to_end(user_id)
+        while len(_cache) > _CACHE_MAX_USERS:
+            _cache.popitem(last=False)
+
+
+def _forget_stamp(user_id: int) -> None:
+    with _cache_lock:
+        _cache.pop(user_id, None)
+
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> Optional[User]:
+def _current_stamp(db: Session, user_id: int) -> Optional[str]:
+    """The user's auth stamp (cached briefly); None when missing or inactive."""
+    stamp = _cached_stamp(user_id)
+    if stamp is not None:
+        return stamp
+    row = db.query(User.auth_stamp).filter(User.id == user_id, User.is_active == True).first()  # noqa: E712
+    if row is None:
+        return None
+    _cache_stamp(user_id, row[0])
+    return row[0]
+
+
+def remember_user(request: Request, user: User) -> Principal:
+    """Put ``user`` and its current auth stamp into the session (login, reload)."""
+    stamp = user.auth_stamp
+    principal = Principal(id=user.id, role=user.role, display_name=user.display_name)
+    request.session["user_id"] = user.id
+    request.session["principal"] = {
+        "id": principal.id, "role": principal.role, "display_name": principal.display_name, "v": stamp,
+    }
+    _cache_stamp(user.id, stamp)
+    return principal
+
+
+def invalidate_user(user: User) -> None:
+    """Revoke every session of ``user`` by giving it a new auth stamp.
+
+    Call before committing the change to the user, so both land in one
+    transaction.
+    """
+    user.auth_stamp = secrets.token_hex(16)
+    _forget_stamp(user.id)
+
+
+def clear_user_cache() -> None:
+    """Forget all cached principals (the database was replaced)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> Optional[Principal]:
     """Get the current authenticated user from session cookie."""
     user_id = request.session.get("user_id")
     if not user_id:
         return None
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()  # noqa: E712
-    return user
+
+    stamp = _current_stamp(db, user_id)
+    payload = request.session.get("principal")
+    if stamp is not None and payload and payload.get("id") == user_id and payload.get("v") == stamp:
+        return Principal(id=user_id, role=payload["role"], display_name=payload["display_name"])
+
+    user = None
+    if stamp is not None:
+        user = db.query(User).filter(User.id == user_id, User.is_active == True).first()  # noqa: E712
+    if user is None:
+        _forget_stamp(user_id)
+        request.session.pop("principal", None)
+        return None
+    return remember_user(request, user)
 
 
-def require_login(request: Request, db: Session = Depends(get_db)) -> User:
+def require_login(request: Request, db: Session = Depends(get_db)) -> Principal:
     """Require an authenticated user. Redirects to login if not authenticated."""
     user = get_current_user(request, db)
     if user is None:
@@ -28,7 +156,7 @@ def require_login(request: Request, db: Session = Depends(get_db)) -> User:
 
 def require_role(*roles: str):
     """Dependency factory: require user to have one of the specified roles."""
-    def dependency(request: Request, db: Session = Depends(get_db)) -> User:
+    def dependency(request: Request, db: Session = Depends(get_db)) -> Principal:
         user = get_current_user(request, db)
         if user is None:
             raise HTTPException(status_code=303, detail="Not authenticated")
@@ -17,6 +17,22 @@ class Settings(BaseSettings):
     SMTP_FROM_EMAIL: str = "svj@example.com"
     SMTP_FROM_NAME: str = "SVJ"
     LIBREOFFICE_PATH: str = "/Applications/LibreOffice.app/Contents/MacOS/soffice"
+    BALLOT_WORKERS: int = 0  # 0 = one process per CPU
+    PDF_WORKERS: int = 0  # tax PDF text extraction processes; 0 = one per CPU
+    JOB_WORKERS: int = 2  # background job threads; 0 = run jobs inside the request
+    AUDIT_ARCHIVE_MONTHS: int = 12  # default age (whole months) of audit entries moved to archives
+    AUDIT_FLUSH_INTERVAL: float = 1.0  # seconds the background audit writer gathers a batch; 0 = write at once
+    BACKUP_SCHEDULER_INTERVAL: int = 60  # seconds between auto-backup checks; 0 = scheduler off
+    USER_CACHE_TTL: int = 5  # seconds a user's auth stamp is cached without a DB check; 0 = always check
+
+    # SQLite engine profile (applied to every new connection)
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE: int = -64000  # negative = KiB (64 MB)
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT: int = 5000  # ms
+    SQLITE_FOREIGN_KEYS: bool = False
 
 
 settings = Settings()
@@ -1,7 +1,7 @@
 """SQLAlchemy database engine and session management."""
 import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
@@ -13,13 +13,86 @@ else:
     os.makedirs(os.path.dirname(_db_path) or ".", exist_ok=True)
     SQLALCHEMY_DATABASE_URL = f"sqlite:///{_db_path}"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-)
 
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    """Apply the SQLite tuning profile from settings to a raw DBAPI connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        if not read_only:
+            # journal_mode is persistent in the DB file, set it from the writer side
+            cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute(f"PRAGMA foreign_keys={'ON' if settings.SQLITE_FOREIGN_KEYS else 'OFF'}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def create_sqlite_engine(url: str, read_only: bool = False):
+    """Engine whose connections get the SQLite tuning profile on connect."""
+    new_engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(new_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, read_only=read_only)
+
+    return new_engine
+
+
+def create_read_engine(path: str):
+    """Read-only URI connection to a DB file: never takes a write lock."""
+    return create_sqlite_engine(f"sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true", read_only=True)
+
+
+engine = create_sqlite_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if _db_path != ":memory:":
+    read_engine = create_read_engine(_db_path)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+else:
+    # In-memory DB cannot be shared with a second engine
+    read_engine = engine
+    ReadSessionLocal = SessionLocal
+
+
+def checkpoint_wal() -> None:
+    """Flush the WAL into the main DB file so it can be copied as a single file."""
+    if _db_path == ":memory:":
+        return
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def upgrade_schema(bind) -> None:
+    """Bring a database up to the current schema.
+
+    create_all() adds missing tables together with their triggers and FTS
+    indexes; the ensure_* helpers add columns and indexes that create_all()
+    does not alter into existing tables. Run at startup and on a restored
+    database before it is swapped in.
+    """
+    from app.auth import ensure_user_auth_stamp_column
+    from app.models import Base
+    from app.services.audit_service import ensure_audit_log_indexes
+    from app.services.csv_comparator import ensure_sync_columns
+    from app.services.job_queue import ensure_job_columns
+    from app.services.pdf_store import ensure_tax_document_hash_column
+    from app.services.voting_import import ensure_ballot_vote_unique_index
+
+    Base.metadata.create_all(bind=bind)
+    ensure_ballot_vote_unique_index(bind)
+    ensure_tax_document_hash_column(bind)
+    ensure_audit_log_indexes(bind)
+    ensure_sync_columns(bind)
+    ensure_job_columns(bind)
+    ensure_user_auth_stamp_column(bind)
+
 
 def get_db():
     """Yield a database session for FastAPI dependency injection."""
@@ -28,3 +101,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Yield a read-only database session for GET routes.
+
+    Readers use a separate engine opened with mode=ro, so they never wait on
+    (or block) a long-running import transaction.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
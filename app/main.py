@@ -1,5 +1,6 @@
 """FastAPI application for SVJ Správa v2.0."""
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.responses import RedirectResponse
@@ -8,13 +9,33 @@ from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.config import settings
-from app.models import Base
-from app.database import engine
+from app.database import SessionLocal, engine, upgrade_schema
+from app.services.audit_service import shutdown_audit_writer
+from app.services.backup_scheduler import start_backup_scheduler, stop_backup_scheduler
+from app.services.job_queue import recover_interrupted_jobs, shutdown_job_queue
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Create tables, apply column/index upgrades
+upgrade_schema(engine)
 
-app = FastAPI(title="SVJ Správa", version="2.0")
+# Jobs still queued/running belonged to a previous process and will never finish
+_db = SessionLocal()
+try:
+    recover_interrupted_jobs(_db)
+finally:
+    _db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the auto-backup scheduler; drain jobs and audit writes on shutdown."""
+    start_backup_scheduler()
+    yield
+    stop_backup_scheduler()
+    shutdown_job_queue()
+    shutdown_audit_writer()
+
+
+app = FastAPI(title="SVJ Správa", version="2.0", lifespan=lifespan)
 
 # Session middleware for auth cookies
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
@@ -109,6 +130,7 @@ from app.routers import tax as tax_router  # noqa: E402
 from app.routers import sync as sync_router  # noqa: E402
 from app.routers import admin as admin_router  # noqa: E402
 from app.routers import settings as settings_router  # noqa: E402
+from app.routers import jobs as jobs_router  # noqa: E402
 
 app.include_router(auth_router.router)
 app.include_router(dashboard_router.router)
@@ -121,6 +143,7 @@ app.include_router(tax_router.router)
 app.include_router(sync_router.router)
 app.include_router(admin_router.router)
 app.include_router(settings_router.router)
+app.include_router(jobs_router.router)
 
 # Ensure data directories exist
 for d in [settings.UPLOAD_DIR, settings.GENERATED_DIR, settings.BACKUP_DIR]:
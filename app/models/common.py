@@ -1,7 +1,7 @@
-"""Common models: EmailLog, ImportLog, AuditLog, Notification."""
+"""Common models: EmailLog, ImportLog, AuditLog, Notification, Job, DataVersion, SchedulerLease."""
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, ForeignKey, Text
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, ForeignKey, Text, event, text
 
 from app.models import Base
 
@@ -42,6 +42,13 @@ class AuditLog(Base):
     new_value = Column(Text, default="")
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Newest-first keyset pages, unfiltered and per filter; id breaks ties
+        Index("ix_audit_logs_timestamp", "timestamp", "id"),
+        Index("ix_audit_logs_action_timestamp", "action", "timestamp", "id"),
+        Index("ix_audit_logs_model_timestamp", "model_name", "timestamp", "id"),
+    )
+
 
 class Notification(Base):
     __tablename__ = "notifications"
@@ -53,3 +60,72 @@ class Notification(Base):
     link = Column(String, default="")  # URL
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False, default="", index=True)  # ballots / tax_upload / owner_import / sync_compare / backup
+    title = Column(String, default="")
+    status = Column(String, default="čeká", index=True)  # čeká / běží / dokončeno / chyba
+    progress_done = Column(Integer, default=0)
+    progress_total = Column(Integer, default=0)
+    message = Column(Text, default="")  # shown as flash when the job finishes
+    result = Column(Text, default="")  # JSON
+    redirect_url = Column(String, default="")
+    key = Column(String, default="")  # e.g. ballots:5 — at most one queued/running job per key
+    worker = Column(String, default="")  # host:pid of the process that runs it
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class DataVersion(Base):
+    """Write counter per data set, bumped by SQLite triggers on every row change.
+
+    Lets read-side caches (list facets) check freshness with one PK lookup,
+    across processes and for bulk Core statements alike.
+    """
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)  # owners / units / audit
+    version = Column(Integer, nullable=False, default=0)
+
+
+class SchedulerLease(Base):
+    """Time-limited ownership of a periodic task, shared by all app processes.
+
+    Whoever holds an unexpired lease runs the task; the others stay idle.
+    """
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)  # auto_backup
+    owner = Column(String, nullable=False, default="")
+    expires_at = Column(DateTime, nullable=False)
+
+
+# source table -> data set whose version a row change bumps
+DATA_VERSION_TABLES = {
+    "owners": "owners",
+    "owner_units": "owners",
+    "units": "units",
+    "audit_logs": "audit",
+}
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_data_version_triggers(target, connection, **kw) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    for table, name in DATA_VERSION_TABLES.items():
+        bump = (
+            f"INSERT INTO data_versions (name, version) VALUES ('{name}', 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1;"
+        )
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS data_version_{table}_{op.lower()} "
+                f"AFTER {op} ON {table} BEGIN {bump} END"
+            ))
@@ -0,0 +1,87 @@
+"""FTS5 search index over owners, units and votings.
+
+One external FTS5 table per searched table, keyed by the source row id
+(``rowid = owners.id`` etc.), kept in sync by SQLite triggers so that ORM
+writes, bulk Core inserts and ``DELETE`` statements all update the index.
+The ``unicode61 remove_diacritics 2`` tokenizer folds case and Czech
+diacritics ("Novák" is found by "novak").
+
+The tables are created from ``Base.metadata``'s ``after_create`` event, so
+every ``create_all()`` (app startup, tests) also creates the index and fills
+it from existing rows when it is new.
+"""
+from sqlalchemy import event, text
+
+from app.models import Base
+
+TOKENIZE = "unicode61 remove_diacritics 2"
+
+
+def _concat(*columns: str) -> str:
+    return " || ' ' || ".join(f"coalesce(new.{c}, '')" for c in columns)
+
+
+# index table -> (source table, {index column: SQL expression over new.*})
+SEARCH_TABLES = {
+    "search_owners": ("owners", {
+        "name": _concat("name_with_titles", "first_name", "last_name"),
+        "name_normalized": _concat("name_normalized"),
+        "email": _concat("email", "email_secondary"),
+        "company_id": _concat("company_id"),
+        "address": _concat(
+            "perm_street", "perm_district", "perm_city", "perm_zip",
+            "corr_street", "corr_district", "corr_city", "corr_zip",
+        ),
+    }),
+    "search_units": ("units", {
+        "unit_number": _concat("unit_number"),
+        "building_number": _concat("building_number"),
+        "address": _concat("address", "section"),
+    }),
+    "search_votings": ("votings", {
+        "name": _concat("name"),
+    }),
+}
+
+
+def _ddl(index: str, source: str, columns: dict) -> list:
+    names = ", ".join(columns)
+    values = ", ".join(columns.values())
+    insert = f"INSERT INTO {index}(rowid, {names}) VALUES (new.id, {values});"
+    delete = f"DELETE FROM {index} WHERE rowid = old.id;"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5({names}, tokenize='{TOKENIZE}')",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON {source} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON {source} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE ON {source} BEGIN {delete} {insert} END",
+    ]
+
+
+def _fill_sql(index: str, source: str, columns: dict) -> str:
+    names = ", ".join(columns)
+    values = ", ".join(expr.replace("new.", "") for expr in columns.values())
+    return f"INSERT INTO {index}(rowid, {names}) SELECT id, {values} FROM {source}"
+
+
+def rebuild_search_index(connection) -> None:
+    """Refill all search tables from their source tables."""
+    for index, (source, columns) in SEARCH_TABLES.items():
+        connection.execute(text(f"DELETE FROM {index}"))
+        connection.execute(text(_fill_sql(index, source, columns)))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_index(target, connection, **kw) -> None:
+    """Create the FTS5 tables and triggers; fill tables that did not exist yet."""
+    if connection.dialect.name != "sqlite":
+        return
+    existing = {
+        row[0] for row in connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'search_%'")
+        )
+    }
+    for index, (source, columns) in SEARCH_TABLES.items():
+        for statement in _ddl(index, source, columns):
+            connection.execute(text(statement))
+        if index not in existing:
+            connection.execute(text(_fill_sql(index, source, columns)))
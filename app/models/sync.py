@@ -1,11 +1,41 @@
-"""SyncSession, SyncRecord models."""
+"""SyncSession, SyncRecord models.
+
+CSV rows are stored column-wise: the header is kept once per session
+(``SyncSession.csv_columns``) and each record holds only its values as a
+JSON array (``SyncRecord.csv_values``), zlib-compressed when that pays off.
+``csv_data`` (one JSON object per row) remains for records written before.
+"""
+import json
+import zlib
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, ForeignKey, Text
 from sqlalchemy.orm import relationship
 
 from app.models import Base
 
+_COMPRESS_MIN = 256  # bytes; smaller arrays do not shrink under zlib
+
+
+def pack_values(values: list) -> bytes:
+    """Encode a row's values: a JSON array, zlib-compressed when long."""
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(raw) >= _COMPRESS_MIN:
+        packed = zlib.compress(raw)
+        if len(packed) < len(raw):
+            return packed
+    return raw
+
+
+def unpack_values(blob: bytes) -> list:
+    """Inverse of pack_values (a plain array starts with '[', zlib never does)."""
+    if not blob:
+        return []
+    raw = bytes(blob)
+    if not raw.startswith(b"["):
+        raw = zlib.decompress(raw)
+    return json.loads(raw)
+
 
 class SyncSession(Base):
     __tablename__ = "sync_sessions"
@@ -14,9 +44,22 @@ class SyncSession(Base):
     name = Column(String, nullable=False, default="")
     source_format = Column(String, default="")  # sousede.cz / interní
     created_at = Column(DateTime, default=datetime.utcnow)
+    base_session_id = Column(Integer, ForeignKey("sync_sessions.id"), nullable=True)  # delta against
+    reused_count = Column(Integer, default=0)  # records taken over unchanged from base session
+    csv_columns = Column(Text, default="")  # JSON array of the CSV header
 
     records = relationship("SyncRecord", back_populates="session", cascade="all, delete-orphan")
 
+    @property
+    def column_index(self) -> dict:
+        """CSV column name -> position in SyncRecord.csv_values (decoded once)."""
+        cached = self.__dict__.get("_column_index")
+        if cached is None or cached[0] != self.csv_columns:
+            columns = json.loads(self.csv_columns) if self.csv_columns else []
+            cached = (self.csv_columns, {name: i for i, name in enumerate(columns)})
+            self.__dict__["_column_index"] = cached
+        return cached[1]
+
 
 class SyncRecord(Base):
     __tablename__ = "sync_records"
@@ -24,13 +67,53 @@ class SyncRecord(Base):
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("sync_sessions.id"), nullable=False)
     unit_id = Column(Integer, ForeignKey("units.id"), nullable=True)
+    owner_unit_id = Column(Integer, nullable=True)  # OwnerUnit of the matched co-owner (None: group/none)
     status = Column(String, default="")  # shoda / částečná / přeházená / rozdílní / rozdílné_podíly / chybí
     db_owner_name = Column(String, default="")
     csv_owner_name = Column(String, default="")
     db_share = Column(String, default="")
     csv_share = Column(String, default="")
-    csv_data = Column(Text, default="")  # JSON with full CSV row data
+    csv_data = Column(Text, default="")  # legacy: JSON object with full CSV row data
+    csv_values = Column(LargeBinary, nullable=True)  # pack_values() of the row, see csv_columns
     is_resolved = Column(Integer, default=0)
+    fingerprint = Column(String, default="")  # hash of CSV row + mapping + unit's owners
+    base_record_id = Column(Integer, ForeignKey("sync_records.id"), nullable=True)  # holds the payload
 
     session = relationship("SyncSession", back_populates="records")
     unit = relationship("Unit")
+    base_record = relationship("SyncRecord", remote_side=[id])
+
+    def _payload_record(self) -> "SyncRecord":
+        if self.csv_values is None and not self.csv_data and self.base_record is not None:
+            return self.base_record
+        return self
+
+    def csv_fields(self, *names: str) -> dict:
+        """Only the requested CSV columns that the row has, e.g. csv_fields("email")."""
+        holder = self._payload_record()
+        if holder.csv_values is None:
+            return {name: value for name, value in holder._legacy_row().items() if name in names}
+        cached = holder.__dict__.get("_values")
+        if cached is None or cached[0] is not holder.csv_values:
+            cached = holder.__dict__["_values"] = (holder.csv_values, unpack_values(holder.csv_values))
+        values = cached[1]
+        index = holder.session.column_index
+        return {
+            name: values[index[name]]
+            for name in names
+            if name in index and index[name] < len(values)
+        }
+
+    @property
+    def row_data(self) -> dict:
+        """The full CSV row (from the base record for unchanged delta rows)."""
+        holder = self._payload_record()
+        if holder.csv_values is None:
+            return holder._legacy_row()
+        return holder.csv_fields(*holder.session.column_index)
+
+    def _legacy_row(self) -> dict:
+        try:
+            return json.loads(self.csv_data) if self.csv_data else {}
+        except (ValueError, TypeError):
+            return {}
@@ -1,4 +1,4 @@
-"""TaxSession, TaxDocument, TaxDistribution models."""
+"""TaxSession, TaxDocument, TaxDistribution, PdfBlob, PdfBlobReservation models."""
 from datetime import datetime
 
 from sqlalchemy import Column, DateTime, Float, Integer, String, ForeignKey, Text
@@ -24,6 +24,7 @@ class TaxDocument(Base):
     session_id = Column(Integer, ForeignKey("tax_sessions.id"), nullable=False)
     filename = Column(String, nullable=False, default="")
     file_path = Column(String, default="")
+    content_hash = Column(String, default="", index=True)  # sha256 of the PdfBlob; "" = legacy file
     extracted_name = Column(String, default="")
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -44,3 +45,34 @@ class TaxDistribution(Base):
 
     document = relationship("TaxDocument", back_populates="distributions")
     owner = relationship("Owner")
+
+
+class PdfBlob(Base):
+    """A stored PDF, shared by all TaxDocuments with the same content.
+
+    Referenced through ``TaxDocument.content_hash``; the blob is removed once
+    no document points to it. ``extracted_name`` caches the text-layer name
+    so a re-uploaded file is not parsed again.
+    """
+    __tablename__ = "pdf_blobs"
+
+    sha256 = Column(String, primary_key=True)
+    size = Column(Integer, default=0)
+    extracted_name = Column(String, default="")  # "" = no usable text layer
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PdfBlobReservation(Base):
+    """A stored PDF claimed by an upload whose TaxDocuments are not written yet.
+
+    The upload request reserves its hashes before handing them to the
+    processing job, which drops the reservation when it commits (or fails).
+    A reserved blob is never released; reservations older than a day are
+    treated as left over by an interrupted job.
+    """
+    __tablename__ = "pdf_blob_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    token = Column(String, nullable=False, index=True)  # one upload
+    sha256 = Column(String, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,5 @@
 """User model for authentication and authorization."""
+import secrets
 from datetime import datetime
 
 from sqlalchemy import Boolean, Column, DateTime, Integer, String
@@ -17,3 +18,5 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     last_login = Column(DateTime, nullable=True)
+    # Version of the user's sessions; a new value revokes every signed-in session
+    auth_stamp = Column(String, nullable=False, default=lambda: secrets.token_hex(16))
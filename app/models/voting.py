@@ -1,7 +1,7 @@
-"""Voting, VotingItem, Ballot, BallotVote models."""
+"""Voting, VotingItem, Ballot, BallotVote, VotingTally models."""
 from datetime import datetime
 
-from sqlalchemy import Column, Date, DateTime, Float, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Date, DateTime, Float, Index, Integer, String, ForeignKey, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.models import Base
@@ -33,6 +33,7 @@ class VotingItem(Base):
 
     voting = relationship("Voting", back_populates="items")
     ballot_votes = relationship("BallotVote", back_populates="voting_item", cascade="all, delete-orphan")
+    tallies = relationship("VotingTally", cascade="all, delete-orphan")
 
 
 class Ballot(Base):
@@ -62,3 +63,24 @@ class BallotVote(Base):
 
     ballot = relationship("Ballot", back_populates="votes")
     voting_item = relationship("VotingItem", back_populates="ballot_votes")
+
+    __table_args__ = (
+        # One vote per ballot and item; target of the import upsert
+        Index("uq_ballot_vote_item", "ballot_id", "voting_item_id", unique=True),
+    )
+
+
+class VotingTally(Base):
+    """Precomputed results: ballot count and share-weighted sum per item and vote."""
+    __tablename__ = "voting_tallies"
+
+    id = Column(Integer, primary_key=True, index=True)
+    voting_id = Column(Integer, ForeignKey("votings.id"), nullable=False, index=True)
+    voting_item_id = Column(Integer, ForeignKey("voting_items.id"), nullable=False)
+    vote = Column(String, nullable=False)  # PRO / PROTI / Zdržel se
+    count = Column(Integer, nullable=False, default=0)
+    weight = Column(Integer, nullable=False, default=0)  # sum of OwnerUnit.votes
+
+    __table_args__ = (
+        UniqueConstraint("voting_item_id", "vote", name="uq_voting_tally_item_vote"),
+    )
@@ -4,38 +4,53 @@ import glob
 import io
 import os
 import shutil
+import uuid
 import zipfile
 from datetime import datetime
 from typing import List, Optional
+from urllib.parse import urlencode
 
 import bcrypt
 
 from fastapi import APIRouter, Depends, File, Form, Request, UploadFile
 from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
+from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 
-from app.auth import get_current_user
+from app.auth import clear_user_cache, get_current_user, invalidate_user
 from app.config import settings
-from app.database import get_db
+from app.database import engine, get_db, read_engine, upgrade_schema
 from app.models.administration import SvjInfo, SvjAddress, BoardMember
 from app.models.common import AuditLog, EmailLog, ImportLog
 from app.models.owner import Owner, Unit, OwnerUnit, Proxy
 from app.models.user import User
+from app.services import audit_archive, backup_service
+from app.services.audit_service import log_change
+from app.services.backup_scheduler import (
+    AUTO_PREFIX, MAINTENANCE_LEASE, acquire_lease, compute_next_run, release_lease,
+)
+from app.services.facets import audit_facets, clear_facet_cache
+from app.services.job_queue import active_jobs, job_redirect, submit_job
+from app.services.owner_matcher import invalidate_owner_index
+from app.services.pagination import keyset_page
+from app.services.pdf_store import release_blobs
 
 # Backup directory
-_BACKUP_DIR = os.path.join(os.path.dirname(settings.UPLOAD_DIR), "backups")
+_BACKUP_DIR = backup_service.backup_dir()
 os.makedirs(_BACKUP_DIR, exist_ok=True)
 
 router = APIRouter()
 
 _BACKUP_DIR_REAL = os.path.realpath(_BACKUP_DIR)
+_MAX_DB_SIZE = 500 * 1024 * 1024
 
 
 def _safe_backup_path(filename: str) -> Optional[str]:
     """Validate backup filename and return safe absolute path, or None if invalid."""
     # Only allow simple filenames: alphanumeric, dash, underscore, dot
+    # (.zip archives and incremental .json manifests)
     import re
-    if not re.match(r'^[\w\-\.]+\.zip$', filename):
+    if not re.match(r'^[\w\-\.]+\.(zip|json)$', filename):
         return None
     fpath = os.path.realpath(os.path.join(_BACKUP_DIR, filename))
     if not fpath.startswith(_BACKUP_DIR_REAL + os.sep) and fpath != _BACKUP_DIR_REAL:
@@ -357,6 +372,7 @@ def user_change_role(
             return RedirectResponse(url="/sprava/uzivatele", status_code=303)
 
     target.role = role
+    invalidate_user(target)
     db.commit()
 
     request.session["flash"] = {"type": "success", "message": f"Role uživatele '{target.username}' změněna na '{role}'."}
@@ -385,6 +401,7 @@ def user_reset_password(
         return RedirectResponse(url="/sprava/uzivatele", status_code=303)
 
     target.password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    invalidate_user(target)
     db.commit()
 
     request.session["flash"] = {"type": "success", "message": f"Heslo uživatele '{target.username}' změněno."}
@@ -413,6 +430,7 @@ def user_toggle_active(
         return RedirectResponse(url="/sprava/uzivatele", status_code=303)
 
     target.is_active = not target.is_active
+    invalidate_user(target)
     db.commit()
 
     action = "aktivován" if target.is_active else "deaktivován"
@@ -423,30 +441,48 @@ def user_toggle_active(
 # --- Audit Log ---
 
 
+def _audit_filter_params(action: str, model: str) -> list:
+    return [(k, v) for k, v in (("action", action), ("model", model)) if v]
+
+
+def _audit_page(db: Session, action: str, model: str, cursor: int | None) -> tuple:
+    """One newest-first page of live audit entries (keyset on timestamp, id)."""
+    query = db.query(AuditLog)
+    if action:
+        query = query.filter(AuditLog.action == action)
+    if model:
+        query = query.filter(AuditLog.model_name == model)
+    return keyset_page(query, AuditLog, [AuditLog.timestamp, AuditLog.id], cursor, descending=True)
+
+
+def _audit_next_url(action: str, model: str, next_cursor: int | None) -> str | None:
+    if next_cursor is None:
+        return None
+    return "/sprava/audit/stranka?" + urlencode(_audit_filter_params(action, model) + [("cursor", next_cursor)])
+
+
 @router.get("/sprava/audit", response_class=HTMLResponse)
 def audit_log_page(
     request: Request,
     action: str = "",
     model: str = "",
+    archiv: str = "",
+    q: str = "",
     db: Session = Depends(get_db),
 ):
-    """View audit log (admin only)."""
+    """View audit log (admin only); ``archiv`` (YYYY-MM) searches an archived month."""
     user, err = _require_admin(request, db)
     if err:
         return err
 
-    query = db.query(AuditLog).order_by(AuditLog.timestamp.desc())
-
-    if action:
-        query = query.filter(AuditLog.action == action)
-    if model:
-        query = query.filter(AuditLog.model_name == model)
-
-    logs = query.limit(200).all()
-
-    # Get distinct actions and models for filters
-    actions = [r[0] for r in db.query(AuditLog.action).distinct().all() if r[0]]
-    models = [r[0] for r in db.query(AuditLog.model_name).distinct().all() if r[0]]
+    archives = audit_archive.list_archives()
+    if archiv in archives:
+        logs = audit_archive.search_archive(archiv, action, model, q)
+        next_url = None
+    else:
+        archiv = ""
+        logs, next_cursor = _audit_page(db, action, model, None)
+        next_url = _audit_next_url(action, model, next_cursor)
 
     return request.app.state.templates.TemplateResponse(
         request,
@@ -454,14 +490,74 @@ def audit_log_page(
         {
             "user": user,
             "logs": logs,
-            "actions": actions,
-            "models": models,
+            "next_url": next_url,
+            **audit_facets(db),
+            "archives": archives,
             "current_action": action,
             "current_model": model,
+            "current_archive": archiv,
+            "q": q,
+            "archive_months": settings.AUDIT_ARCHIVE_MONTHS,
         },
     )
 
 
+@router.get("/sprava/audit/stranka", response_class=HTMLResponse)
+def audit_log_rows(
+    request: Request,
+    cursor: int,
+    action: str = "",
+    model: str = "",
+    db: Session = Depends(get_db),
+):
+    """HTMX: next page of audit rows after ``cursor`` (infinite scroll)."""
+    user, err = _require_admin(request, db)
+    if err:
+        return HTMLResponse("")
+
+    logs, next_cursor = _audit_page(db, action, model, cursor)
+    return request.app.state.templates.TemplateResponse(
+        request,
+        "partials/audit_rows.html",
+        {"logs": logs, "next_url": _audit_next_url(action, model, next_cursor)},
+    )
+
+
+@router.post("/sprava/audit/archivovat")
+def audit_log_archive(
+    request: Request,
+    months: str = Form(""),
+    db: Session = Depends(get_db),
+):
+    """Move audit entries older than N months into monthly archives (admin only)."""
+    user, err = _require_admin(request, db)
+    if err:
+        return err
+
+    try:
+        keep_months = max(1, int(months))
+    except (ValueError, TypeError):
+        keep_months = settings.AUDIT_ARCHIVE_MONTHS
+
+    job = submit_job(
+        db, "audit_archive", f"Archivace audit logu (starší než {keep_months} měs.)",
+        _archive_audit_job, keep_months,
+        user_id=user.id, redirect_url="/sprava/audit",
+    )
+    return job_redirect(request, job)
+
+
+def _archive_audit_job(db: Session, ctx, months: int) -> dict:
+    """Job: move old audit entries into compressed monthly archive files."""
+    result = audit_archive.archive_old_entries(db, months, progress=ctx.progress)
+    if not result["months"]:
+        return {"message": "Žádné záznamy k archivaci.", **result}
+    return {
+        "message": f"Archivováno {result['archived']} záznamů ({', '.join(result['months'])}).",
+        **result,
+    }
+
+
 # --- Backup & Restore ---
 
 
@@ -475,11 +571,22 @@ def backup_list(request: Request, db: Session = Depends(get_db)):
     backups = []
     if os.path.exists(_BACKUP_DIR):
         for f in sorted(os.listdir(_BACKUP_DIR), reverse=True):
+            fpath = os.path.join(_BACKUP_DIR, f)
             if f.endswith(".zip"):
-                fpath = os.path.join(_BACKUP_DIR, f)
                 size = os.path.getsize(fpath)
                 mtime = datetime.fromtimestamp(os.path.getmtime(fpath))
-                backups.append({"filename": f, "size": size, "date": mtime})
+                backups.append({"filename": f, "size": size, "date": mtime, "new_bytes": None})
+            elif f.endswith(".json"):
+                try:
+                    manifest = backup_service.read_manifest(f)
+                except (OSError, ValueError):
+                    continue
+                backups.append({
+                    "filename": f,
+                    "size": manifest["size"],
+                    "date": datetime.fromisoformat(manifest["created_at"]),
+                    "new_bytes": manifest["new_bytes"],
+                })
 
     return request.app.state.templates.TemplateResponse(
         request,
@@ -494,40 +601,30 @@ def backup_create(
     name: str = Form(""),
     db: Session = Depends(get_db),
 ):
-    """Create a ZIP backup of database + uploads (admin only)."""
+    """Create an incremental backup of database + uploads (admin only)."""
     user, err = _require_admin(request, db)
     if err:
         return err
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     label = _sanitize_backup_name(name) if name else "backup"
-    zip_name = f"{label}_{timestamp}.zip"
-    zip_path = os.path.join(_BACKUP_DIR, zip_name)
+    backup_name = f"{label}_{timestamp}.json"
 
-    try:
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            # Add database file
-            db_path = settings.DATABASE_PATH
-            if os.path.exists(db_path):
-                zf.write(db_path, "svj.db")
-
-            # Add uploads
-            upload_dir = settings.UPLOAD_DIR
-            if os.path.exists(upload_dir):
-                for root, dirs, files in os.walk(upload_dir):
-                    # Skip temp import files
-                    if "_import_temp" in root:
-                        continue
-                    for f in files:
-                        fpath = os.path.join(root, f)
-                        arcname = os.path.join("uploads", os.path.relpath(fpath, upload_dir))
-                        zf.write(fpath, arcname)
-
-        request.session["flash"] = {"type": "success", "message": f"Záloha '{zip_name}' vytvořena."}
-    except Exception as e:
-        request.session["flash"] = {"type": "error", "message": f"Chyba při vytváření zálohy: {e}"}
+    job = submit_job(
+        db, "backup", f"Záloha {backup_name}",
+        _create_backup_job, backup_name,
+        user_id=user.id, redirect_url="/sprava/zalohy",
+    )
+    return job_redirect(request, job)
 
-    return RedirectResponse(url="/sprava/zalohy", status_code=303)
+
+def _create_backup_job(db: Session, ctx, backup_name: str) -> dict:
+    """Job: snapshot the database and store changed uploads as a manifest."""
+    manifest = backup_service.create_backup(db.get_bind(), backup_name, progress=ctx.progress)
+    return {
+        "message": f"Záloha '{backup_name}' vytvořena (nově uloženo {manifest['new_bytes'] / 1024:.1f} KB).",
+        "filename": backup_name,
+    }
 
 
 @router.get("/sprava/zaloha/{filename}/stahnout")
@@ -542,14 +639,34 @@ def backup_download(filename: str, request: Request, db: Session = Depends(get_d
         request.session["flash"] = {"type": "error", "message": "Záloha nenalezena."}
         return RedirectResponse(url="/sprava/zalohy", status_code=303)
 
-    def iterfile():
-        with open(fpath, "rb") as f:
-            yield from f
+    download_name = os.path.basename(fpath)
+    if fpath.endswith(".json"):
+        # Incremental backup: assemble the restorable ZIP from the store
+        import tempfile
+        fd, zip_path = tempfile.mkstemp(suffix=".zip")
+        os.close(fd)
+        try:
+            backup_service.write_zip(download_name, zip_path)
+        except Exception:
+            os.remove(zip_path)
+            raise
+        download_name = download_name[:-len(".json")] + ".zip"
+
+        def iterfile():
+            try:
+                with open(zip_path, "rb") as f:
+                    yield from iter(lambda: f.read(backup_service.FILE_CHUNK_SIZE), b"")
+            finally:
+                os.remove(zip_path)
+    else:
+        def iterfile():
+            with open(fpath, "rb") as f:
+                yield from f
 
     return StreamingResponse(
         iterfile(),
         media_type="application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={os.path.basename(fpath)}"},
+        headers={"Content-Disposition": f"attachment; filename={download_name}"},
     )
 
 
@@ -562,7 +679,10 @@ def backup_delete(filename: str, request: Request, db: Session = Depends(get_db)
 
     fpath = _safe_backup_path(filename)
     if fpath and os.path.exists(fpath):
-        os.remove(fpath)
+        if fpath.endswith(".json"):
+            backup_service.delete_backup(os.path.basename(fpath))
+        else:
+            os.remove(fpath)
         request.session["flash"] = {"type": "success", "message": f"Záloha '{filename}' smazána."}
     else:
         request.session["flash"] = {"type": "error", "message": "Záloha nenalezena."}
@@ -598,17 +718,11 @@ def backup_restore(
                 request.session["flash"] = {"type": "error", "message": "ZIP neobsahuje svj.db."}
                 return RedirectResponse(url="/sprava/zalohy", status_code=303)
 
-            # Create safety backup first
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safety_path = os.path.join(_BACKUP_DIR, f"pre_restore_{timestamp}.zip")
-            with zipfile.ZipFile(safety_path, "w") as safety:
-                db_path = settings.DATABASE_PATH
-                if os.path.exists(db_path):
-                    safety.write(db_path, "svj.db")
+            # Stream + verify the DB before touching anything live
+            with zf.open("svj.db") as source:
+                staged = backup_service.stage_database(source, settings.DATABASE_PATH)
 
-            # Extract DB
-            db_path = settings.DATABASE_PATH
-            zf.extract("svj.db", os.path.dirname(db_path))
+            _install_restored_database(db, staged)
 
             # Extract uploads if present (Zip Slip protection)
             upload_parent = os.path.realpath(os.path.dirname(settings.UPLOAD_DIR))
@@ -619,7 +733,9 @@ def backup_restore(
                         continue  # Skip path traversal attempts
                     zf.extract(name, upload_parent)
 
-        request.session["flash"] = {"type": "success", "message": "Obnova dokončena. Restartujte aplikaci."}
+        request.session["flash"] = {"type": "success", "message": "Obnova dokončena." + _RESTART_HINT}
+    except ValueError as e:
+        request.session["flash"] = {"type": "error", "message": str(e)}
     except Exception as e:
         request.session["flash"] = {"type": "error", "message": f"Chyba obnovy: {e}"}
     finally:
@@ -629,8 +745,54 @@ def backup_restore(
     return RedirectResponse(url="/sprava/zalohy", status_code=303)
 
 
+# Other worker processes keep their connections to the replaced file
+_RESTART_HINT = " Běží-li aplikace ve více procesech, restartujte ji."
+_RESTORE_LEASE_SECONDS = 3600  # an interrupted restore blocks automatic backups at most this long
+
+
+def _upgrade_staged_database(staged_path: str) -> None:
+    """Apply the current schema (tables, triggers, FTS, added columns) to a
+    restored database before it goes live — it may come from an old backup."""
+    staged_engine = create_engine(f"sqlite:///{staged_path}")
+    try:
+        upgrade_schema(staged_engine)
+    finally:
+        staged_engine.dispose()
+
+
+def _install_restored_database(db: Session, staged_path: str) -> None:
+    """Safety backup of the live data, then swap in the verified staged copy.
+
+    Refused while background jobs are queued or running, or while an
+    automatic backup holds the maintenance lease: their connections would
+    keep using the replaced file. The restore holds that lease itself until
+    the swap is done, so no automatic backup starts meanwhile.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    owner = f"restore:{uuid.uuid4().hex[:8]}"
+    try:
+        if not acquire_lease(db, owner, datetime.now(), seconds=_RESTORE_LEASE_SECONDS, name=MAINTENANCE_LEASE):
+            raise ValueError("Obnovu nelze provést, právě probíhá automatická záloha. Zkuste to za chvíli.")
+        running = active_jobs(db)
+        if running:
+            raise ValueError(f"Obnovu nelze provést, na pozadí běží úlohy ({running}). Zkuste to po jejich dokončení.")
+        _upgrade_staged_database(staged_path)
+        backup_service.create_backup(db.get_bind(), f"pre_restore_{timestamp}.json")
+    except BaseException:
+        backup_service.discard_staged(staged_path)
+        db.rollback()
+        release_lease(db, owner, MAINTENANCE_LEASE)
+        raise
+    db.close()  # release this request's connection before the swap
+    # The lease row goes away with the replaced file
+    backup_service.install_database(staged_path, settings.DATABASE_PATH, (engine, read_engine))
+    clear_facet_cache()
+    clear_user_cache()
+    invalidate_owner_index()
+
+
 @router.post("/sprava/zaloha/obnovit-soubor")
-async def backup_restore_db_file(
+def backup_restore_db_file(
     request: Request,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -645,34 +807,13 @@ async def backup_restore_db_file(
         request.session["flash"] = {"type": "error", "message": "Nahrajte soubor .db (SQLite databázi)."}
         return RedirectResponse(url="/sprava/zalohy", status_code=303)
 
-    # Read with size limit (500 MB)
-    _MAX_DB_SIZE = 500 * 1024 * 1024
-    content = await file.read(_MAX_DB_SIZE + 1)
-    if len(content) > _MAX_DB_SIZE:
-        request.session["flash"] = {"type": "error", "message": "Soubor je příliš velký (max 500 MB)."}
-        return RedirectResponse(url="/sprava/zalohy", status_code=303)
-
-    # Validate it's a real SQLite file (magic bytes: "SQLite format 3\000")
-    if not content.startswith(b"SQLite format 3\x00"):
-        request.session["flash"] = {"type": "error", "message": "Neplatný soubor — není SQLite databáze."}
-        return RedirectResponse(url="/sprava/zalohy", status_code=303)
-
     try:
-        # Create safety backup first
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safety_path = os.path.join(_BACKUP_DIR, f"pre_restore_{timestamp}.zip")
-        with zipfile.ZipFile(safety_path, "w") as safety:
-            db_path = settings.DATABASE_PATH
-            if os.path.exists(db_path):
-                safety.write(db_path, "svj.db")
-
-        # Replace DB file
-        db_path = settings.DATABASE_PATH
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        with open(db_path, "wb") as f:
-            f.write(content)
-
-        request.session["flash"] = {"type": "success", "message": "Obnova z .db souboru dokončena. Restartujte aplikaci."}
+        # Streamed to disk with a size limit (500 MB), then integrity-checked
+        staged = backup_service.stage_database(file.file, settings.DATABASE_PATH, max_size=_MAX_DB_SIZE)
+        _install_restored_database(db, staged)
+        request.session["flash"] = {"type": "success", "message": "Obnova z .db souboru dokončena." + _RESTART_HINT}
+    except ValueError as e:
+        request.session["flash"] = {"type": "error", "message": str(e)}
     except Exception as e:
         request.session["flash"] = {"type": "error", "message": f"Chyba obnovy: {e}"}
 
@@ -747,21 +888,16 @@ def auto_backup_config_save(
     config.time = time
     config.max_backups = max_b
     config.is_enabled = is_enabled == "on"
+    # The scheduler picks the new slot up on its next tick
+    config.next_run = (
+        compute_next_run(frequency, time, datetime.now(), config.last_run)
+        if config.is_enabled else None
+    )
 
     db.commit()
 
-    # Run auto-backup cleanup: remove old auto_ prefixed backups beyond max_backups
-    if os.path.exists(_BACKUP_DIR):
-        auto_backups = sorted(
-            [f for f in os.listdir(_BACKUP_DIR) if f.startswith("auto_") and f.endswith(".zip")],
-            reverse=True,
-        )
-        for old_backup in auto_backups[max_b:]:
-            fpath = os.path.join(_BACKUP_DIR, old_backup)
-            try:
-                os.remove(fpath)
-            except OSError:
-                pass
+    # Apply retention right away (the scheduler also prunes after each run)
+    backup_service.prune_backups(AUTO_PREFIX, max_b)
 
     request.session["flash"] = {"type": "success", "message": "Nastavení auto-záloh uloženo."}
     return RedirectResponse(url="/sprava/auto-zalohy", status_code=303)
@@ -775,8 +911,8 @@ def _get_delete_models(cat: str):
     if cat == "owners":
         return [OwnerUnit, Proxy, Unit, Owner]
     elif cat == "voting":
-        from app.models.voting import BallotVote, Ballot, VotingItem, Voting
-        return [BallotVote, Ballot, VotingItem, Voting]
+        from app.models.voting import BallotVote, Ballot, VotingItem, Voting, VotingTally
+        return [VotingTally, BallotVote, Ballot, VotingItem, Voting]
     elif cat == "tax":
         from app.models.tax import TaxDistribution, TaxDocument, TaxSession
         return [TaxDistribution, TaxDocument, TaxSession]
@@ -839,16 +975,16 @@ async def delete_data_execute(request: Request, db: Session = Depends(get_db)):
         request.session["flash"] = {"type": "error", "message": "Vyberte alespoň jednu kategorii."}
         return RedirectResponse(url="/sprava/smazat-data", status_code=303)
 
-    # Create safety backup before mass delete
+    # Consistent safety backup before mass delete; no backup, no delete
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safety_path = os.path.join(_BACKUP_DIR, f"pre_delete_{timestamp}.zip")
-        with zipfile.ZipFile(safety_path, "w") as safety:
-            db_path = settings.DATABASE_PATH
-            if os.path.exists(db_path):
-                safety.write(db_path, "svj.db")
-    except Exception:
-        pass  # Best effort safety backup
+        backup_service.create_backup(db.get_bind(), f"pre_delete_{timestamp}.json")
+    except Exception as e:
+        request.session["flash"] = {
+            "type": "error",
+            "message": f"Bezpečnostní záloha se nezdařila, data nebyla smazána: {e}",
+        }
+        return RedirectResponse(url="/sprava/smazat-data", status_code=303)
 
     total = 0
     for cat in categories:
@@ -856,16 +992,15 @@ async def delete_data_execute(request: Request, db: Session = Depends(get_db)):
         for model in models:
             count = db.query(model).delete()
             total += count
+    if "tax" in categories:
+        release_blobs(db)
 
     # Audit log entry for mass deletion
-    audit = AuditLog(
-        user_id=user.id,
-        action="delete",
-        model_name="MassDelete",
+    log_change(
+        db, user.id, "delete", "MassDelete", None,
         field_name=",".join(categories),
         new_value=f"{total} records deleted",
     )
-    db.add(audit)
     db.commit()
     request.session["flash"] = {"type": "success", "message": f"Smazáno {total} záznamů."}
     return RedirectResponse(url="/sprava/smazat-data", status_code=303)
@@ -1107,16 +1242,14 @@ async def bulk_edits_apply(request: Request, db: Session = Depends(get_db)):
             query = query.filter(getattr(Unit, col_name) == old_value)
         updated = query.update({col_name: new_value}, synchronize_session="fetch")
 
-    # Audit log for bulk edit
-    audit = AuditLog(
-        user_id=user.id,
-        action="update",
-        model_name="BulkEdit",
+    # Audit log for bulk edit (written by the background writer after commit)
+    log_change(
+        db, user.id, "update", "BulkEdit", None,
         field_name=col_name,
         old_value=old_value,
         new_value=f"{new_value} ({updated} records)",
+        background=True,
     )
-    db.add(audit)
     db.commit()
 
     label = _BULK_EDIT_FIELDS[field]["label"]
@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
+from app.auth import remember_user
 from app.database import get_db
 from app.models.user import User
 
@@ -41,7 +42,7 @@ def login_submit(
         User.username == username, User.is_active == True  # noqa: E712
     ).first()
     if user and bcrypt.checkpw(password.encode("utf-8"), user.password_hash.encode("utf-8")):
-        request.session["user_id"] = user.id
+        remember_user(request, user)
         user.last_login = datetime.utcnow()
         db.commit()
         return RedirectResponse(url="/", status_code=303)
@@ -106,5 +107,5 @@ def register_submit(
     db.add(user)
     db.commit()
 
-    request.session["user_id"] = user.id
+    remember_user(request, user)
     return RedirectResponse(url="/", status_code=303)
@@ -4,7 +4,7 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
-from app.database import get_db
+from app.database import get_read_db
 from app.models.owner import Owner, Unit
 from app.models.voting import Voting
 from app.models.user import User
@@ -13,7 +13,7 @@ router = APIRouter()
 
 
 @router.get("/", response_class=HTMLResponse)
-def dashboard(request: Request, db: Session = Depends(get_db)):
+def dashboard(request: Request, db: Session = Depends(get_read_db)):
     """Main dashboard with overview statistics."""
     user = get_current_user(request, db)
     if user is None:
@@ -0,0 +1,76 @@
+"""Background job routes — status page and HTMX progress polling."""
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy.orm import Session
+
+from app.auth import get_current_user
+from app.database import get_db
+from app.models.common import Job
+from app.services.job_queue import (
+    JOB_DONE, JOB_FAILED, job_flash, job_progress, job_result,
+)
+
+router = APIRouter()
+
+
+@router.get("/ulohy", response_class=HTMLResponse)
+def jobs_list(request: Request, db: Session = Depends(get_db)):
+    """List recent background jobs."""
+    user = get_current_user(request, db)
+    if user is None:
+        return RedirectResponse(url="/login", status_code=303)
+
+    jobs = db.query(Job).order_by(Job.created_at.desc(), Job.id.desc()).limit(50).all()
+    return request.app.state.templates.TemplateResponse(
+        request,
+        "jobs/list.html",
+        {"user": user, "jobs": jobs},
+    )
+
+
+@router.get("/ulohy/{job_id}", response_class=HTMLResponse)
+def job_detail(job_id: int, request: Request, db: Session = Depends(get_db)):
+    """Show job progress; a finished job shows its outcome and a link to the result."""
+    user = get_current_user(request, db)
+    if user is None:
+        return RedirectResponse(url="/login", status_code=303)
+
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job is None:
+        return HTMLResponse("Úloha nenalezena", status_code=404)
+
+    done, total = job_progress(job)
+    return request.app.state.templates.TemplateResponse(
+        request,
+        "jobs/detail.html",
+        {
+            "user": user,
+            "job": job,
+            "done": done,
+            "total": total,
+            "result": job_result(job),
+        },
+    )
+
+
+@router.get("/ulohy/{job_id}/stav", response_class=HTMLResponse)
+def job_status(job_id: int, request: Request, db: Session = Depends(get_db)):
+    """HTMX: progress partial, polled until the job finishes."""
+    user = get_current_user(request, db)
+    if user is None:
+        return HTMLResponse("")
+
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job is None:
+        return HTMLResponse("Úloha nenalezena", status_code=404)
+
+    if job.status in (JOB_DONE, JOB_FAILED) and job.redirect_url:
+        request.session["flash"] = job_flash(job)
+        return HTMLResponse("", headers={"HX-Redirect": job.redirect_url})
+
+    done, total = job_progress(job)
+    return request.app.state.templates.TemplateResponse(
+        request,
+        "partials/job_status.html",
+        {"job": job, "done": done, "total": total},
+    )
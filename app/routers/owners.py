@@ -2,16 +2,22 @@
 import os
 import shutil
 import uuid
+from urllib.parse import urlencode
 
 from fastapi import APIRouter, Depends, File, Form, Request, UploadFile
 from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session, selectinload
 
 from app.auth import get_current_user
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.owner import Owner, OwnerUnit, Unit
 from app.models.common import ImportLog
+from app.services.facets import owner_facets
+from app.services.job_queue import job_redirect, submit_job
+from app.services.pagination import keyset_page
+from app.services.search_index import owner_match_subquery
 
 # Temp directory for uploaded Excel files
 _IMPORT_TEMP_DIR = os.path.join(settings.UPLOAD_DIR, "_import_temp")
@@ -20,36 +26,33 @@ os.makedirs(_IMPORT_TEMP_DIR, exist_ok=True)
 router = APIRouter()
 
 
-@router.get("/vlastnici", response_class=HTMLResponse)
-def owners_list(
-    request: Request,
-    search: str = "",
-    typ: str = "",
-    vlastnictvi: str = "",
-    kontakt: str = "",
-    sort: str = "name",
-    db: Session = Depends(get_db),
-):
-    """List all owners with search/filter/sort."""
-    user = get_current_user(request, db)
-    if user is None:
-        return RedirectResponse(url="/login", status_code=303)
+# sort -> (keyset keys, descending); the last key makes the order unique
+_OWNER_SORTS = {
+    "name": ([Owner.name_normalized, Owner.id], False),
+    "last_name": ([func.coalesce(Owner.last_name, ""), Owner.id], False),
+    "first_name": ([Owner.first_name, Owner.id], False),
+    "created_at": ([Owner.created_at, Owner.id], True),
+}
+
 
+def _owner_filter_params(search: str, typ: str, vlastnictvi: str, kontakt: str, sort: str) -> list:
+    """Non-default list filters as (name, value) pairs, in URL order."""
+    params = [("search", search), ("typ", typ), ("vlastnictvi", vlastnictvi), ("kontakt", kontakt)]
+    if sort != "name":
+        params.append(("sort", sort))
+    return [(k, v) for k, v in params if v]
+
+
+def _owners_page(db: Session, search: str, typ: str, vlastnictvi: str, kontakt: str,
+                 sort: str, cursor: int | None) -> tuple:
+    """One keyset page of the filtered owner list: (owners, next_cursor)."""
     query = db.query(Owner).filter(Owner.is_active == True).options(  # noqa: E712
         selectinload(Owner.owner_units).selectinload(OwnerUnit.unit)
     )
 
-    # Search filter — uses name_normalized for diacritics-insensitive search
+    # Search filter — FTS5 index, prefix and diacritics-insensitive
     if search:
-        term = f"%{search}%"
-        query = query.filter(
-            (Owner.first_name.ilike(term))
-            | (Owner.last_name.ilike(term))
-            | (Owner.name_with_titles.ilike(term))
-            | (Owner.name_normalized.ilike(term))
-            | (Owner.email.ilike(term))
-            | (Owner.company_id.ilike(term))
-        )
+        query = query.filter(Owner.id.in_(owner_match_subquery(search)))
 
     # Type filter
     if typ:
@@ -74,81 +77,84 @@ def owners_list(
     elif kontakt == "bez_telefonu":
         query = query.filter((Owner.phone == "") | (Owner.phone.is_(None)))
 
-    # Sorting
-    sort_map = {
-        "name": Owner.name_normalized.asc(),
-        "last_name": Owner.last_name.asc(),
-        "first_name": Owner.first_name.asc(),
-        "created_at": Owner.created_at.desc(),
-    }
-    order = sort_map.get(sort, Owner.name_normalized.asc())
-    query = query.order_by(order)
-
-    owners = query.all()
-
-    # Count by type for filter bubbles
-    active_q = db.query(Owner).filter(Owner.is_active == True)  # noqa: E712
-    total = active_q.count()
-    fyzicka_count = active_q.filter(Owner.owner_type == "physical").count()
-    pravnicka_count = active_q.filter(Owner.owner_type == "legal").count()
-
-    # Contact counts
-    s_emailem_count = db.query(Owner).filter(
-        Owner.is_active == True, Owner.email != "", Owner.email.isnot(None)  # noqa: E712
-    ).count()
-    bez_emailu_count = total - s_emailem_count
-    s_telefonem_count = db.query(Owner).filter(
-        Owner.is_active == True, Owner.phone != "", Owner.phone.isnot(None)  # noqa: E712
-    ).count()
-    bez_telefonu_count = total - s_telefonem_count
-
-    # Distinct ownership types for filter dropdown
-    ownership_types = [
-        r[0] for r in db.query(OwnerUnit.ownership_type).filter(
-            OwnerUnit.ownership_type.isnot(None),
-            OwnerUnit.ownership_type != "",
-            OwnerUnit.valid_to.is_(None),
-        ).distinct().order_by(OwnerUnit.ownership_type).all()
-    ]
-
-    # Build current filter URL for back_url chain
-    filter_params = []
-    if search:
-        filter_params.append(f"search={search}")
-    if typ:
-        filter_params.append(f"typ={typ}")
-    if vlastnictvi:
-        filter_params.append(f"vlastnictvi={vlastnictvi}")
-    if kontakt:
-        filter_params.append(f"kontakt={kontakt}")
-    if sort != "name":
-        filter_params.append(f"sort={sort}")
-    current_url = "/vlastnici" + ("?" + "&".join(filter_params) if filter_params else "")
+    keys, descending = _OWNER_SORTS.get(sort, _OWNER_SORTS["name"])
+    return keyset_page(query, Owner, keys, cursor, descending)
+
+
+def _owner_rows_context(filter_params: list, owners: list, next_cursor: int | None) -> dict:
+    """Template context shared by the list page and the next-page partial."""
+    query_string = urlencode(filter_params)
+    current_url = "/vlastnici" + ("?" + query_string if query_string else "")
+    next_url = None
+    if next_cursor is not None:
+        next_url = "/vlastnici/stranka?" + urlencode(filter_params + [("cursor", next_cursor)])
+    return {"owners": owners, "current_url": current_url, "next_url": next_url}
+
+
+@router.get("/vlastnici", response_class=HTMLResponse)
+def owners_list(
+    request: Request,
+    search: str = "",
+    typ: str = "",
+    vlastnictvi: str = "",
+    kontakt: str = "",
+    sort: str = "name",
+    db: Session = Depends(get_read_db),
+):
+    """List owners with search/filter/sort; further pages load on scroll."""
+    user = get_current_user(request, db)
+    if user is None:
+        return RedirectResponse(url="/login", status_code=303)
+
+    owners, next_cursor = _owners_page(db, search, typ, vlastnictvi, kontakt, sort, None)
+
+    # Filter bubble counts (one aggregate query, cached until owners change)
+    facets = owner_facets(db)
 
     return request.app.state.templates.TemplateResponse(
         request,
         "owners/list.html",
         {
             "user": user,
-            "owners": owners,
+            **_owner_rows_context(
+                _owner_filter_params(search, typ, vlastnictvi, kontakt, sort), owners, next_cursor
+            ),
             "search": search,
             "typ": typ,
             "vlastnictvi": vlastnictvi,
             "kontakt": kontakt,
             "sort": sort,
-            "total": total,
-            "fyzicka_count": fyzicka_count,
-            "pravnicka_count": pravnicka_count,
-            "s_emailem_count": s_emailem_count,
-            "bez_emailu_count": bez_emailu_count,
-            "s_telefonem_count": s_telefonem_count,
-            "bez_telefonu_count": bez_telefonu_count,
-            "current_url": current_url,
-            "ownership_types": ownership_types,
+            **facets,
         },
     )
 
 
+@router.get("/vlastnici/stranka", response_class=HTMLResponse)
+def owners_list_page(
+    request: Request,
+    cursor: int,
+    search: str = "",
+    typ: str = "",
+    vlastnictvi: str = "",
+    kontakt: str = "",
+    sort: str = "name",
+    db: Session = Depends(get_read_db),
+):
+    """HTMX: next page of owner rows after ``cursor`` (infinite scroll)."""
+    user = get_current_user(request, db)
+    if user is None:
+        return HTMLResponse("")
+
+    owners, next_cursor = _owners_page(db, search, typ, vlastnictvi, kontakt, sort, cursor)
+    return request.app.state.templates.TemplateResponse(
+        request,
+        "partials/owner_rows.html",
+        _owner_rows_context(
+            _owner_filter_params(search, typ, vlastnictvi, kontakt, sort), owners, next_cursor
+        ),
+    )
+
+
 # --- Export (must be before {owner_id}) ---
 
 
@@ -163,15 +169,15 @@ def owners_export(request: Request, db: Session = Depends(get_db)):
         db.query(Owner)
         .filter(Owner.is_active == True)  # noqa: E712
         .order_by(Owner.name_normalized)
-        .all()
+        .yield_per(500)
     )
 
-    from app.services.excel_export import export_owners_xlsx
+    from app.services.excel_export import stream_owners_xlsx
 
-    output = export_owners_xlsx(owners)
+    chunks = stream_owners_xlsx(owners)
 
     return StreamingResponse(
-        output,
+        chunks,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": "attachment; filename=vlastnici.xlsx"},
     )
@@ -254,8 +260,6 @@ def import_confirm(request: Request, db: Session = Depends(get_db)):
     if user is None:
         return RedirectResponse(url="/login", status_code=303)
 
-    from app.services.excel_import import import_owners_from_excel
-
     token = request.session.pop("import_token", "")
     filename = request.session.pop("import_filename", "import.xlsx")
 
@@ -268,6 +272,18 @@ def import_confirm(request: Request, db: Session = Depends(get_db)):
         request.session["flash"] = {"type": "error", "message": "Soubor importu nenalezen."}
         return RedirectResponse(url="/vlastnici/import", status_code=303)
 
+    job = submit_job(
+        db, "owner_import", f"Import vlastníků — {filename}",
+        _import_owners_job, temp_path, filename,
+        user_id=user.id, redirect_url="/vlastnici",
+    )
+    return job_redirect(request, job)
+
+
+def _import_owners_job(db: Session, ctx, temp_path: str, filename: str) -> dict:
+    """Job: run the owner import from the saved Excel file."""
+    from app.services.excel_import import import_owners_from_excel
+
     try:
         # Run the actual import
         result = import_owners_from_excel(db, temp_path)
@@ -278,27 +294,22 @@ def import_confirm(request: Request, db: Session = Depends(get_db)):
             filename=filename,
             records_count=result["rows_processed"],
             status="success",
+            details=f"{result['rows_per_second']:.0f} řádků/s",
         )
         db.add(log)
         db.commit()
-
-        request.session["flash"] = {
-            "type": "success",
-            "message": (
-                f"Import dokončen: {result['owners_created']} vlastníků, "
-                f"{result['units_created']} jednotek, "
-                f"{result['links_created']} vazeb."
-            ),
-        }
-    except Exception as e:
-        db.rollback()
-        request.session["flash"] = {"type": "error", "message": f"Chyba importu: {e}"}
     finally:
         # Clean up temp file
         if os.path.exists(temp_path):
             os.remove(temp_path)
 
-    return RedirectResponse(url="/vlastnici", status_code=303)
+    result["message"] = (
+        f"Import dokončen: {result['owners_created']} vlastníků, "
+        f"{result['units_created']} jednotek, "
+        f"{result['links_created']} vazeb "
+        f"({result['rows_per_second']:.0f} řádků/s)."
+    )
+    return result
 
 
 @router.post("/vlastnici/import/{log_id}/smazat")
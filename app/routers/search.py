@@ -4,15 +4,15 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
-from app.database import get_db
-from app.models.owner import Owner, Unit
-from app.models.voting import Voting
+from app.database import get_read_db
+from app.models.owner import Unit
+from app.services.search_index import search_owners, search_units, search_votings
 
 router = APIRouter()
 
 
 @router.get("/hledani", response_class=HTMLResponse)
-def search(request: Request, q: str = "", db: Session = Depends(get_db)):
+def search(request: Request, q: str = "", db: Session = Depends(get_read_db)):
     """Full-text search across modules."""
     user = get_current_user(request, db)
     if user is None:
@@ -21,44 +21,19 @@ def search(request: Request, q: str = "", db: Session = Depends(get_db)):
     results = {"owners": [], "units": [], "votings": []}
 
     if q and len(q) >= 2:
-        term = f"%{q}%"
+        # Owners and votings via the FTS5 index, ranked by bm25
+        results["owners"] = search_owners(db, q)
 
-        # Search owners
-        results["owners"] = (
-            db.query(Owner)
-            .filter(
-                Owner.is_active == True,  # noqa: E712
-                (Owner.first_name.ilike(term))
-                | (Owner.last_name.ilike(term))
-                | (Owner.name_with_titles.ilike(term))
-                | (Owner.name_normalized.ilike(term))
-                | (Owner.email.ilike(term))
-                | (Owner.company_id.ilike(term))
-            )
-            .limit(10)
-            .all()
-        )
-
-        # Search units
+        # Search units — an exact unit number uses the unique index
         try:
             unit_num = int(q)
             results["units"] = (
                 db.query(Unit).filter(Unit.unit_number == unit_num).limit(10).all()
             )
         except ValueError:
-            results["units"] = (
-                db.query(Unit)
-                .filter(
-                    (Unit.address.ilike(term)) | (Unit.building_number.ilike(term))
-                )
-                .limit(10)
-                .all()
-            )
+            results["units"] = search_units(db, q)
 
-        # Search votings
-        results["votings"] = (
-            db.query(Voting).filter(Voting.name.ilike(term)).limit(10).all()
-        )
+        results["votings"] = search_votings(db, q)
 
     total = sum(len(v) for v in results.values())
 
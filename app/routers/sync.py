@@ -1,7 +1,5 @@
 """Sync (Synchronizace) routes — CSV upload, comparison, update."""
-import csv
 import io
-import json
 import os
 import uuid
 from typing import Optional
@@ -14,6 +12,11 @@ from app.auth import get_current_user
 from app.config import settings
 from app.database import get_db
 from app.models.sync import SyncSession, SyncRecord
+from app.services.audit_service import log_change
+from app.services import csv_ingest
+from app.services.csv_comparator import compare_csv_file, detach_session, previous_session_id
+from app.services.job_queue import job_redirect, submit_job
+from app.services.sync_apply import apply_contacts, apply_selected_updates
 
 router = APIRouter()
 
@@ -59,35 +62,17 @@ def sync_upload_page(request: Request, db: Session = Depends(get_db)):
 
 
 @router.post("/synchronizace/nova")
-async def sync_upload_csv(
+def sync_upload_csv(
     request: Request,
     name: str = Form(""),
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
 ):
-    """Step 1: Upload CSV → save to temp → detect columns → show mapping form."""
+    """Step 1: Upload CSV → stream to temp (UTF-8) → detect columns → show mapping form."""
     user = get_current_user(request, db)
     if user is None:
         return RedirectResponse(url="/login", status_code=303)
 
-    content = await file.read()
-
-    # Strip BOM
-    if content.startswith(b"\xef\xbb\xbf"):
-        content = content[3:]
-
-    text = content.decode("utf-8", errors="replace")
-
-    # Detect delimiter
-    delimiter = ";"
-    if text.count(",") > text.count(";"):
-        delimiter = ","
-
-    # Auto-detect format
-    source_format = "interní"
-    if "sousede" in text.lower() or "katastral" in text.lower():
-        source_format = "sousede.cz"
-
     # Save CSV to temp file
     token = str(uuid.uuid4())
     temp_path = os.path.join(_SYNC_TEMP_DIR, f"{token}.csv")
@@ -97,39 +82,25 @@ async def sync_upload_csv(
         request.session["flash"] = {"type": "error", "message": "Neplatná cesta souboru."}
         return RedirectResponse(url="/synchronizace/nova", status_code=303)
 
-    with open(temp_path, "w", encoding="utf-8") as f:
-        f.write(text)
-
-    # Parse headers and sample rows
-    reader = csv.DictReader(io.StringIO(text), delimiter=delimiter)
-    headers = reader.fieldnames or []
+    # One streaming pass: encoding + delimiter sniffing, headers, samples, row count
+    meta = csv_ingest.ingest_csv(file.file, temp_path)
+    headers = meta["headers"]
 
     if not headers:
-        os.remove(temp_path)
+        csv_ingest.discard(temp_path)
         request.session["flash"] = {"type": "error", "message": "CSV soubor neobsahuje žádné hlavičky."}
         return RedirectResponse(url="/synchronizace/nova", status_code=303)
-
-    # Read sample rows for preview (first 5)
-    sample_rows = []
-    for i, row in enumerate(reader):
-        if i >= 5:
-            break
-        sample_rows.append(row)
-
-    # Count total rows
-    text_io = io.StringIO(text)
-    total_reader = csv.DictReader(text_io, delimiter=delimiter)
-    total_rows = sum(1 for _ in total_reader)
+    csv_ingest.save_meta(temp_path, meta)
+    source_format = meta["source_format"]
 
     # Auto-detect column mapping
     auto_mapping = _detect_columns(headers)
 
-    # Store session data
+    # Store session data (delimiter and headers live in the cached metadata)
     session_name = name or file.filename or "Synchronizace"
     request.session["sync_import_token"] = token
     request.session["sync_import_name"] = session_name
     request.session["sync_import_format"] = source_format
-    request.session["sync_import_delimiter"] = delimiter
 
     return request.app.state.templates.TemplateResponse(
         request,
@@ -139,8 +110,8 @@ async def sync_upload_csv(
             "session_name": session_name,
             "source_format": source_format,
             "headers": headers,
-            "sample_rows": sample_rows,
-            "total_rows": total_rows,
+            "sample_rows": meta["sample_rows"],
+            "total_rows": meta["total_rows"],
             "auto_mapping": auto_mapping,
         },
     )
@@ -159,117 +130,79 @@ async def sync_confirm_mapping(
     token = request.session.pop("sync_import_token", "")
     session_name = request.session.pop("sync_import_name", "Synchronizace")
     source_format = request.session.pop("sync_import_format", "interní")
-    delimiter = request.session.pop("sync_import_delimiter", ";")
 
     if not token:
         request.session["flash"] = {"type": "error", "message": "Žádná data k importu. Nahrajte CSV znovu."}
         return RedirectResponse(url="/synchronizace/nova", status_code=303)
 
     temp_path = os.path.join(_SYNC_TEMP_DIR, f"{token}.csv")
-    if not os.path.exists(temp_path):
+    meta = csv_ingest.load_meta(temp_path)
+    if not os.path.exists(temp_path) or meta is None:
         request.session["flash"] = {"type": "error", "message": "Soubor importu nenalezen. Nahrajte CSV znovu."}
         return RedirectResponse(url="/synchronizace/nova", status_code=303)
+    delimiter = meta["delimiter"]
 
-    # Read user-confirmed mapping from form
+    # Read user-confirmed mapping from form (only columns the upload step found)
     form = await request.form()
-    unit_col = str(form.get("unit_col", ""))
-    owner_col = str(form.get("owner_col", ""))
-    first_name_col = str(form.get("first_name_col", ""))
-    last_name_col = str(form.get("last_name_col", ""))
-    share_col = str(form.get("share_col", ""))
-
-    # Read CSV from temp file
-    with open(temp_path, "r", encoding="utf-8") as f:
-        text = f.read()
-
-    # Clean up temp file
-    try:
-        os.remove(temp_path)
-    except OSError:
-        pass
-
+    mapping = {
+        key: str(form.get(key, "")) if form.get(key, "") in meta["headers"] else ""
+        for key in ("unit_col", "owner_col", "first_name_col", "last_name_col", "share_col")
+    }
+    delta = form.get("delta") == "1"
+    job = submit_job(
+        db, "sync_compare", f"Porovnání CSV — {session_name}",
+        _compare_csv_job, temp_path, session_name, source_format, delimiter, mapping, delta,
+        user_id=user.id, redirect_url="/synchronizace",
+    )
+    return job_redirect(request, job)
+
+
+def _compare_csv_job(
+    db: Session,
+    ctx,
+    temp_path: str,
+    session_name: str,
+    source_format: str,
+    delimiter: str,
+    mapping: dict,
+    delta: bool = False,
+) -> dict:
+    """Job: parse the CSV with the confirmed mapping and create SyncSession + SyncRecords.
+
+    With ``delta`` rows unchanged since the previous session of the same
+    format are taken over from it instead of being compared again.
+    """
     # Create sync session
     ss = SyncSession(name=session_name, source_format=source_format)
     db.add(ss)
     db.flush()
+    base_session_id = previous_session_id(db, source_format, ss.id) if delta else None
 
-    # Parse CSV with confirmed mapping
-    reader = csv.DictReader(io.StringIO(text), delimiter=delimiter)
-
-    from app.models.owner import Owner, Unit, OwnerUnit
-
-    record_count = 0
-    for row in reader:
-        csv_unit = row.get(unit_col, "").strip() if unit_col else ""
-
-        # Build owner name: combined column or first+last
-        if owner_col:
-            csv_owner = row.get(owner_col, "").strip()
-        elif first_name_col or last_name_col:
-            fn = row.get(first_name_col, "").strip() if first_name_col else ""
-            ln = row.get(last_name_col, "").strip() if last_name_col else ""
-            csv_owner = f"{ln} {fn}".strip()
-        else:
-            csv_owner = ""
-
-        csv_share = row.get(share_col, "").strip() if share_col else ""
-
-        if not csv_unit and not csv_owner:
-            continue
-
-        # Find unit in DB
-        unit = None
-        if csv_unit:
-            # Try exact match on unit_number
-            try:
-                unit_num = int(csv_unit)
-                unit = db.query(Unit).filter(Unit.unit_number == unit_num).first()
-            except (ValueError, TypeError):
-                # Try string match (e.g. "123/4")
-                unit = db.query(Unit).filter(Unit.unit_number == csv_unit).first()
-
-        # Find DB owner for this unit
-        db_owner_name = ""
-        db_share = ""
-        csv_data_json = json.dumps(dict(row), ensure_ascii=False)
-        if unit:
-            ou = (
-                db.query(OwnerUnit)
-                .filter(OwnerUnit.unit_id == unit.id, OwnerUnit.valid_to.is_(None))
-                .first()
-            )
-            if ou:
-                owner = db.query(Owner).filter(Owner.id == ou.owner_id).first()
-                if owner:
-                    db_owner_name = owner.display_name
-                    db_share = str(ou.votes) if ou.votes else ""
-
-        # Determine status
-        status = _compare_records(db_owner_name, csv_owner, db_share, csv_share)
-
-        record = SyncRecord(
-            session_id=ss.id,
-            unit_id=unit.id if unit else None,
-            status=status,
-            db_owner_name=db_owner_name,
-            csv_owner_name=csv_owner,
-            db_share=db_share,
-            csv_share=csv_share,
-            csv_data=csv_data_json,
+    try:
+        record_count = compare_csv_file(
+            db, ss.id, temp_path, delimiter, mapping,
+            progress=ctx.progress, base_session_id=base_session_id,
         )
-        db.add(record)
-        record_count += 1
+    finally:
+        # Clean up temp file
+        csv_ingest.discard(temp_path)
 
     db.commit()
 
+    result = {
+        "redirect_url": f"/synchronizace/{ss.id}",
+        "session_id": ss.id,
+        "records": record_count,
+    }
     if record_count == 0:
-        request.session["flash"] = {
-            "type": "error",
-            "message": f"Synchronizace '{session_name}' vytvořena, ale nebyly naparsovány žádné záznamy.",
-        }
+        result["flash_type"] = "error"
+        result["message"] = f"Synchronizace '{session_name}' vytvořena, ale nebyly naparsovány žádné záznamy."
     else:
-        request.session["flash"] = {"type": "success", "message": f"Synchronizace '{session_name}' vytvořena — {record_count} záznamů."}
-    return RedirectResponse(url=f"/synchronizace/{ss.id}", status_code=303)
+        result["message"] = f"Synchronizace '{session_name}' vytvořena — {record_count} záznamů."
+        if base_session_id:
+            db.refresh(ss)
+            result["message"] += f" Beze změny oproti minulé kontrole: {ss.reused_count}."
+    return result
 
 
 @router.get("/synchronizace/{session_id}", response_class=HTMLResponse)
@@ -327,6 +260,7 @@ def sync_delete(
 
     ss = db.query(SyncSession).filter(SyncSession.id == session_id).first()
     if ss:
+        detach_session(db, ss.id)
         db.delete(ss)
         db.commit()
         request.session["flash"] = {"type": "success", "message": "Synchronizace smazána."}
@@ -385,36 +319,14 @@ async def sync_selective_update(
         return RedirectResponse(url="/login", status_code=303)
 
     form = await request.form()
-    record_ids = form.getlist("record_ids")
-
-    updated = 0
-    for rid_str in record_ids:
+    record_ids = []
+    for rid_str in form.getlist("record_ids"):
         try:
-            rid = int(rid_str)
+            record_ids.append(int(rid_str))
         except (ValueError, TypeError):
             continue
 
-        rec = db.query(SyncRecord).filter(
-            SyncRecord.id == rid, SyncRecord.session_id == session_id
-        ).first()
-        if rec and rec.unit_id:
-            # Update owner name from CSV if different
-            from app.models.owner import Owner, OwnerUnit
-            ou = db.query(OwnerUnit).filter(
-                OwnerUnit.unit_id == rec.unit_id, OwnerUnit.valid_to.is_(None)
-            ).first()
-            if ou:
-                owner = db.query(Owner).filter(Owner.id == ou.owner_id).first()
-                if owner and rec.csv_owner_name:
-                    # Update share if different
-                    if rec.csv_share:
-                        try:
-                            ou.votes = int(rec.csv_share)
-                        except (ValueError, TypeError):
-                            pass
-                rec.is_resolved = 1
-                updated += 1
-
+    updated = apply_selected_updates(db, session_id, record_ids, user_id=user.id)
     db.commit()
     request.session["flash"] = {"type": "success", "message": f"Aktualizováno {updated} záznamů."}
     return RedirectResponse(url=f"/synchronizace/{session_id}", status_code=303)
@@ -433,37 +345,7 @@ def sync_apply_contacts(
     if ss is None:
         return HTMLResponse("Synchronizace nenalezena", status_code=404)
 
-    # Mark all unresolved records as resolved for contact transfer
-    records = db.query(SyncRecord).filter(
-        SyncRecord.session_id == session_id,
-        SyncRecord.is_resolved == 0,
-    ).all()
-
-    transferred = 0
-    for rec in records:
-        if rec.csv_data:
-            import json
-            try:
-                csv_row = json.loads(rec.csv_data)
-                # Transfer email/phone if available
-                if rec.unit_id:
-                    from app.models.owner import OwnerUnit, Owner
-                    ou = db.query(OwnerUnit).filter(
-                        OwnerUnit.unit_id == rec.unit_id, OwnerUnit.valid_to.is_(None)
-                    ).first()
-                    if ou:
-                        owner = db.query(Owner).filter(Owner.id == ou.owner_id).first()
-                        if owner:
-                            for key in ["email", "telefon", "phone"]:
-                                if key in csv_row and csv_row[key]:
-                                    if key in ("telefon", "phone"):
-                                        owner.phone = csv_row[key]
-                                    else:
-                                        owner.email = csv_row[key]
-                                    transferred += 1
-            except (json.JSONDecodeError, TypeError):
-                pass
-
+    transferred = apply_contacts(db, session_id, user_id=user.id)
     db.commit()
     request.session["flash"] = {"type": "success", "message": f"Kontakty přeneseny ({transferred})."}
     return RedirectResponse(url=f"/synchronizace/{session_id}", status_code=303)
@@ -501,16 +383,18 @@ def sync_exchange_preview(
 
     # Find potential matches for new owner
     from app.models.owner import Owner, Unit, OwnerUnit
-    from difflib import SequenceMatcher
+    from app.services.owner_matcher import match_owners
 
     candidates = []
     if rec.csv_owner_name:
-        owners = db.query(Owner).filter(Owner.is_active == True).all()  # noqa: E712
-        for owner in owners:
-            score = SequenceMatcher(None, rec.csv_owner_name.lower(), owner.display_name.lower()).ratio()
-            if score >= 0.5:
-                candidates.append({"owner": owner, "score": score})
-        candidates.sort(key=lambda x: x["score"], reverse=True)
+        matches = match_owners(db, rec.csv_owner_name, limit=10, min_score=0.5, active_only=True)
+        owners_by_id = {
+            o.id: o for o in db.query(Owner).filter(Owner.id.in_([m["owner_id"] for m in matches])).all()
+        }
+        candidates = [
+            {"owner": owners_by_id[m["owner_id"]], "score": m["score"]}
+            for m in matches if m["owner_id"] in owners_by_id
+        ]
 
     unit = db.query(Unit).filter(Unit.id == rec.unit_id).first() if rec.unit_id else None
 
@@ -553,7 +437,7 @@ async def sync_exchange_confirm(
         return RedirectResponse(url=f"/synchronizace/{session_id}", status_code=303)
 
     from app.models.owner import Owner, OwnerUnit
-    from app.models.common import AuditLog, ImportLog
+    from app.models.common import ImportLog
     from datetime import date
 
     # Parse exchange date or default to today
@@ -593,15 +477,11 @@ async def sync_exchange_confirm(
     rec.is_resolved = 1
 
     # Create AuditLog entry
-    audit = AuditLog(
-        user_id=user.id if user else None,
-        action="exchange",
-        model_name="OwnerUnit",
-        record_id=rec.unit_id,
+    log_change(
+        db, user.id if user else None, "exchange", "OwnerUnit", rec.unit_id,
         old_value=f"unit_id={rec.unit_id}, owners=[{','.join(old_owner_names)}]",
         new_value=f"unit_id={rec.unit_id}, new_owner_id={new_owner_id}, date={exchange_date}",
     )
-    db.add(audit)
 
     # Create ImportLog entry
     import_log = ImportLog(
@@ -654,10 +534,10 @@ def sync_bulk_exchange_confirm(
     if redirect:
         return redirect
 
-    from app.models.owner import Owner, OwnerUnit
-    from app.models.common import AuditLog, ImportLog
+    from app.models.owner import OwnerUnit
+    from app.models.common import ImportLog
     from datetime import date
-    from difflib import SequenceMatcher
+    from app.services.owner_matcher import get_owner_index
 
     records = db.query(SyncRecord).filter(
         SyncRecord.session_id == session_id,
@@ -665,24 +545,16 @@ def sync_bulk_exchange_confirm(
         SyncRecord.is_resolved == 0,
     ).all()
 
-    # Query all active owners ONCE (fix O(N*M) → O(N+M))
-    all_owners = db.query(Owner).filter(Owner.is_active == True).all()  # noqa: E712
+    # Build/reuse the owner name index once for all records
+    owner_index = get_owner_index(db)
 
     exchanged = 0
     for rec in records:
         if not rec.unit_id or not rec.csv_owner_name:
             continue
 
-        # Find best matching owner from pre-fetched list
-        best_match = None
-        best_score = 0.0
-        for owner in all_owners:
-            score = SequenceMatcher(None, rec.csv_owner_name.lower(), owner.display_name.lower()).ratio()
-            if score > best_score:
-                best_score = score
-                best_match = owner
-
-        if best_match and best_score >= 0.9:
+        best_match = owner_index.best(rec.csv_owner_name, min_score=0.9, active_only=True)
+        if best_match:
             # Soft-delete old
             old_ous = db.query(OwnerUnit).filter(
                 OwnerUnit.unit_id == rec.unit_id,
@@ -693,7 +565,7 @@ def sync_bulk_exchange_confirm(
 
             # Create new
             new_ou = OwnerUnit(
-                owner_id=best_match.id,
+                owner_id=best_match["owner_id"],
                 unit_id=rec.unit_id,
                 valid_from=date.today(),
             )
@@ -701,16 +573,13 @@ def sync_bulk_exchange_confirm(
             rec.is_resolved = 1
             exchanged += 1
 
-            # AuditLog for each exchange
-            audit = AuditLog(
-                user_id=user.id if user else None,
-                action="exchange",
-                model_name="OwnerUnit",
-                record_id=rec.unit_id,
+            # AuditLog for each exchange (batched by the background writer after commit)
+            log_change(
+                db, user.id if user else None, "exchange", "OwnerUnit", rec.unit_id,
                 old_value=f"unit_id={rec.unit_id}, old_owner={rec.db_owner_name}",
-                new_value=f"unit_id={rec.unit_id}, new_owner={best_match.display_name}, score={best_score:.2f}",
+                new_value=f"unit_id={rec.unit_id}, new_owner={best_match['display_name']}, score={best_match['score']:.2f}",
+                background=True,
             )
-            db.add(audit)
 
     # ImportLog for bulk exchange
     if exchanged > 0:
@@ -829,40 +698,3 @@ def _detect_columns(headers: list) -> dict:
             mapping["share"] = h
 
     return mapping
-
-
-def _compare_records(db_name: str, csv_name: str, db_share: str, csv_share: str) -> str:
-    """Compare DB and CSV records, return status."""
-    from difflib import SequenceMatcher
-
-    if not db_name and not csv_name:
-        return "chybí"
-    if not db_name:
-        return "chybí"
-
-    # Normalize for comparison
-    dn = db_name.strip().lower()
-    cn = csv_name.strip().lower()
-
-    if dn == cn:
-        if db_share == csv_share:
-            return "shoda"
-        else:
-            return "rozdílné_podíly"
-
-    # Check reversed name
-    parts = cn.split()
-    if len(parts) == 2:
-        reversed_cn = f"{parts[1]} {parts[0]}".lower()
-        if dn == reversed_cn:
-            if db_share == csv_share:
-                return "přeházená"
-            else:
-                return "rozdílné_podíly"
-
-    # Fuzzy match
-    score = SequenceMatcher(None, dn, cn).ratio()
-    if score >= 0.75:
-        return "částečná"
-
-    return "rozdílní"
@@ -1,6 +1,7 @@
 """Tax distribution (Rozúčtování) routes."""
 import os
-from typing import Optional
+import uuid
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, File, Form, Request, UploadFile
 from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
@@ -10,6 +11,11 @@ from app.auth import get_current_user
 from app.config import settings
 from app.database import get_db
 from app.models.tax import TaxSession, TaxDocument, TaxDistribution
+from app.services.job_queue import job_redirect, submit_job
+from app.services.pdf_extractor import extract_names, name_from_filename
+from app.services.pdf_store import (
+    cached_names, drop_reservation, put_stream, register_blobs, release_blobs, reserve_blobs,
+)
 
 router = APIRouter()
 
@@ -144,13 +150,17 @@ def tax_serve_pdf(
 
 
 @router.post("/dane/{session_id}/upload")
-async def tax_upload_pdf(
+def tax_upload_pdf(
     session_id: int,
     request: Request,
-    files: list = File(...),
+    files: List[UploadFile] = File(...),
     db: Session = Depends(get_db),
 ):
-    """Upload PDF documents to a tax session."""
+    """Upload PDF documents to a tax session.
+
+    A sync handler: FastAPI runs it in the threadpool, so copying the files
+    never blocks the event loop.
+    """
     user = get_current_user(request, db)
     if user is None:
         return RedirectResponse(url="/login", status_code=303)
@@ -159,37 +169,86 @@ async def tax_upload_pdf(
     if ts is None:
         return HTMLResponse("Rozúčtování nenalezeno", status_code=404)
 
-    upload_dir = os.path.join(settings.UPLOAD_DIR, "tax", str(session_id))
-    os.makedirs(upload_dir, exist_ok=True)
-
-    uploaded = 0
-    for f in files:
-        if hasattr(f, 'filename') and f.filename:
-            file_path = os.path.join(upload_dir, f.filename)
-            content = await f.read()
-            with open(file_path, "wb") as out:
-                out.write(content)
-
-            # Extract name from PDF (best-effort)
-            extracted_name = _extract_name_from_pdf(file_path)
-
-            doc = TaxDocument(
-                session_id=session_id,
-                filename=f.filename,
-                file_path=file_path,
-                extracted_name=extracted_name,
-            )
-            db.add(doc)
-            db.flush()
-
-            # Auto-match to owners
-            _auto_match_document(db, doc)
-            uploaded += 1
+    # Files are streamed into the content-addressed store within the request
+    # and reserved until the job has written their documents;
+    # extraction + matching run as a job
+    saved = []
+    try:
+        for f in files:
+            if f.filename:
+                sha256, file_path = put_stream(f.file)
+                saved.append((os.path.basename(f.filename), file_path, sha256))
+        token = uuid.uuid4().hex
+        reserve_blobs(db, token, [sha256 for _, _, sha256 in saved])
+        db.commit()
+    except BaseException:
+        db.rollback()
+        release_blobs(db, [sha256 for _, _, sha256 in saved])
+        db.commit()
+        raise
+
+    job = submit_job(
+        db, "tax_upload", f"Zpracování PDF — {ts.name}",
+        _process_uploaded_pdfs_job, session_id, saved, token,
+        user_id=user.id, redirect_url=f"/dane/{session_id}",
+    )
+    return job_redirect(request, job)
+
+
+def _process_uploaded_pdfs_job(db: Session, ctx, session_id: int, saved: list, token: str = "") -> dict:
+    """Job: extract owner names from uploaded PDFs and match them in one batch.
 
+    The upload's blob reservation is dropped with the documents' commit; on
+    failure the blobs nothing else uses are released.
+    """
+    try:
+        return _process_uploaded_pdfs(db, ctx, session_id, saved, token)
+    except BaseException:
+        db.rollback()
+        release_blobs(db, drop_reservation(db, token))
+        db.commit()
+        raise
+
+
+def _process_uploaded_pdfs(db: Session, ctx, session_id: int, saved: list, token: str) -> dict:
+    from app.services.owner_matcher import get_owner_index
+
+    # Contents uploaded before keep their cached names; only new ones are parsed
+    hashes = [sha256 for _, _, sha256 in saved]
+    names = cached_names(db, hashes)
+    new_files = [(sha256, file_path) for _, file_path, sha256 in saved if sha256 not in names]
+    extracted = extract_names(new_files, max_workers=settings.PDF_WORKERS, progress=ctx.progress)
+    register_blobs(db, extracted)
+    names.update(extracted)
+
+    docs = [
+        TaxDocument(
+            session_id=session_id,
+            filename=filename,
+            file_path=file_path,
+            content_hash=sha256,
+            extracted_name=names.get(sha256) or name_from_filename(filename),
+        )
+        for filename, file_path, sha256 in saved
+    ]
+    db.add_all(docs)
+    db.flush()
+
+    # Auto-match against one owner index (PRD threshold 0.6)
+    index = get_owner_index(db)
+    for doc in docs:
+        match = index.best(doc.extracted_name, min_score=0.6) if doc.extracted_name else None
+        if match:
+            db.add(TaxDistribution(
+                document_id=doc.id,
+                owner_id=match["owner_id"],
+                matched_name=match["display_name"],
+                match_score=match["score"],
+            ))
+    drop_reservation(db, token)
     db.commit()
 
-    request.session["flash"] = {"type": "success", "message": f"Nahráno {uploaded} souborů."}
-    return RedirectResponse(url=f"/dane/{session_id}", status_code=303)
+    return {"message": f"Nahráno {len(docs)} souborů.", "uploaded": len(docs)}
 
 
 @router.get("/dane/{session_id}/parovani", response_class=HTMLResponse)
@@ -317,78 +376,11 @@ def tax_delete(
 
     ts = db.query(TaxSession).filter(TaxSession.id == session_id).first()
     if ts:
+        hashes = [doc.content_hash for doc in ts.documents]
         db.delete(ts)
+        db.flush()
+        release_blobs(db, hashes)
         db.commit()
         request.session["flash"] = {"type": "success", "message": "Rozúčtování smazáno."}
 
     return RedirectResponse(url="/dane", status_code=303)
-
-
-# --- Helper functions ---
-
-
-def _extract_name_from_pdf(file_path: str) -> str:
-    """Extract owner name from PDF file (best-effort)."""
-    try:
-        import pdfplumber
-        with pdfplumber.open(file_path) as pdf:
-            if pdf.pages:
-                text = pdf.pages[0].extract_text() or ""
-                # Look for name patterns in first few lines
-                lines = text.strip().split("\n")
-                for line in lines[:10]:
-                    line = line.strip()
-                    # Skip empty lines and common headers
-                    if not line or len(line) < 3:
-                        continue
-                    if any(kw in line.lower() for kw in ["rozúčtování", "příjmů", "datum", "strana", "celkem"]):
-                        continue
-                    # First non-header line likely contains the name
-                    return line
-    except Exception:
-        pass
-
-    # Fallback: try to extract name from filename
-    basename = os.path.splitext(os.path.basename(file_path))[0]
-    # Remove common prefixes/suffixes
-    for prefix in ["rozuctovani_", "dane_", "tax_"]:
-        if basename.lower().startswith(prefix):
-            basename = basename[len(prefix):]
-    return basename.replace("_", " ").replace("-", " ").strip()
-
-
-def _auto_match_document(db: Session, doc: TaxDocument) -> None:
-    """Auto-match document to owners using fuzzy matching."""
-    from difflib import SequenceMatcher
-    from app.models.owner import Owner
-
-    extracted = doc.extracted_name
-    if not extracted:
-        return
-
-    owners = db.query(Owner).all()
-    best_match = None
-    best_score = 0.0
-
-    for owner in owners:
-        display = owner.display_name
-        # Compare both orderings: "First Last" and "Last First"
-        score1 = SequenceMatcher(None, extracted.lower(), display.lower()).ratio()
-        reversed_name = f"{owner.last_name} {owner.first_name}"
-        score2 = SequenceMatcher(None, extracted.lower(), reversed_name.lower()).ratio()
-        score = max(score1, score2)
-
-        if score > best_score:
-            best_score = score
-            best_match = owner
-
-    # Use threshold from PRD: 0.6 within unit, 0.75 global
-    threshold = 0.6
-    if best_match and best_score >= threshold:
-        dist = TaxDistribution(
-            document_id=doc.id,
-            owner_id=best_match.id,
-            matched_name=best_match.display_name,
-            match_score=best_score,
-        )
-        db.add(dist)
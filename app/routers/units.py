@@ -1,13 +1,17 @@
 """Unit management routes."""
 from typing import Optional
+from urllib.parse import urlencode
 
 from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session, selectinload
 
 from app.auth import get_current_user
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.owner import Owner, OwnerUnit, Unit
+from app.services.facets import unit_facets
+from app.services.pagination import keyset_page
 
 router = APIRouter()
 
@@ -42,21 +46,25 @@ def _require_editor(request: Request, db: Session):
     return user, None
 
 
-@router.get("/jednotky", response_class=HTMLResponse)
-def units_list(
-    request: Request,
-    search: str = "",
-    building: str = "",
-    space_type: str = "",
-    section: str = "",
-    sort: str = "unit_number",
-    db: Session = Depends(get_db),
-):
-    """List all units with search/filter/sort."""
-    user = get_current_user(request, db)
-    if user is None:
-        return RedirectResponse(url="/login", status_code=303)
+# sort -> (keyset keys, descending); unit_number is unique and ends every key
+_UNIT_SORTS = {
+    "unit_number": ([Unit.unit_number], False),
+    "building": ([func.coalesce(Unit.building_number, ""), Unit.unit_number], False),
+    "area": ([func.coalesce(Unit.floor_area, 0.0), Unit.unit_number], True),
+}
+
+
+def _unit_filter_params(search: str, building: str, space_type: str, section: str, sort: str) -> list:
+    """Non-default list filters as (name, value) pairs, in URL order."""
+    params = [("search", search), ("building", building), ("space_type", space_type), ("section", section)]
+    if sort != "unit_number":
+        params.append(("sort", sort))
+    return [(k, v) for k, v in params if v]
 
+
+def _units_page(db: Session, search: str, building: str, space_type: str, section: str,
+                sort: str, cursor: int | None) -> tuple:
+    """One keyset page of the filtered unit list: (units, next_cursor)."""
     query = db.query(Unit).options(
         selectinload(Unit.owner_units).selectinload(OwnerUnit.owner)
     )
@@ -86,56 +94,35 @@ def units_list(
     if section:
         query = query.filter(Unit.section == section)
 
-    # Sorting
-    sort_map = {
-        "unit_number": Unit.unit_number.asc(),
-        "building": Unit.building_number.asc(),
-        "area": Unit.floor_area.desc(),
-    }
-    order = sort_map.get(sort, Unit.unit_number.asc())
-    query = query.order_by(order)
-
-    units = query.all()
-
-    # Buildings for filter
-    buildings = (
-        db.query(Unit.building_number)
-        .filter(Unit.building_number != "", Unit.building_number != None)  # noqa: E711
-        .distinct()
-        .order_by(Unit.building_number)
-        .all()
-    )
-    building_list = [b[0] for b in buildings]
-
-    # Space types for filter bubbles (with counts)
-    space_type_rows = (
-        db.query(Unit.space_type)
-        .filter(Unit.space_type != "", Unit.space_type != None)  # noqa: E711
-        .distinct()
-        .order_by(Unit.space_type)
-        .all()
-    )
-    space_type_list = []
-    for row in space_type_rows:
-        st = row[0]
-        cnt = db.query(Unit).filter(Unit.space_type == st).count()
-        space_type_list.append({"value": st, "count": cnt})
-
-    # Sections for filter bubbles (with counts)
-    section_rows = (
-        db.query(Unit.section)
-        .filter(Unit.section != "", Unit.section != None)  # noqa: E711
-        .distinct()
-        .order_by(Unit.section)
-        .all()
-    )
-    section_list = []
-    for row in section_rows:
-        s = row[0]
-        cnt = db.query(Unit).filter(Unit.section == s).count()
-        section_list.append({"value": s, "count": cnt})
+    keys, descending = _UNIT_SORTS.get(sort, _UNIT_SORTS["unit_number"])
+    return keyset_page(query, Unit, keys, cursor, descending)
+
+
+def _unit_next_url(filter_params: list, next_cursor: int | None) -> str | None:
+    if next_cursor is None:
+        return None
+    return "/jednotky/stranka?" + urlencode(filter_params + [("cursor", next_cursor)])
+
+
+@router.get("/jednotky", response_class=HTMLResponse)
+def units_list(
+    request: Request,
+    search: str = "",
+    building: str = "",
+    space_type: str = "",
+    section: str = "",
+    sort: str = "unit_number",
+    db: Session = Depends(get_read_db),
+):
+    """List units with search/filter/sort; further pages load on scroll."""
+    user = get_current_user(request, db)
+    if user is None:
+        return RedirectResponse(url="/login", status_code=303)
+
+    units, next_cursor = _units_page(db, search, building, space_type, section, sort, None)
 
-    total = db.query(Unit).count()
+    # Filter bubble counts (one GROUP BY, cached until units change)
+    facets = unit_facets(db)
 
     return request.app.state.templates.TemplateResponse(
         request,
@@ -143,15 +130,44 @@ def units_list(
         {
             "user": user,
             "units": units,
+            "next_url": _unit_next_url(
+                _unit_filter_params(search, building, space_type, section, sort), next_cursor
+            ),
             "search": search,
             "building": building,
             "space_type": space_type,
             "section": section,
             "sort": sort,
-            "total": total,
-            "building_list": building_list,
-            "space_type_list": space_type_list,
-            "section_list": section_list,
+            **facets,
+        },
+    )
+
+
+@router.get("/jednotky/stranka", response_class=HTMLResponse)
+def units_list_page(
+    request: Request,
+    cursor: int,
+    search: str = "",
+    building: str = "",
+    space_type: str = "",
+    section: str = "",
+    sort: str = "unit_number",
+    db: Session = Depends(get_read_db),
+):
+    """HTMX: next page of unit rows after ``cursor`` (infinite scroll)."""
+    user = get_current_user(request, db)
+    if user is None:
+        return HTMLResponse("")
+
+    units, next_cursor = _units_page(db, search, building, space_type, section, sort, cursor)
+    return request.app.state.templates.TemplateResponse(
+        request,
+        "partials/unit_rows.html",
+        {
+            "units": units,
+            "next_url": _unit_next_url(
+                _unit_filter_params(search, building, space_type, section, sort), next_cursor
+            ),
         },
     )
 
@@ -2,17 +2,25 @@
 import io
 import os
 import shutil
+import time
 import uuid
 from typing import Optional
 
 from fastapi import APIRouter, Depends, File, Form, Request, UploadFile
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
 from app.config import settings
 from app.database import get_db
 from app.models.voting import Voting, VotingItem, Ballot, BallotVote
+from app.services.job_queue import job_redirect, submit_job
+from app.services.voting_import import (
+    apply_vote_matrix, build_vote_matrix, count_matched_rows,
+    load_ballot_map, load_existing_votes, load_unit_map,
+)
+from app.services.voting_results import compute_voting_results, rebuild_tallies, record_ballot_votes
 
 _IMPORT_TEMP_DIR = os.path.join(settings.UPLOAD_DIR, "_voting_import_temp")
 os.makedirs(_IMPORT_TEMP_DIR, exist_ok=True)
@@ -188,35 +196,7 @@ def voting_detail(
         .all()
     )
 
-    # Calculate results per item
-    results = []
-    for item in items:
-        votes = (
-            db.query(BallotVote)
-            .filter(BallotVote.voting_item_id == item.id)
-            .all()
-        )
-        pro = sum(1 for v in votes if v.vote == "PRO")
-        proti = sum(1 for v in votes if v.vote == "PROTI")
-        zdrzel = sum(1 for v in votes if v.vote == "Zdržel se")
-        total_votes = pro + proti + zdrzel
-        results.append({
-            "item": item,
-            "pro": pro,
-            "proti": proti,
-            "zdrzel": zdrzel,
-            "total": total_votes,
-            "pro_pct": round(pro / total_votes * 100, 1) if total_votes > 0 else 0,
-            "proti_pct": round(proti / total_votes * 100, 1) if total_votes > 0 else 0,
-            "zdrzel_pct": round(zdrzel / total_votes * 100, 1) if total_votes > 0 else 0,
-        })
-
-    ballot_count = db.query(Ballot).filter(Ballot.voting_id == voting_id).count()
-    processed_count = (
-        db.query(Ballot)
-        .filter(Ballot.voting_id == voting_id, Ballot.status == "zpracován")
-        .count()
-    )
+    summary = compute_voting_results(db, voting, items)
 
     return request.app.state.templates.TemplateResponse(
         request,
@@ -225,9 +205,10 @@ def voting_detail(
             "user": user,
             "voting": voting,
             "items": items,
-            "results": results,
-            "ballot_count": ballot_count,
-            "processed_count": processed_count,
+            "results": summary["items"],
+            "summary": summary,
+            "ballot_count": summary["ballot_count"],
+            "processed_count": summary["processed_count"],
         },
     )
 
@@ -334,8 +315,8 @@ def voting_generate_ballots(
     request: Request,
     db: Session = Depends(get_db),
 ):
-    """Generate ballot documents for all owners with units."""
-    from app.models.owner import Owner, OwnerUnit
+    """Generate ballot documents for all owners with units (as a background job)."""
+    from app.models.owner import OwnerUnit
 
     user = get_current_user(request, db)
     if user is None:
@@ -348,15 +329,43 @@ def voting_generate_ballots(
         request.session["flash"] = {"type": "error", "message": "Lístky lze generovat pouze v konceptu."}
         return RedirectResponse(url=f"/hlasovani/{voting_id}", status_code=303)
 
+    has_items = db.query(VotingItem.id).filter(VotingItem.voting_id == voting_id).first()
+    if not has_items:
+        request.session["flash"] = {"type": "error", "message": "Hlasování nemá žádné body."}
+        return RedirectResponse(url=f"/hlasovani/{voting_id}", status_code=303)
+
+    has_owners = db.query(OwnerUnit.id).filter(OwnerUnit.valid_to.is_(None)).first()
+    if not has_owners:
+        request.session["flash"] = {"type": "error", "message": "Žádní vlastníci s aktivními jednotkami."}
+        return RedirectResponse(url=f"/hlasovani/{voting_id}", status_code=303)
+
+    job = submit_job(
+        db, "ballots", f"Generování lístků — {voting.name}",
+        _generate_ballots_job, voting_id,
+        user_id=user.id, redirect_url=f"/hlasovani/{voting_id}", key=f"ballots:{voting_id}",
+    )
+    if job is None:
+        request.session["flash"] = {"type": "error", "message": "Lístky tohoto hlasování se už generují."}
+        return RedirectResponse(url=f"/hlasovani/{voting_id}", status_code=303)
+    return job_redirect(request, job)
+
+
+def _generate_ballots_job(db: Session, ctx, voting_id: int) -> dict:
+    """Job: render one ballot per owner with active units and activate the voting."""
+    from app.models.owner import Owner, OwnerUnit, Unit
+    from app.services.pdf_generator import generate_ballots
+
+    voting = db.query(Voting).filter(Voting.id == voting_id).first()
+    if voting is None or voting.status != "koncept":
+        raise ValueError("Lístky lze generovat pouze v konceptu.")
+
     items = (
         db.query(VotingItem)
         .filter(VotingItem.voting_id == voting_id)
         .order_by(VotingItem.number)
         .all()
     )
-    if not items:
-        request.session["flash"] = {"type": "error", "message": "Hlasování nemá žádné body."}
-        return RedirectResponse(url=f"/hlasovani/{voting_id}", status_code=303)
+    item_texts = [item.text for item in items]
 
     # Find owners with active units
     active_owners = (
@@ -367,56 +376,62 @@ def voting_generate_ballots(
         .all()
     )
 
-    if not active_owners:
-        request.session["flash"] = {"type": "error", "message": "Žádní vlastníci s aktivními jednotkami."}
-        return RedirectResponse(url=f"/hlasovani/{voting_id}", status_code=303)
-
-    item_texts = [item.text for item in items]
-    generated = 0
-
-    from app.models.owner import Unit
-    from app.services.pdf_generator import generate_ballot_pdf
+    # Active units of all owners in one query (instead of two per owner)
+    unit_rows = (
+        db.query(OwnerUnit.owner_id, Unit.id, Unit.unit_number)
+        .join(Unit, Unit.id == OwnerUnit.unit_id)
+        .filter(OwnerUnit.valid_to.is_(None))
+        .order_by(Unit.id)
+        .all()
+    )
+    units_by_owner = {}
+    for owner_id, unit_id, unit_number in unit_rows:
+        units_by_owner.setdefault(owner_id, []).append((unit_id, unit_number))
 
+    output_dir = os.path.join(settings.GENERATED_DIR, f"voting-{voting_id}")
+    jobs = []
     for owner in active_owners:
-        # Get owner's active units
-        owner_units = (
-            db.query(OwnerUnit)
-            .filter(OwnerUnit.owner_id == owner.id, OwnerUnit.valid_to.is_(None))
-            .all()
-        )
-        unit_ids = [ou.unit_id for ou in owner_units]
-        units = db.query(Unit).filter(Unit.id.in_(unit_ids)).all()
-        unit_numbers = ", ".join(str(u.unit_number) for u in units)
-
-        # Generate document
-        output_dir = os.path.join(settings.GENERATED_DIR, f"voting-{voting_id}")
-        output_path = os.path.join(output_dir, f"ballot-{voting_id}-{owner.id}.docx")
-
-        generate_ballot_pdf(
-            template_path=voting.template_path or "",
-            output_path=output_path,
-            voting_name=voting.name,
-            owner_name=owner.display_name,
-            unit_numbers=unit_numbers,
-            items=item_texts,
-        )
+        owner_units = units_by_owner.get(owner.id, [])
+        jobs.append({
+            "owner_id": owner.id,
+            "unit_id": owner_units[0][0] if owner_units else None,
+            "owner_name": owner.display_name,
+            "unit_numbers": ", ".join(str(number) for _, number in owner_units),
+            "output_path": os.path.join(output_dir, f"ballot-{voting_id}-{owner.id}.docx"),
+        })
 
-        # Create ballot record for first unit
-        ballot = Ballot(
-            voting_id=voting_id,
-            owner_id=owner.id,
-            unit_id=units[0].id if units else None,
-            status="vygenerován",
-            pdf_path=output_path,
-        )
-        db.add(ballot)
-        generated += 1
+    started = time.monotonic()
+    paths = generate_ballots(
+        template_path=voting.template_path or "",
+        voting_name=voting.name,
+        items=item_texts,
+        jobs=jobs,
+        max_workers=settings.BALLOT_WORKERS,
+        progress=ctx.progress,
+    )
+    elapsed = time.monotonic() - started
+
+    # Create ballot records (for the first unit) in one bulk insert
+    db.execute(insert(Ballot), [
+        {
+            "voting_id": voting_id,
+            "owner_id": job["owner_id"],
+            "unit_id": job["unit_id"],
+            "status": "vygenerován",
+            "pdf_path": path,
+        }
+        for job, path in zip(jobs, paths)
+    ])
+    generated = len(paths)
 
     voting.status = "aktivní"
     db.commit()
 
-    request.session["flash"] = {"type": "success", "message": f"Vygenerováno {generated} lístků. Hlasování aktivováno."}
-    return RedirectResponse(url=f"/hlasovani/{voting_id}", status_code=303)
+    return {
+        "message": f"Vygenerováno {generated} lístků za {elapsed:.1f} s. Hlasování aktivováno.",
+        "generated": generated,
+        "elapsed": elapsed,
+    }
 
 
 @router.get("/hlasovani/{voting_id}/listky", response_class=HTMLResponse)
@@ -527,21 +542,15 @@ async def process_single_ballot(
         .all()
     )
 
-    # Delete existing votes for this ballot
-    db.query(BallotVote).filter(BallotVote.ballot_id == ballot_id).delete()
-
-    # Record new votes from form data
+    # Replace existing votes with those from form data (tallies follow)
     form = await request.form()
-
+    votes = {}
     for item in items:
         vote_key = f"vote_{item.id}"
         vote_value = form.get(vote_key, "")
         if vote_value in ("PRO", "PROTI", "Zdržel se"):
-            db.add(BallotVote(
-                ballot_id=ballot_id,
-                voting_item_id=item.id,
-                vote=vote_value,
-            ))
+            votes[item.id] = vote_value
+    record_ballot_votes(db, voting_id, {ballot_id: votes})
 
     ballot.status = "zpracován"
     db.commit()
@@ -615,31 +624,24 @@ async def process_bulk_ballots(
     form = await request.form()
     ballot_ids = form.getlist("ballot_ids")
 
-    processed = 0
-    for bid_str in ballot_ids:
-        bid = int(bid_str)
-        ballot = db.query(Ballot).filter(
-            Ballot.id == bid, Ballot.voting_id == voting_id
-        ).first()
-        if ballot is None:
-            continue
-
-        # Delete existing votes
-        db.query(BallotVote).filter(BallotVote.ballot_id == bid).delete()
-
-        # Record votes
-        for item in items:
-            vote_key = f"vote_{item.id}"
-            vote_value = form.get(vote_key, "")
-            if vote_value in ("PRO", "PROTI", "Zdržel se"):
-                db.add(BallotVote(
-                    ballot_id=bid,
-                    voting_item_id=item.id,
-                    vote=vote_value,
-                ))
+    # Same votes for every selected ballot
+    votes = {}
+    for item in items:
+        vote_key = f"vote_{item.id}"
+        vote_value = form.get(vote_key, "")
+        if vote_value in ("PRO", "PROTI", "Zdržel se"):
+            votes[item.id] = vote_value
 
+    ballots = (
+        db.query(Ballot)
+        .filter(Ballot.id.in_([int(b) for b in ballot_ids]), Ballot.voting_id == voting_id)
+        .all()
+    )
+    # Replace existing votes (tallies follow)
+    record_ballot_votes(db, voting_id, {ballot.id: votes for ballot in ballots})
+    for ballot in ballots:
         ballot.status = "zpracován"
-        processed += 1
+    processed = len(ballots)
 
     db.commit()
 
@@ -853,18 +855,8 @@ async def voting_import_mapping(
         max_cols = max(len(r) for r in data_rows) if data_rows else 0
         headers = [f"Sloupec {i+1}" for i in range(max_cols)]
 
-    # Match rows to units
-    from app.models.owner import Unit
-    matched = 0
-    for row in data_rows:
-        if len(row) > unit_col and row[unit_col]:
-            try:
-                unit_num = int(str(row[unit_col]).strip())
-                unit = db.query(Unit).filter(Unit.unit_number == unit_num).first()
-                if unit:
-                    matched += 1
-            except (ValueError, TypeError):
-                pass
+    # Match rows to units (same unit map as the confirm step, one query)
+    matched = count_matched_rows(data_rows, unit_col, load_unit_map(db))
 
     # Store mapping config in session for confirm step
     request.session["voting_import_mapping"] = {
@@ -940,70 +932,20 @@ def voting_import_confirm(
 
         data_rows = all_rows[start_row - 1:] if start_row <= len(all_rows) else []
 
-        from app.models.owner import Owner, Unit, OwnerUnit
-
-        # If mode is "přepsat", clear existing votes for this voting
-        if import_mode == "prepsat":
-            existing_ballots = db.query(Ballot).filter(Ballot.voting_id == voting_id).all()
-            for b in existing_ballots:
-                db.query(BallotVote).filter(BallotVote.ballot_id == b.id).delete()
+        # Three preload queries, then the vote matrix is computed in memory
+        unit_map = load_unit_map(db)
+        ballot_map = load_ballot_map(db, voting_id)
+        existing = load_existing_votes(db, voting_id)
 
-        imported = 0
-        vote_mapping = {"pro": "PRO", "1": "PRO", "ano": "PRO", "yes": "PRO",
-                        "proti": "PROTI", "0": "PROTI", "ne": "PROTI", "no": "PROTI",
-                        "zdržel": "Zdržel se", "zdržel se": "Zdržel se", "abstain": "Zdržel se"}
-
-        # Compute vote column indices: all columns except owner_col and unit_col
-        max_cols = max(len(r) for r in data_rows) if data_rows else 0
-        vote_cols = [c for c in range(max_cols) if c != owner_col and c != unit_col]
-
-        for row in data_rows:
-            if not row:
-                continue
-            unit_val = str(row[unit_col]).strip() if len(row) > unit_col and row[unit_col] else ""
-
-            # Find unit
-            unit = None
-            if unit_val:
-                try:
-                    unit = db.query(Unit).filter(Unit.unit_number == int(unit_val)).first()
-                except (ValueError, TypeError):
-                    pass
-
-            if not unit:
-                continue
-
-            # Find ALL ballots for this unit (SJM matching — all co-owners)
-            ballots = db.query(Ballot).filter(
-                Ballot.voting_id == voting_id,
-                Ballot.unit_id == unit.id,
-            ).all()
-
-            if not ballots:
-                continue
-
-            # Process votes for each ballot (SJM: same votes for all co-owners on same unit)
-            for ballot in ballots:
-                for i, item in enumerate(items):
-                    if i < len(vote_cols):
-                        col_idx = vote_cols[i]
-                        if col_idx < len(row) and row[col_idx] is not None:
-                            vote_raw = str(row[col_idx]).strip().lower()
-                            vote_val = vote_mapping.get(vote_raw, "")
-                            if vote_val:
-                                existing = db.query(BallotVote).filter(
-                                    BallotVote.ballot_id == ballot.id,
-                                    BallotVote.voting_item_id == item.id,
-                                ).first()
-                                if existing:
-                                    existing.vote = vote_val
-                                else:
-                                    bv = BallotVote(ballot_id=ballot.id, voting_item_id=item.id, vote=vote_val)
-                                    db.add(bv)
-
-                ballot.status = "zpracován"
-                imported += 1
+        votes, ballot_ids, imported = build_vote_matrix(
+            data_rows, owner_col, unit_col, [item.id for item in items], unit_map, ballot_map,
+        )
+        # Mode "přepsat" clears existing votes for this voting first
+        apply_vote_matrix(
+            db, voting_id, votes, ballot_ids, existing, replace_all=(import_mode == "prepsat"),
+        )
 
+        rebuild_tallies(db, voting_id)
         db.commit()
         request.session["flash"] = {"type": "success", "message": f"Importováno {imported} hlasovacích lístků."}
 
@@ -1017,6 +959,32 @@ def voting_import_confirm(
     return RedirectResponse(url=f"/hlasovani/{voting_id}", status_code=303)
 
 
+@router.post("/hlasovani/{voting_id}/prepocitat")
+def voting_rebuild_tallies(
+    voting_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """Recompute precomputed results from recorded votes (consistency check)."""
+    user = get_current_user(request, db)
+    if user is None:
+        return RedirectResponse(url="/login", status_code=303)
+
+    voting = db.query(Voting).filter(Voting.id == voting_id).first()
+    if voting is None:
+        return HTMLResponse("Hlasování nenalezeno", status_code=404)
+
+    mismatched = rebuild_tallies(db, voting_id)
+    db.commit()
+
+    if mismatched:
+        message = f"Výsledky přepočítány, opraveno {len(mismatched)} nesouhlasících součtů."
+    else:
+        message = "Výsledky přepočítány, součty souhlasí."
+    request.session["flash"] = {"type": "success", "message": message}
+    return RedirectResponse(url=f"/hlasovani/{voting_id}", status_code=303)
+
+
 @router.post("/hlasovani/{voting_id}/smazat")
 def voting_delete(
     voting_id: int,
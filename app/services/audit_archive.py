@@ -0,0 +1,158 @@
+"""Monthly archives of old audit log entries.
+
+``archive_old_entries`` moves entries older than N whole months out of
+``audit_logs`` into one gzip-compressed JSON Lines file per month
+(``data/audit_archive/audit_YYYY-MM.jsonl.gz``), keeping the live table and
+its indexes small. A month's file is rewritten atomically before its rows
+are deleted; entries already present (by id) are skipped, so an archival
+interrupted between the two steps can simply be run again. Archived months
+stay searchable from the audit page via ``search_archive``.
+"""
+import gzip
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.common import AuditLog
+
+_MONTH_RE = re.compile(r"^\d{4}-\d{2}$")
+_FIELDS = ("id", "user_id", "action", "model_name", "record_id", "field_name", "old_value", "new_value")
+
+
+def archive_dir() -> str:
+    return os.path.join(os.path.dirname(settings.UPLOAD_DIR), "audit_archive")
+
+
+def archive_path(month: str) -> str:
+    return os.path.join(archive_dir(), f"audit_{month}.jsonl.gz")
+
+
+def list_archives() -> list:
+    """Archived months (YYYY-MM), newest first."""
+    directory = archive_dir()
+    if not os.path.exists(directory):
+        return []
+    months = []
+    for name in os.listdir(directory):
+        if name.startswith("audit_") and name.endswith(".jsonl.gz"):
+            month = name[len("audit_"):-len(".jsonl.gz")]
+            if _MONTH_RE.match(month):
+                months.append(month)
+    return sorted(months, reverse=True)
+
+
+def archive_cutoff(now: datetime, months: int) -> datetime:
+    """Start of the month ``months`` months before the month of ``now``."""
+    index = now.year * 12 + (now.month - 1) - months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _month_bounds(month: str) -> tuple:
+    year, mon = int(month[:4]), int(month[5:])
+    start = datetime(year, mon, 1)
+    end = datetime(year + mon // 12, mon % 12 + 1, 1)
+    return start, end
+
+
+def read_archive(month: str) -> Iterator[dict]:
+    """Entries of an archived month in archive order (timestamps as datetime)."""
+    path = archive_path(month)
+    if not _MONTH_RE.match(month) or not os.path.exists(path):
+        return
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            entry["timestamp"] = datetime.fromisoformat(entry["timestamp"]) if entry.get("timestamp") else None
+            yield entry
+
+
+def _write_month(month: str, rows: list) -> int:
+    """Merge ``rows`` into the month's archive file; return how many were new."""
+    existing = list(read_archive(month))
+    known = {entry["id"] for entry in existing}
+    fresh = [row for row in rows if row["id"] not in known]
+    os.makedirs(archive_dir(), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=archive_dir())
+    os.close(fd)
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as out:
+            for entry in existing + fresh:
+                entry = dict(entry)
+                if entry.get("timestamp"):
+                    entry["timestamp"] = entry["timestamp"].isoformat()
+                out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, archive_path(month))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(fresh)
+
+
+def archive_old_entries(
+    db: Session,
+    months: int,
+    now: Optional[datetime] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """Move entries older than ``months`` whole months into monthly archives.
+
+    Commits after each month. Returns {"archived": n, "months": [...]}.
+    """
+    cutoff = archive_cutoff(now or datetime.now(), months)
+    month_col = func.strftime("%Y-%m", AuditLog.timestamp)
+    pending = [
+        r[0] for r in db.query(month_col)
+        .filter(AuditLog.timestamp.isnot(None), AuditLog.timestamp < cutoff)
+        .distinct().order_by(month_col).all()
+    ]
+
+    archived = 0
+    for done, month in enumerate(pending, 1):
+        start, end = _month_bounds(month)
+        in_month = (AuditLog.timestamp >= start, AuditLog.timestamp < end)
+        rows = []
+        for log in db.query(AuditLog).filter(*in_month).order_by(AuditLog.timestamp, AuditLog.id).yield_per(1000):
+            row = {field: getattr(log, field) for field in _FIELDS}
+            row["timestamp"] = log.timestamp
+            rows.append(row)
+        if not rows:
+            continue
+        archived += _write_month(month, rows)
+        max_id = max(row["id"] for row in rows)
+        db.query(AuditLog).filter(*in_month, AuditLog.id <= max_id).delete(synchronize_session=False)
+        db.commit()
+        if progress:
+            progress(done, len(pending))
+    return {"archived": archived, "months": pending}
+
+
+def search_archive(month: str, action: str = "", model: str = "", q: str = "",
+                   limit: int = 200) -> list:
+    """Newest ``limit`` entries of an archived month matching the filters.
+
+    ``q`` is a case-insensitive substring of field name or old/new value.
+    """
+    needle = q.strip().lower()
+    matches = []
+    for entry in read_archive(month):
+        if action and entry.get("action") != action:
+            continue
+        if model and entry.get("model_name") != model:
+            continue
+        if needle and not any(
+            needle in (entry.get(key) or "").lower() for key in ("field_name", "old_value", "new_value")
+        ):
+            continue
+        matches.append(entry)
+    matches.reverse()  # archives are written oldest first
+    return matches[:limit]
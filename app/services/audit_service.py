@@ -1,8 +1,34 @@
-"""Audit logging service."""
+"""Audit logging service.
+
+``log_change`` does not write anything by itself: entries are buffered on
+the Session (``Session.info``) and inserted with one executemany INSERT
+when the caller commits, inside the same transaction — so an edit touching
+ten fields costs one commit, not eleven, and a rolled-back change leaves no
+audit trail.
+
+Bulk operations can pass ``background=True``: such entries are handed to a
+background writer after the commit succeeds and are inserted in batches on
+its own connection, keeping the caller's transaction short. With
+``AUDIT_FLUSH_INTERVAL = 0`` the writer inserts them right away instead.
+"""
+import logging
+import queue
+import threading
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, insert
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models.common import AuditLog
 
+logger = logging.getLogger(__name__)
+
+_PENDING = "audit_pending"  # written in the caller's transaction
+_DEFERRED = "audit_deferred"  # handed to the background writer after commit
+_MAX_BATCH = 1000  # submissions per background INSERT
+
 
 def log_change(
     db: Session,
@@ -13,16 +39,125 @@ def log_change(
     field_name: str = "",
     old_value: str = "",
     new_value: str = "",
+    background: bool = False,
 ) -> None:
-    """Record a data change in the audit log."""
-    entry = AuditLog(
-        user_id=user_id,
-        action=action,
-        model_name=model_name,
-        record_id=record_id,
-        field_name=field_name,
-        old_value=old_value,
-        new_value=new_value,
-    )
-    db.add(entry)
-    db.commit()
+    """Record a data change in the audit log (written on the caller's commit)."""
+    row = {
+        "user_id": user_id,
+        "action": action,
+        "model_name": model_name,
+        "record_id": record_id,
+        "field_name": field_name,
+        "old_value": old_value,
+        "new_value": new_value,
+        "timestamp": datetime.utcnow(),
+    }
+    db.info.setdefault(_DEFERRED if background else _PENDING, []).append(row)
+
+
+def ensure_audit_log_indexes(bind) -> None:
+    """Create the audit_logs indexes in a database made before they existed.
+
+    create_all() only creates indexes together with new tables.
+    """
+    for index in AuditLog.__table__.indexes:
+        index.create(bind, checkfirst=True)
+
+
+def flush_audit(db: Session) -> int:
+    """Insert the buffered in-transaction entries now (no commit)."""
+    rows = db.info.pop(_PENDING, None)
+    if not rows:
+        return 0
+    db.execute(insert(AuditLog), rows)
+    return len(rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending(session: Session) -> None:
+    flush_audit(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _hand_over_deferred(session: Session) -> None:
+    rows = session.info.pop(_DEFERRED, None)
+    if rows:
+        get_audit_writer().submit(session.get_bind(), rows)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_buffers(session: Session, previous_transaction) -> None:
+    if previous_transaction.nested:
+        return
+    session.info.pop(_PENDING, None)
+    session.info.pop(_DEFERRED, None)
+
+
+class AuditWriter:
+    """Background thread inserting deferred audit entries in batches."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, bind, rows: list) -> None:
+        if self.interval <= 0:
+            self._write(bind, rows)
+            return
+        self._ensure_thread()
+        self._queue.put((bind, rows))
+
+    def flush(self) -> None:
+        """Block until everything submitted so far is written."""
+        self._queue.join()
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            # Gather whatever else arrives within the interval into the same INSERT
+            while len(batch) < _MAX_BATCH:
+                try:
+                    batch.append(self._queue.get(timeout=self.interval))
+                except queue.Empty:
+                    break
+            by_bind: dict = {}
+            for bind, rows in batch:
+                by_bind.setdefault(bind, []).extend(rows)
+            for bind, rows in by_bind.items():
+                self._write(bind, rows)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, bind, rows: list) -> None:
+        try:
+            with bind.begin() as conn:
+                conn.execute(insert(AuditLog), rows)
+        except Exception:
+            logger.exception("Writing %d audit entries failed", len(rows))
+
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer() -> AuditWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AuditWriter(settings.AUDIT_FLUSH_INTERVAL)
+        return _writer
+
+
+def shutdown_audit_writer() -> None:
+    """Write out deferred entries still queued (app shutdown)."""
+    if _writer is not None:
+        _writer.flush()
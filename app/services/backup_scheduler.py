@@ -0,0 +1,212 @@
+"""In-process scheduler for automatic backups (AutoBackupConfig).
+
+Every app process starts one daemon thread (``start_backup_scheduler`` from
+the lifespan) that wakes every BACKUP_SCHEDULER_INTERVAL seconds. Several
+uvicorn workers coordinate through a ``SchedulerLease`` row: only the holder
+of the unexpired lease looks at the schedule and runs a due backup, renewing
+the lease as it goes and aborting if another process took it over. The slot
+is recorded (``last_run``, next ``next_run``, a compare-and-set on the old
+``next_run``) only after the backup and the retention of old ``auto_``
+backups beyond ``max_backups`` succeeded; a failed or interrupted run leaves
+the slot due and the next tick retries it. The backup runs on the scheduler
+thread with the lowest CPU and I/O priority.
+
+A backup also holds the ``db_maintenance`` lease, which a database restore
+takes before swapping the file: a restore never replaces the database under
+a running backup, and no backup starts while a restore holds it.
+"""
+import ctypes
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.administration import AutoBackupConfig
+from app.models.common import SchedulerLease
+from app.services import backup_service
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "auto_backup"
+LEASE_SECONDS = 300
+MAINTENANCE_LEASE = "db_maintenance"  # held by a running backup or a restore
+AUTO_PREFIX = "auto_"
+
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_WHO_PROCESS = 1
+_SYS_IOPRIO_SET = {"x86_64": 251, "aarch64": 30}
+
+_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def _parse_time(value: str) -> tuple:
+    try:
+        hour, minute = (int(part) for part in (value or "").split(":"))
+        if 0 <= hour <= 23 and 0 <= minute <= 59:
+            return hour, minute
+    except ValueError:
+        pass
+    return 2, 0
+
+
+def compute_next_run(frequency: str, time: str, now: datetime,
+                     last_run: Optional[datetime] = None) -> datetime:
+    """First slot at ``time`` (HH:MM) after ``now``; weekly runs keep 7 days apart."""
+    hour, minute = _parse_time(time)
+    slot = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if slot <= now:
+        slot += timedelta(days=1)
+    if frequency == "weekly" and last_run is not None:
+        earliest = (last_run + timedelta(days=7)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+        slot = max(slot, earliest)
+    return slot
+
+
+def acquire_lease(db: Session, owner: str, now: datetime, seconds: int = LEASE_SECONDS,
+                  name: str = LEASE_NAME) -> bool:
+    """Take or renew a lease (the scheduler's by default); False while another owner holds it."""
+    expires_at = now + timedelta(seconds=seconds)
+    stmt = sqlite_insert(SchedulerLease).values(name=name, owner=owner, expires_at=expires_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"owner": owner, "expires_at": expires_at},
+        where=(SchedulerLease.owner == owner) | (SchedulerLease.expires_at < now),
+    )
+    db.execute(stmt)
+    db.commit()
+    holder = db.query(SchedulerLease.owner).filter(SchedulerLease.name == name).scalar()
+    return holder == owner
+
+
+def release_lease(db: Session, owner: str, name: str) -> None:
+    """Give a lease up early (no-op unless ``owner`` holds it)."""
+    db.query(SchedulerLease).filter(SchedulerLease.name == name, SchedulerLease.owner == owner).delete()
+    db.commit()
+
+
+class LeaseLost(RuntimeError):
+    """Another process took the scheduler lease over during a backup."""
+
+
+def _due_config(db: Session, now: datetime) -> Optional[AutoBackupConfig]:
+    """The enabled config whose next_run has come; None when nothing is due."""
+    config = db.query(AutoBackupConfig).first()
+    if config is None or not config.is_enabled:
+        return None
+    if config.next_run is None:
+        config.next_run = compute_next_run(config.frequency, config.time, now, config.last_run)
+        db.commit()
+        return None
+    if config.next_run > now:
+        return None
+    return config
+
+
+def _record_run(db: Session, config: AutoBackupConfig, due: datetime, now: datetime) -> bool:
+    """Mark the slot ``due`` as done; False if it was recorded meanwhile."""
+    result = db.execute(
+        update(AutoBackupConfig)
+        .where(AutoBackupConfig.id == config.id, AutoBackupConfig.next_run == due)
+        .values(last_run=now, next_run=compute_next_run(config.frequency, config.time, now, now))
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def run_due_backup(db: Session, owner: str, now: Optional[datetime] = None) -> Optional[str]:
+    """One scheduler tick: run the backup if this process holds the lease and
+    a slot is due. Returns the new backup name, or None.
+
+    Raises (leaving the slot due) when the backup fails or the lease is lost.
+    """
+    now = now or datetime.now()
+    if not acquire_lease(db, owner, now):
+        return None
+    config = _due_config(db, now)
+    if config is None:
+        return None
+    due, max_backups = config.next_run, config.max_backups or 1
+    if not acquire_lease(db, owner, now, name=MAINTENANCE_LEASE):
+        return None  # a restore is replacing the database; retried next tick
+
+    name = f"{AUTO_PREFIX}{now.strftime('%Y%m%d_%H%M%S')}.json"
+    renewed = [now]
+
+    def keep_lease(done: int, total: int) -> None:
+        current = datetime.now()
+        if current - renewed[0] > timedelta(seconds=LEASE_SECONDS / 2):
+            if not (acquire_lease(db, owner, current)
+                    and acquire_lease(db, owner, current, name=MAINTENANCE_LEASE)):
+                raise LeaseLost("Automatic backup lease taken over by another process")
+            renewed[0] = current
+
+    try:
+        backup_service.create_backup(db.get_bind(), name, progress=keep_lease)
+        backup_service.prune_backups(AUTO_PREFIX, max_backups)
+        if not _record_run(db, config, due, now):
+            logger.warning("Backup slot %s was recorded by another process", due)
+    finally:
+        db.rollback()
+        release_lease(db, owner, MAINTENANCE_LEASE)
+    return name
+
+
+def _lower_thread_priority() -> None:
+    """Best effort: nice 19 and idle I/O class for the calling thread (Linux)."""
+    tid = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, 19)
+    except (AttributeError, OSError):
+        pass
+    syscall = _SYS_IOPRIO_SET.get(os.uname().machine) if hasattr(os, "uname") else None
+    if syscall is None:
+        return
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.syscall(syscall, _IOPRIO_WHO_PROCESS, tid, _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT)
+    except (OSError, AttributeError):
+        pass
+
+
+def _loop(owner: str, interval: int) -> None:
+    from app.database import SessionLocal
+
+    _lower_thread_priority()
+    while not _stop.wait(interval):
+        db = SessionLocal()
+        try:
+            name = run_due_backup(db, owner)
+            if name:
+                logger.info("Automatic backup %s created", name)
+        except Exception:
+            logger.exception("Automatic backup failed")
+            db.rollback()
+        finally:
+            db.close()
+
+
+def start_backup_scheduler() -> None:
+    """Start this process's scheduler thread (no-op when disabled or running)."""
+    global _thread
+    interval = settings.BACKUP_SCHEDULER_INTERVAL
+    if interval <= 0 or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    _thread = threading.Thread(target=_loop, args=(owner, interval), name="backup-scheduler", daemon=True)
+    _thread.start()
+
+
+def stop_backup_scheduler() -> None:
+    """Signal the scheduler thread to exit (a running backup finishes first)."""
+    _stop.set()
@@ -0,0 +1,363 @@
+"""Incremental, deduplicated backups.
+
+A backup is a JSON manifest in the backup directory that references
+content-addressed objects under ``backups/store/objects/<aa>/<sha256>``
+(zlib compressed, named by the sha256 of the raw content):
+
+* the database is snapshotted with the SQLite online backup API (a
+  consistent copy even while the app writes) and split into fixed-size
+  chunks; only chunks containing changed pages produce new objects,
+* every upload is one object; files whose size and mtime match the previous
+  manifest reuse its hash without being read again.
+
+Objects are written once and shared by all manifests, so a daily backup
+costs only the changed data. Deleting a manifest sweeps objects no manifest
+references any more. ``write_zip`` rebuilds the classic ZIP layout
+(``svj.db`` + ``uploads/``) that restore accepts.
+
+Restore streams the uploaded database into a temp file next to the live one
+(``stage_database``, constant memory), checks it with ``PRAGMA
+integrity_check``; the caller upgrades its schema, then it is swapped in
+with one ``os.replace`` after the engine pools are disposed
+(``install_database``). Disposing only closes idle pooled connections, so
+the swap is safe for a single app process with no background job running;
+other worker processes keep the old file open until they are restarted.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zipfile
+import zlib
+from datetime import datetime
+from typing import Callable, Optional
+
+from app.config import settings
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+MANIFEST_FORMAT = 1
+DB_CHUNK_SIZE = 1024 * 1024  # multiple of every SQLite page size
+FILE_CHUNK_SIZE = 1024 * 1024
+_GC_GRACE_SECONDS = 3600  # objects this fresh may belong to a backup in progress
+
+
+def backup_dir() -> str:
+    return os.path.join(os.path.dirname(settings.UPLOAD_DIR), "backups")
+
+
+def _objects_dir() -> str:
+    return os.path.join(backup_dir(), "store", "objects")
+
+
+def object_path(sha256: str) -> str:
+    return os.path.join(_objects_dir(), sha256[:2], sha256)
+
+
+def _put_object(data: bytes, sha256: str) -> int:
+    """Store ``data`` under its hash; return the bytes written (0 if known)."""
+    path = object_path(sha256)
+    if os.path.exists(path):
+        os.utime(path)  # keep it out of a concurrent sweep's reach
+        return 0
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    compressed = zlib.compress(data, 6)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(compressed)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(compressed)
+
+
+def _read_object(sha256: str) -> bytes:
+    with open(object_path(sha256), "rb") as f:
+        return zlib.decompress(f.read())
+
+
+def snapshot_database(bind, dest_path: str) -> None:
+    """Copy the database behind ``bind`` to ``dest_path`` (online backup API)."""
+    raw = bind.raw_connection()
+    try:
+        target = sqlite3.connect(dest_path)
+        try:
+            raw.driver_connection.backup(target)
+        finally:
+            target.close()
+    finally:
+        raw.close()
+
+
+def _store_chunks(path: str, chunk_size: int) -> tuple:
+    """Store a file as chunk objects; return (hashes, size, new_bytes)."""
+    hashes, size, new_bytes = [], 0, 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            sha256 = hashlib.sha256(chunk).hexdigest()
+            new_bytes += _put_object(chunk, sha256)
+            hashes.append(sha256)
+            size += len(chunk)
+    return hashes, size, new_bytes
+
+
+def _store_file(path: str) -> tuple:
+    """Store a whole file as one object; return (sha256, new_bytes)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    sha256 = hashlib.sha256(data).hexdigest()
+    return sha256, _put_object(data, sha256)
+
+
+def _upload_files(upload_dir: str) -> list:
+    files = []
+    if os.path.exists(upload_dir):
+        for root, dirs, names in os.walk(upload_dir):
+            # Skip temp import files
+            if "_import_temp" in root:
+                continue
+            files.extend(os.path.join(root, n) for n in names)
+    return sorted(files)
+
+
+def _manifest_path(name: str) -> str:
+    return os.path.join(backup_dir(), name)
+
+
+def read_manifest(name: str) -> dict:
+    with open(_manifest_path(name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_manifests() -> list:
+    """Manifest file names, newest first."""
+    directory = backup_dir()
+    if not os.path.exists(directory):
+        return []
+    return sorted((f for f in os.listdir(directory) if f.endswith(".json")), reverse=True)
+
+
+def _previous_files() -> dict:
+    """path -> file entry of the newest readable manifest (hash reuse)."""
+    for name in list_manifests():
+        try:
+            manifest = read_manifest(name)
+        except (OSError, ValueError):
+            continue
+        return {entry["path"]: entry for entry in manifest.get("files", [])}
+    return {}
+
+
+def create_backup(
+    bind,
+    name: str,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """Back up the database behind ``bind`` and UPLOAD_DIR as manifest ``name``.
+
+    Returns the manifest (with ``size`` = logical size and ``new_bytes`` =
+    compressed bytes actually added to the store).
+    """
+    directory = backup_dir()
+    os.makedirs(directory, exist_ok=True)
+    upload_dir = settings.UPLOAD_DIR
+    upload_files = _upload_files(upload_dir)
+    previous = _previous_files()
+    total = len(upload_files) + 1
+
+    fd, snapshot_path = tempfile.mkstemp(suffix=".db", dir=directory)
+    os.close(fd)
+    try:
+        snapshot_database(bind, snapshot_path)
+        db_chunks, db_size, new_bytes = _store_chunks(snapshot_path, DB_CHUNK_SIZE)
+    finally:
+        os.remove(snapshot_path)
+    if progress:
+        progress(1, total)
+
+    files = []
+    for done, fpath in enumerate(upload_files, 2):
+        rel = os.path.relpath(fpath, upload_dir).replace(os.sep, "/")
+        stat = os.stat(fpath)
+        old = previous.get(rel)
+        if (old and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns
+                and os.path.exists(object_path(old["sha256"]))):
+            sha256 = old["sha256"]
+            os.utime(object_path(sha256))
+        else:
+            sha256, written = _store_file(fpath)
+            new_bytes += written
+        files.append({"path": rel, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256})
+        if progress:
+            progress(done, total)
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "database": {"size": db_size, "chunk_size": DB_CHUNK_SIZE, "chunks": db_chunks},
+        "files": files,
+        "size": db_size + sum(f["size"] for f in files),
+        "new_bytes": new_bytes,
+    }
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as out:
+            json.dump(manifest, out)
+        os.replace(tmp_path, _manifest_path(name))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return manifest
+
+
+def write_zip(name: str, dest) -> None:
+    """Write manifest ``name`` as a restorable ZIP (svj.db + uploads/) to ``dest``."""
+    manifest = read_manifest(name)
+    with zipfile.ZipFile(dest, "w", zipfile.ZIP_DEFLATED) as zf:
+        with zf.open("svj.db", "w", force_zip64=True) as out:
+            for sha256 in manifest["database"]["chunks"]:
+                out.write(_read_object(sha256))
+        for entry in manifest["files"]:
+            zf.writestr(f"uploads/{entry['path']}", _read_object(entry["sha256"]))
+
+
+def _referenced_objects() -> Optional[set]:
+    """Hashes used by any manifest; None when a manifest cannot be read."""
+    referenced: set = set()
+    for name in list_manifests():
+        try:
+            manifest = read_manifest(name)
+        except (OSError, ValueError):
+            return None  # never sweep on partial knowledge
+        referenced.update(manifest["database"]["chunks"])
+        referenced.update(entry["sha256"] for entry in manifest["files"])
+    return referenced
+
+
+def collect_garbage() -> int:
+    """Delete objects no manifest references; return how many were removed."""
+    referenced = _referenced_objects()
+    root = _objects_dir()
+    if referenced is None or not os.path.exists(root):
+        return 0
+    cutoff = time.time() - _GC_GRACE_SECONDS
+    removed = 0
+    for prefix in os.listdir(root):
+        prefix_dir = os.path.join(root, prefix)
+        for sha256 in os.listdir(prefix_dir):
+            path = os.path.join(prefix_dir, sha256)
+            if sha256 in referenced or os.path.getmtime(path) > cutoff:
+                continue
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def delete_backup(name: str) -> int:
+    """Remove manifest ``name`` and sweep objects only it used."""
+    os.remove(_manifest_path(name))
+    return collect_garbage()
+
+
+def prune_backups(prefix: str, keep: int) -> int:
+    """Keep the ``keep`` newest backups named ``prefix*``; return how many went."""
+    directory = backup_dir()
+    if not os.path.exists(directory):
+        return 0
+    names = sorted(
+        (f for f in os.listdir(directory) if f.startswith(prefix) and f.endswith((".json", ".zip"))),
+        reverse=True,
+    )
+    removed = 0
+    for name in names[keep:]:
+        try:
+            os.remove(_manifest_path(name))
+        except OSError:
+            continue
+        removed += 1
+    if removed:
+        collect_garbage()
+    return removed
+
+
+def stage_database(source, db_path: str, max_size: Optional[int] = None) -> str:
+    """Stream ``source`` into a verified temp copy beside ``db_path``.
+
+    Raises ValueError (with a message for the user) when the file is too
+    large, not SQLite, fails the integrity check or there is no database
+    file to replace. Returns the temp path.
+    """
+    directory = None if db_path == ":memory:" else os.path.dirname(os.path.abspath(db_path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, staged_path = tempfile.mkstemp(suffix=".restore", dir=directory)
+    try:
+        size = 0
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = source.read(FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise ValueError(f"Soubor je příliš velký (max {max_size // (1024 * 1024)} MB).")
+                out.write(chunk)
+        verify_database(staged_path)
+        if directory is None:
+            raise ValueError("Databáze běží v paměti, nelze ji obnovit.")
+    except BaseException:
+        _remove_database_files(staged_path)
+        raise
+    return staged_path
+
+
+def verify_database(path: str) -> None:
+    """Raise ValueError unless ``path`` is an intact SQLite database."""
+    with open(path, "rb") as f:
+        if f.read(len(SQLITE_MAGIC)) != SQLITE_MAGIC:
+            raise ValueError("Neplatný soubor — není SQLite databáze.")
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"Databáze je poškozená: {e}")
+    finally:
+        conn.close()
+    if rows != [("ok",)]:
+        raise ValueError(f"Databáze je poškozená: {rows[0][0]}")
+
+
+def _remove_database_files(path: str) -> None:
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def discard_staged(staged_path: str) -> None:
+    """Remove a staged restore that will not be installed."""
+    _remove_database_files(staged_path)
+
+
+def install_database(staged_path: str, db_path: str, engines: tuple) -> None:
+    """Atomically replace ``db_path`` with a staged copy.
+
+    The engines' pools are disposed first so no pooled connection keeps the
+    old file; the old WAL is removed so it is never replayed onto the new
+    file. The next checkout opens the restored database.
+    """
+    for bind in engines:
+        bind.dispose()
+    os.replace(staged_path, db_path)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+        if os.path.exists(staged_path + suffix):
+            os.remove(staged_path + suffix)
@@ -0,0 +1,334 @@
+"""Set-based comparison of a katastr / sousede.cz CSV with current ownership.
+
+The current ownership is loaded once as a snapshot (unit_number -> unit id
+and all its current owners with votes) by a single joined query; the CSV is
+then streamed row by row, compared in memory and written as ``SyncRecord``
+rows with one executemany INSERT per batch. Co-owned units (SJM, podílové
+spoluvlastnictví) are compared against each co-owner and against the whole
+owner group, instead of only the first ``OwnerUnit`` row.
+
+Delta mode: every record carries a fingerprint of its CSV row, the column
+mapping and the unit's current owners. Given a base session (the previous
+one of the same source format), rows whose fingerprint is already there
+skip the comparison and take over its result; they store no CSV values
+and ``base_record_id`` points at the record holding the payload.
+
+Row payloads are written column-wise: the header once into
+``SyncSession.csv_columns``, the values per record via ``pack_values``.
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+from typing import Callable, Optional
+
+from sqlalchemy import and_, insert, text
+from sqlalchemy.orm import Session
+
+from app.models.owner import Owner, OwnerUnit, Unit
+from app.models.sync import SyncRecord, SyncSession, pack_values
+from app.services.owner_matcher import name_similarity
+
+BATCH_SIZE = 1000
+
+# Best status first; a co-owned unit reports its best-matching owner
+_STATUS_RANK = {"shoda": 0, "přeházená": 1, "rozdílné_podíly": 2, "částečná": 3, "rozdílní": 4, "chybí": 5}
+_NAME_SEPARATORS = re.compile(r"\s*[,;]\s*")
+
+
+def ownership_snapshot(db: Session) -> dict:
+    """unit_number -> (unit_id, [(owner display name, votes, owner_unit id), ...]) in one query."""
+    rows = (
+        db.query(Unit.id, Unit.unit_number, Owner, OwnerUnit.votes, OwnerUnit.id)
+        .outerjoin(OwnerUnit, and_(OwnerUnit.unit_id == Unit.id, OwnerUnit.valid_to.is_(None)))
+        .outerjoin(Owner, Owner.id == OwnerUnit.owner_id)
+        .order_by(Unit.unit_number, OwnerUnit.id)
+        .all()
+    )
+    snapshot: dict = {}
+    for unit_id, unit_number, owner, votes, owner_unit_id in rows:
+        entry = snapshot.setdefault(unit_number, (unit_id, []))
+        if owner is not None:
+            entry[1].append((owner.display_name, votes or 0, owner_unit_id))
+    return snapshot
+
+
+def compare_records(db_name: str, csv_name: str, db_share: str, csv_share: str) -> str:
+    """Compare DB and CSV records, return status."""
+    if not db_name and not csv_name:
+        return "chybí"
+    if not db_name:
+        return "chybí"
+
+    # Normalize for comparison
+    dn = db_name.strip().lower()
+    cn = csv_name.strip().lower()
+
+    if dn == cn:
+        if db_share == csv_share:
+            return "shoda"
+        else:
+            return "rozdílné_podíly"
+
+    # Check reversed name
+    parts = cn.split()
+    if len(parts) == 2:
+        reversed_cn = f"{parts[1]} {parts[0]}".lower()
+        if dn == reversed_cn:
+            if db_share == csv_share:
+                return "přeházená"
+            else:
+                return "rozdílné_podíly"
+
+    # Fuzzy match
+    score = name_similarity(dn, cn)
+    if score >= 0.75:
+        return "částečná"
+
+    return "rozdílní"
+
+
+def _name_group(names: list) -> str:
+    return ", ".join(sorted(name.strip() for name in names if name.strip()))
+
+
+def match_unit(owners: list, csv_owner: str, csv_share: str) -> tuple:
+    """Compare one CSV row with a unit's current owners.
+
+    ``owners`` holds (display name, votes[, owner_unit id]) tuples. Returns
+    (status, db_owner_name, db_share, owner_unit_id) for the best-matching
+    owner, or for the whole co-owner group when the CSV cell lists them all
+    ("Novák Jan, Nováková Marie") — then owner_unit_id is None, as it is
+    when the owners carry no id.
+    """
+    if not owners:
+        return compare_records("", csv_owner, "", csv_share), "", "", None
+
+    candidates = [
+        (owner[0], str(owner[1]) if owner[1] else "", csv_owner, owner[2] if len(owner) > 2 else None)
+        for owner in owners
+    ]
+    if len(owners) > 1:
+        total = sum(owner[1] for owner in owners)
+        csv_group = _name_group(_NAME_SEPARATORS.split(csv_owner))
+        candidates.append((_name_group([owner[0] for owner in owners]), str(total) if total else "", csv_group, None))
+
+    best = None
+    for name, share, csv_name, owner_unit_id in candidates:
+        status = compare_records(name, csv_name, share, csv_share)
+        if best is None or _STATUS_RANK.get(status, 9) < _STATUS_RANK.get(best[0], 9):
+            best = (status, name, share, owner_unit_id)
+    return best
+
+
+def compare_unit(owners: list, csv_owner: str, csv_share: str) -> tuple:
+    """(status, db_owner_name, db_share) of ``match_unit``."""
+    return match_unit(owners, csv_owner, csv_share)[:3]
+
+
+def _lookup_unit(snapshot: dict, csv_unit: str) -> Optional[tuple]:
+    if not csv_unit:
+        return None
+    try:
+        return snapshot.get(int(csv_unit))
+    except ValueError:
+        return None  # e.g. "123/4": unit numbers are integers
+
+
+def _csv_owner(row: dict, mapping: dict) -> str:
+    """Owner name from the combined column or first + last name columns."""
+    if mapping.get("owner_col"):
+        return (row.get(mapping["owner_col"]) or "").strip()
+    first_name_col, last_name_col = mapping.get("first_name_col"), mapping.get("last_name_col")
+    if first_name_col or last_name_col:
+        fn = (row.get(first_name_col) or "").strip() if first_name_col else ""
+        ln = (row.get(last_name_col) or "").strip() if last_name_col else ""
+        return f"{ln} {fn}".strip()
+    return ""
+
+
+def ensure_sync_columns(bind) -> None:
+    """Add the delta-sync and columnar-payload columns to an older database.
+
+    create_all() does not alter existing tables.
+    """
+    added = {
+        "sync_sessions": {
+            "base_session_id": "INTEGER", "reused_count": "INTEGER DEFAULT 0", "csv_columns": "TEXT DEFAULT ''",
+        },
+        "sync_records": {
+            "fingerprint": "VARCHAR DEFAULT ''", "base_record_id": "INTEGER", "csv_values": "BLOB",
+            "owner_unit_id": "INTEGER",
+        },
+    }
+    with bind.begin() as conn:
+        for table, columns in added.items():
+            existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+            for name, ddl in columns.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+def row_fingerprint(row: dict, mapping: dict, owners: list) -> str:
+    """Hash of what a record's comparison depends on: row, mapping, owners."""
+    payload = json.dumps([list(row.items()), sorted(mapping.items()), owners], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def previous_session_id(db: Session, source_format: str, before_id: int) -> Optional[int]:
+    """Latest session of the same source format older than ``before_id``."""
+    return (
+        db.query(SyncSession.id)
+        .filter(SyncSession.source_format == source_format, SyncSession.id < before_id)
+        .order_by(SyncSession.id.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+def _base_results(db: Session, base_session_id: int) -> dict:
+    """fingerprint -> reusable result columns of the base session's records."""
+    rows = (
+        db.query(
+            SyncRecord.fingerprint, SyncRecord.id, SyncRecord.base_record_id, SyncRecord.unit_id,
+            SyncRecord.owner_unit_id, SyncRecord.status, SyncRecord.db_owner_name, SyncRecord.db_share,
+        )
+        .filter(SyncRecord.session_id == base_session_id, SyncRecord.fingerprint != "")
+        .all()
+    )
+    return {
+        fingerprint: {
+            "base_record_id": base_record_id or record_id,
+            "unit_id": unit_id,
+            "owner_unit_id": owner_unit_id,
+            "status": status,
+            "db_owner_name": db_owner_name,
+            "db_share": db_share,
+        }
+        for fingerprint, record_id, base_record_id, unit_id, owner_unit_id, status, db_owner_name, db_share in rows
+    }
+
+
+def detach_session(db: Session, session_id: int) -> None:
+    """Prepare ``session_id`` for deletion: records of later sessions that
+    borrow its CSV payloads get them back (the oldest one becomes the new
+    holder for the others), and sessions based on it lose the link."""
+    holders = {
+        record_id: {"csv_data": csv_data, "csv_values": csv_values}
+        for record_id, csv_data, csv_values in db.query(SyncRecord.id, SyncRecord.csv_data, SyncRecord.csv_values)
+        .filter(SyncRecord.session_id == session_id, SyncRecord.base_record_id.is_(None))
+    }
+    if holders:
+        dependents: dict = {}
+        for record_id, base_id in (
+            db.query(SyncRecord.id, SyncRecord.base_record_id)
+            .filter(
+                SyncRecord.base_record_id.in_(
+                    db.query(SyncRecord.id).filter(SyncRecord.session_id == session_id)
+                ),
+                SyncRecord.session_id != session_id,
+            )
+            .order_by(SyncRecord.id)
+        ):
+            dependents.setdefault(base_id, []).append(record_id)
+        for base_id, record_ids in dependents.items():
+            new_holder = record_ids[0]
+            db.query(SyncRecord).filter(SyncRecord.id == new_holder).update(
+                {**holders[base_id], "base_record_id": None}, synchronize_session=False
+            )
+            if len(record_ids) > 1:
+                db.query(SyncRecord).filter(SyncRecord.id.in_(record_ids[1:])).update(
+                    {"base_record_id": new_holder}, synchronize_session=False
+                )
+    # Own records pointing at each other are deleted together
+    db.query(SyncRecord).filter(SyncRecord.session_id == session_id).update(
+        {"base_record_id": None}, synchronize_session=False
+    )
+    db.query(SyncSession).filter(SyncSession.base_session_id == session_id).update(
+        {"base_session_id": None}, synchronize_session=False
+    )
+
+
+def compare_csv_file(
+    db: Session,
+    session_id: int,
+    path: str,
+    delimiter: str,
+    mapping: dict,
+    progress: Optional[Callable[[int, int], None]] = None,
+    base_session_id: Optional[int] = None,
+) -> int:
+    """Stream the CSV at ``path`` and insert its SyncRecords for ``session_id``.
+
+    ``mapping`` holds the confirmed column names (unit_col, owner_col,
+    first_name_col, last_name_col, share_col). With ``base_session_id``
+    rows unchanged since that session reuse its results (delta mode) and
+    the session records how many. Returns the number of records written;
+    the caller commits.
+    """
+    snapshot = ownership_snapshot(db)
+    base = _base_results(db, base_session_id) if base_session_id else {}
+    unit_col, share_col = mapping.get("unit_col"), mapping.get("share_col")
+    total_bytes = os.path.getsize(path) or 1
+
+    record_count = 0
+    reused = 0
+    batch: list = []
+    with open(path, "rb") as raw:
+        text_stream = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        reader = csv.DictReader(text_stream, delimiter=delimiter)
+        columns = reader.fieldnames or []
+        db.query(SyncSession).filter(SyncSession.id == session_id).update(
+            {"csv_columns": json.dumps(columns, ensure_ascii=False)}, synchronize_session=False
+        )
+        for row in reader:
+            csv_unit = (row.get(unit_col) or "").strip() if unit_col else ""
+            csv_owner = _csv_owner(row, mapping)
+            csv_share = (row.get(share_col) or "").strip() if share_col else ""
+            if not csv_unit and not csv_owner:
+                continue
+
+            unit = _lookup_unit(snapshot, csv_unit)
+            owners = unit[1] if unit else []
+            fingerprint = row_fingerprint(row, mapping, owners)
+            record = {
+                "session_id": session_id,
+                "csv_owner_name": csv_owner,
+                "csv_share": csv_share,
+                "fingerprint": fingerprint,
+                "is_resolved": 0,
+            }
+            previous = base.get(fingerprint)
+            if previous is not None:
+                record.update(previous, csv_values=None)
+                reused += 1
+            else:
+                status, db_owner_name, db_share, owner_unit_id = match_unit(owners, csv_owner, csv_share)
+                record.update(
+                    unit_id=unit[0] if unit else None,
+                    owner_unit_id=owner_unit_id,
+                    status=status,
+                    db_owner_name=db_owner_name,
+                    db_share=db_share,
+                    csv_values=pack_values([row.get(name) for name in columns]),
+                    base_record_id=None,
+                )
+            batch.append(record)
+            if len(batch) >= BATCH_SIZE:
+                db.execute(insert(SyncRecord), batch)
+                record_count += len(batch)
+                batch = []
+                if progress:
+                    progress(min(raw.tell(), total_bytes), total_bytes)
+    if batch:
+        db.execute(insert(SyncRecord), batch)
+        record_count += len(batch)
+    if base_session_id:
+        db.query(SyncSession).filter(SyncSession.id == session_id).update(
+            {"base_session_id": base_session_id, "reused_count": reused}, synchronize_session=False
+        )
+    if progress:
+        progress(total_bytes, total_bytes)
+    return record_count
@@ -0,0 +1,133 @@
+"""Streaming ingest of uploaded sync CSVs.
+
+The upload is read in fixed-size chunks and never held in memory as a
+whole. Encoding (UTF-8 with or without BOM, else CP1250 — the usual Czech
+Windows export) and dialect (delimiter) are sniffed from the first
+``SNIFF_BYTES``. The stream is transcoded to a UTF-8 temp file while one
+csv.reader pass over the same chunks collects the header, sample rows and
+the row count. The result is stored next to the temp file as
+``<token>.json`` so the confirm step and the comparison job reuse it
+instead of parsing the file again.
+"""
+import codecs
+import csv
+import json
+import os
+from typing import BinaryIO, Iterator
+
+SNIFF_BYTES = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+SAMPLE_ROWS = 5
+_DELIMITERS = ";,\t|"
+
+
+def detect_encoding(head: bytes) -> str:
+    """'utf-8-sig' / 'utf-8' when the head decodes as UTF-8, else 'cp1250'."""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the end of the sniffed block is fine
+        if e.reason != "unexpected end of data" or e.start < len(head) - 3:
+            return "cp1250"
+    return "utf-8"
+
+
+def sniff_delimiter(sample: str) -> str:
+    """Delimiter of the CSV dialect in ``sample`` (';' when undecidable)."""
+    # Only complete lines: the sniffed block usually ends mid-row
+    if "\n" in sample:
+        sample = sample[:sample.rindex("\n")]
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=_DELIMITERS).delimiter
+    except csv.Error:
+        first_line = sample.split("\n", 1)[0]
+        counts = {d: first_line.count(d) for d in _DELIMITERS}
+        best = max(counts, key=counts.get)
+        return best if counts[best] else ";"
+
+
+def detect_source_format(sample: str) -> str:
+    lowered = sample.lower()
+    if "sousede" in lowered or "katastral" in lowered:
+        return "sousede.cz"
+    return "interní"
+
+
+def ingest_csv(source: BinaryIO, dest_path: str) -> dict:
+    """Transcode ``source`` to UTF-8 at ``dest_path`` in one streaming pass.
+
+    Returns the metadata: encoding, delimiter, source_format, headers,
+    sample_rows (dicts) and total_rows.
+    """
+    head = source.read(SNIFF_BYTES)
+    encoding = detect_encoding(head)
+    head_text = head.decode(encoding, errors="ignore")
+    delimiter = sniff_delimiter(head_text)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    with open(dest_path, "w", encoding="utf-8", newline="") as out:
+
+        def lines() -> Iterator[str]:
+            pending = ""
+            data = head
+            while data:
+                text = decoder.decode(data)
+                out.write(text)
+                parts = (pending + text).split("\n")
+                pending = parts.pop()
+                for part in parts:
+                    yield part + "\n"
+                data = source.read(CHUNK_SIZE)
+            text = decoder.decode(b"", final=True)
+            out.write(text)
+            pending += text
+            if pending:
+                yield pending
+
+        reader = csv.reader(lines(), delimiter=delimiter)
+        headers = next(reader, [])
+        sample_rows = []
+        total_rows = 0
+        for row in reader:
+            if not row:
+                continue  # blank line (csv.DictReader skips these too)
+            if len(sample_rows) < SAMPLE_ROWS:
+                sample_rows.append(dict(zip(headers, row)))
+            total_rows += 1
+
+    return {
+        "encoding": encoding,
+        "delimiter": delimiter,
+        "source_format": detect_source_format(head_text),
+        "headers": headers,
+        "sample_rows": sample_rows,
+        "total_rows": total_rows,
+    }
+
+
+def meta_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + ".json"
+
+
+def save_meta(csv_path: str, meta: dict) -> None:
+    with open(meta_path(csv_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def load_meta(csv_path: str) -> dict | None:
+    try:
+        with open(meta_path(csv_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def discard(csv_path: str) -> None:
+    """Remove an ingested CSV together with its metadata."""
+    for path in (csv_path, meta_path(csv_path)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
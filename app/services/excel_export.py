@@ -1,75 +1,236 @@
-"""Excel export service for owners."""
+"""Excel export service for owners.
+
+The owners export is written as raw SpreadsheetML instead of through an
+openpyxl Workbook: rows are serialized once into a spooled temp file while
+column widths are measured, then the .xlsx ZIP is produced chunk by chunk.
+Memory use stays flat regardless of the number of owners.
+"""
 import io
-from typing import List
+import tempfile
+import zipfile
+from typing import Iterable, Iterator, List
+from xml.sax.saxutils import escape
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
 
+# Rows kept in memory before the spool file rolls over to disk
+_SPOOL_MAX_SIZE = 4 * 1024 * 1024
+_CHUNK_SIZE = 64 * 1024
 
-def export_owners_xlsx(owners: List) -> io.BytesIO:
-    """Export a list of Owner objects to an Excel .xlsx file."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Vlastníci"
-
-    # Header style
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    thin_border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
-
-    headers = [
-        "ID", "Příjmení", "Jméno", "Titul",
-        "Typ", "RČ", "IČ", "Email", "Telefon",
-        "Trvalá - ulice", "Trvalá - město", "Trvalá - PSČ",
-        "Korespondenční - ulice", "Korespondenční - město", "Korespondenční - PSČ",
+HEADERS = [
+    "ID", "Příjmení", "Jméno", "Titul",
+    "Typ", "RČ", "IČ", "Email", "Telefon",
+    "Trvalá - ulice", "Trvalá - město", "Trvalá - PSČ",
+    "Korespondenční - ulice", "Korespondenční - město", "Korespondenční - PSČ",
+]
+
+# Cell style indices into cellXfs of _STYLES_XML
+_STYLE_HEADER = 1
+_STYLE_BODY = 2
+
+_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Vlastníci" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Header: bold white on blue, centered, thin border. Body: thin border.
+_STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF2563EB"/><bgColor rgb="FF2563EB"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="2">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="1" xfId="0" '
+    'applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" applyBorder="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+)
+
+_COLUMN_LETTERS = [get_column_letter(i) for i in range(1, len(HEADERS) + 1)]
+
+
+def _owner_values(owner) -> list:
+    """Row values for one Owner in HEADERS order."""
+    return [
+        owner.id,
+        owner.last_name or "",
+        owner.first_name or "",
+        owner.title or "",
+        "Fyzická" if owner.owner_type == "physical" else "Právnická",
+        owner.birth_number or "",
+        owner.company_id or "",
+        owner.email or "",
+        owner.phone or "",
+        owner.perm_street or "",
+        owner.perm_city or "",
+        owner.perm_zip or "",
+        owner.corr_street or "",
+        owner.corr_city or "",
+        owner.corr_zip or "",
     ]
 
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-
-    # Data rows
-    for row_idx, owner in enumerate(owners, 2):
-        values = [
-            owner.id,
-            owner.last_name or "",
-            owner.first_name or "",
-            owner.title or "",
-            "Fyzická" if owner.owner_type == "physical" else "Právnická",
-            owner.birth_number or "",
-            owner.company_id or "",
-            owner.email or "",
-            owner.phone or "",
-            owner.perm_street or "",
-            owner.perm_city or "",
-            owner.perm_zip or "",
-            owner.corr_street or "",
-            owner.corr_city or "",
-            owner.corr_zip or "",
-        ]
-        for col, val in enumerate(values, 1):
-            cell = ws.cell(row=row_idx, column=col, value=val)
-            cell.border = thin_border
-
-    # Auto-fit column widths (approximate)
-    for col in ws.columns:
-        max_length = 0
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        adjusted_width = min(max_length + 2, 40)
-        ws.column_dimensions[col[0].column_letter].width = adjusted_width
 
+def _row_xml(row_idx: int, values: list, style: int) -> str:
+    """Serialize one sheet row; strings are written as inline strings."""
+    cells = []
+    for letter, val in zip(_COLUMN_LETTERS, values):
+        ref = f"{letter}{row_idx}"
+        if isinstance(val, (int, float)) and not isinstance(val, bool):
+            cells.append(f'<c r="{ref}" s="{style}"><v>{val}</v></c>')
+        elif val:
+            text = escape(ILLEGAL_CHARACTERS_RE.sub("", str(val)))
+            cells.append(
+                f'<c r="{ref}" s="{style}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+            )
+        else:
+            cells.append(f'<c r="{ref}" s="{style}"/>')
+    return f'<row r="{row_idx}">{"".join(cells)}</row>'
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that collects bytes for streaming."""
+
+    def __init__(self):
+        self._parts: list = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _xlsx_chunks(rows_file, widths: list, last_row: int) -> Iterator[bytes]:
+    """Assemble the .xlsx ZIP around the spooled rows and yield it in chunks."""
+    sink = _ChunkSink()
+    try:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("[Content_Types].xml", _CONTENT_TYPES_XML)
+            zf.writestr("_rels/.rels", _ROOT_RELS_XML)
+            zf.writestr("xl/workbook.xml", _WORKBOOK_XML)
+            zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS_XML)
+            zf.writestr("xl/styles.xml", _STYLES_XML)
+            yield sink.drain()
+
+            cols = "".join(
+                f'<col min="{i}" max="{i}" width="{min(w + 2, 40)}" customWidth="1"/>'
+                for i, w in enumerate(widths, 1)
+            )
+            with zf.open("xl/worksheets/sheet1.xml", "w") as part:
+                dimension = f"A1:{_COLUMN_LETTERS[-1]}{last_row}"
+                part.write((
+                    f'{_SHEET_HEAD}<dimension ref="{dimension}"/><cols>{cols}</cols><sheetData>'
+                    + _row_xml(1, HEADERS, _STYLE_HEADER)
+                ).encode("utf-8"))
+                while chunk := rows_file.read(_CHUNK_SIZE):
+                    part.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+                part.write(b"</sheetData></worksheet>")
+        yield sink.drain()
+    finally:
+        rows_file.close()
+
+
+def stream_owners_xlsx(owners: Iterable) -> Iterator[bytes]:
+    """Export owners to .xlsx as an iterator of byte chunks.
+
+    The owners iterable is consumed immediately (so a ``yield_per`` query runs
+    while its session is still open); rows go to a spooled temp file and
+    column widths are tracked on the fly. The returned iterator then streams
+    the ZIP container without holding the whole file in memory.
+    """
+    widths = [len(h) for h in HEADERS]
+    last_row = 1
+    rows_file = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE, mode="w+b")
+    try:
+        for row_idx, owner in enumerate(owners, 2):
+            last_row = row_idx
+            values = _owner_values(owner)
+            rows_file.write(_row_xml(row_idx, values, _STYLE_BODY).encode("utf-8"))
+            for i, val in enumerate(values):
+                if val:
+                    length = len(str(val))
+                    if length > widths[i]:
+                        widths[i] = length
+        rows_file.seek(0)
+    except Exception:
+        rows_file.close()
+        raise
+    return _xlsx_chunks(rows_file, widths, last_row)
+
+
+def export_owners_xlsx(owners: List) -> io.BytesIO:
+    """Export a list of Owner objects to an in-memory Excel .xlsx file."""
     output = io.BytesIO()
-    wb.save(output)
+    for chunk in stream_owners_xlsx(owners):
+        output.write(chunk)
     output.seek(0)
     return output
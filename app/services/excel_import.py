@@ -40,12 +40,14 @@ Columns (0-indexed):
 from __future__ import annotations
 
 import re
-from unicodedata import normalize, category
+import time
 
 from openpyxl import load_workbook
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models.owner import Owner, OwnerUnit, Unit
+from app.services.text_utils import normalize_name
 
 # Column indices (0-based)
 COL_UNIT_KN = 0
@@ -82,6 +84,9 @@ COL_NOTE = 30
 
 SHEET_NAME = "Vlastnici_SVJ"
 
+# Rows per multi-row INSERT in bulk import
+BULK_BATCH_SIZE = 500
+
 
 def _cell(row: tuple, idx: int) -> str | None:
     """Safely get cell value as stripped string, or None."""
@@ -113,18 +118,6 @@ def _cell_float(row: tuple, idx: int) -> float | None:
         return None
 
 
-def _strip_diacritics(text: str) -> str:
-    """Remove diacritics from text."""
-    nfkd = normalize("NFD", text)
-    return "".join(c for c in nfkd if category(c) != "Mn")
-
-
-def _normalize_name(text: str) -> str:
-    """Normalize name for matching: lowercase, no diacritics, single spaces."""
-    result = _strip_diacritics(text.lower())
-    return " ".join(result.split())
-
-
 def _is_birth_number(value: str) -> bool:
     """Check if value looks like Czech birth number (XXXXXX/XXXX or 10 digits)."""
     clean = value.replace(" ", "")
@@ -189,7 +182,7 @@ def _build_name_normalized(first_name: str, last_name: str | None) -> str:
         parts.append(last_name)
     if first_name:
         parts.append(first_name)
-    return _normalize_name(" ".join(parts))
+    return normalize_name(" ".join(parts))
 
 
 def _owner_group_key(first_name: str | None, last_name: str | None, birth_or_ic: str | None) -> str:
@@ -201,8 +194,8 @@ def _owner_group_key(first_name: str | None, last_name: str | None, birth_or_ic:
         clean = birth_or_ic.replace(" ", "").strip()
         if clean:
             return f"id:{clean}"
-    fn = _normalize_name(first_name or "")
-    ln = _normalize_name(last_name or "")
+    fn = normalize_name(first_name or "")
+    ln = normalize_name(last_name or "")
     return f"name:{ln}|{fn}"
 
 
@@ -365,8 +358,110 @@ def preview_owners_from_excel(file_bytes_or_path) -> dict:
     }
 
 
-def import_owners_from_excel(db: Session, file_bytes_or_path) -> dict:
-    """Parse Excel and save owners, units, and relationships to DB."""
+def _owner_values(rows: list[dict]) -> dict:
+    """Build Owner column values from all Excel rows grouped under one owner."""
+    # Pick the row with the cleanest last_name (shortest = least noise)
+    first_row = min(rows, key=lambda r: len(r["last_name"] or ""))
+
+    # Detect owner type
+    owner_type = _detect_owner_type(first_row["birth_or_ic"])
+
+    # Parse birth number vs company ID
+    birth_number = None
+    company_id_val = None
+    birth_or_ic = first_row["birth_or_ic"]
+    if birth_or_ic:
+        if _is_company_id(birth_or_ic):
+            company_id_val = birth_or_ic.strip()
+        elif _is_birth_number(birth_or_ic):
+            birth_number = birth_or_ic.strip()
+        else:
+            birth_number = birth_or_ic.strip()
+
+    # Pick best email/phone from all rows for this owner
+    email = None
+    email_secondary = None
+    phone = None
+    phone_landline = None
+    for r in rows:
+        if not email and r["email_evidence"]:
+            email = r["email_evidence"]
+        if not email_secondary and r["email_contacts"]:
+            email_secondary = r["email_contacts"]
+        if not phone and r["phone_gsm"]:
+            phone = r["phone_gsm"]
+        if not phone_landline and r["phone_landline"]:
+            phone_landline = r["phone_landline"]
+
+    return {
+        "first_name": first_row["first_name"],
+        "last_name": first_row["last_name"],
+        "title": first_row["title"],
+        "name_with_titles": _build_name_with_titles(
+            first_row["title"], first_row["first_name"], first_row["last_name"]
+        ),
+        "name_normalized": _build_name_normalized(first_row["first_name"], first_row["last_name"]),
+        "owner_type": owner_type,
+        "birth_number": birth_number,
+        "company_id": company_id_val,
+        "perm_street": first_row["perm_street"],
+        "perm_district": first_row["perm_district"],
+        "perm_city": first_row["perm_city"],
+        "perm_zip": first_row["perm_zip"],
+        "perm_country": first_row["perm_country"],
+        "corr_street": first_row["corr_street"],
+        "corr_district": first_row["corr_district"],
+        "corr_city": first_row["corr_city"],
+        "corr_zip": first_row["corr_zip"],
+        "corr_country": first_row["corr_country"],
+        "phone": phone,
+        "phone_landline": phone_landline,
+        "email": email,
+        "email_secondary": email_secondary,
+        "owner_since": first_row["owner_since"],
+        "note": first_row["note"],
+    }
+
+
+def _unit_values(row_data: dict) -> dict:
+    """Build Unit column values from a parsed Excel row."""
+    return {
+        "unit_number": row_data["unit_kn"],
+        "building_number": row_data["building_number"],
+        "podil_scd": row_data["podil_scd"],
+        "floor_area": row_data["floor_area"],
+        "room_count": row_data["room_count"],
+        "space_type": row_data["space_type"],
+        "section": row_data["section"],
+        "orientation_number": row_data["orientation_number"],
+        "address": row_data["address"],
+        "lv_number": row_data["lv_number"],
+    }
+
+
+def _chunks(items: list, size: int):
+    """Yield successive slices of ``items`` with at most ``size`` elements."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _insert_returning_ids(db: Session, model, values: list[dict], batch_size: int) -> list[int]:
+    """Insert rows in chunks and return their new primary keys in input order."""
+    ids: list[int] = []
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    for chunk in _chunks(values, batch_size):
+        ids.extend(db.scalars(stmt, chunk).all())
+    return ids
+
+
+def import_owners_from_excel(db: Session, file_bytes_or_path, batch_size: int = BULK_BATCH_SIZE) -> dict:
+    """Parse Excel and save owners, units, and relationships to DB.
+
+    Bulk mode: existing units are preloaded in one query and Owner / Unit /
+    OwnerUnit rows are written with multi-row INSERTs in chunks of
+    ``batch_size`` instead of one flush per object.
+    """
+    started = time.perf_counter()
     wb, ws = _get_worksheet(file_bytes_or_path)
 
     # First pass: collect all rows grouped by owner key
@@ -387,129 +482,54 @@ def import_owners_from_excel(db: Session, file_bytes_or_path) -> dict:
 
     wb.close()
 
-    # Second pass: create DB records
-    owners_created = 0
-    units_created = 0
-    links_created = 0
-    unit_cache: dict[int, Unit] = {}
-
-    for key, rows in owner_groups.items():
-        # Pick the row with the cleanest last_name (shortest = least noise)
-        first_row = min(rows, key=lambda r: len(r["last_name"] or ""))
-
-        # Detect owner type
-        owner_type = _detect_owner_type(first_row["birth_or_ic"])
-
-        # Parse birth number vs company ID
-        birth_number = None
-        company_id_val = None
-        birth_or_ic = first_row["birth_or_ic"]
-        if birth_or_ic:
-            if _is_company_id(birth_or_ic):
-                company_id_val = birth_or_ic.strip()
-            elif _is_birth_number(birth_or_ic):
-                birth_number = birth_or_ic.strip()
-            else:
-                birth_number = birth_or_ic.strip()
-
-        # Build names
-        name_with_titles = _build_name_with_titles(
-            first_row["title"], first_row["first_name"], first_row["last_name"]
-        )
-        name_normalized = _build_name_normalized(first_row["first_name"], first_row["last_name"])
-
-        # Pick best email/phone from all rows for this owner
-        email = None
-        email_secondary = None
-        phone = None
-        phone_landline = None
-        for r in rows:
-            if not email and r["email_evidence"]:
-                email = r["email_evidence"]
-            if not email_secondary and r["email_contacts"]:
-                email_secondary = r["email_contacts"]
-            if not phone and r["phone_gsm"]:
-                phone = r["phone_gsm"]
-            if not phone_landline and r["phone_landline"]:
-                phone_landline = r["phone_landline"]
-
-        owner = Owner(
-            first_name=first_row["first_name"],
-            last_name=first_row["last_name"],
-            title=first_row["title"],
-            name_with_titles=name_with_titles,
-            name_normalized=name_normalized,
-            owner_type=owner_type,
-            birth_number=birth_number,
-            company_id=company_id_val,
-            perm_street=first_row["perm_street"],
-            perm_district=first_row["perm_district"],
-            perm_city=first_row["perm_city"],
-            perm_zip=first_row["perm_zip"],
-            perm_country=first_row["perm_country"],
-            corr_street=first_row["corr_street"],
-            corr_district=first_row["corr_district"],
-            corr_city=first_row["corr_city"],
-            corr_zip=first_row["corr_zip"],
-            corr_country=first_row["corr_country"],
-            phone=phone,
-            phone_landline=phone_landline,
-            email=email,
-            email_secondary=email_secondary,
-            owner_since=first_row["owner_since"],
-            note=first_row["note"],
-        )
-        db.add(owner)
-        db.flush()
-        owners_created += 1
-
-        # Create units and owner-unit links
+    # Second pass: preload existing units {unit_number: (id, podil_scd)}
+    unit_map: dict[int, tuple[int, int | None]] = {
+        number: (uid, podil)
+        for uid, number, podil in db.query(Unit.id, Unit.unit_number, Unit.podil_scd)
+    }
+
+    # New units — first row mentioning an unknown unit number defines it
+    new_units: dict[int, dict] = {}
+    for rows in owner_groups.values():
         for row_data in rows:
             unit_kn = row_data["unit_kn"]
+            if unit_kn not in unit_map and unit_kn not in new_units:
+                new_units[unit_kn] = _unit_values(row_data)
 
-            if unit_kn not in unit_cache:
-                existing_unit = db.query(Unit).filter_by(unit_number=unit_kn).first()
-                if existing_unit:
-                    unit_cache[unit_kn] = existing_unit
-                else:
-                    unit = Unit(
-                        unit_number=unit_kn,
-                        building_number=row_data["building_number"],
-                        podil_scd=row_data["podil_scd"],
-                        floor_area=row_data["floor_area"],
-                        room_count=row_data["room_count"],
-                        space_type=row_data["space_type"],
-                        section=row_data["section"],
-                        orientation_number=row_data["orientation_number"],
-                        address=row_data["address"],
-                        lv_number=row_data["lv_number"],
-                    )
-                    db.add(unit)
-                    db.flush()
-                    unit_cache[unit_kn] = unit
-                    units_created += 1
-
-            unit_obj = unit_cache[unit_kn]
-            votes_val = unit_obj.podil_scd or 0
-
-            owner_unit = OwnerUnit(
-                owner_id=owner.id,
-                unit_id=unit_obj.id,
-                ownership_type=_normalize_ownership_type(row_data["ownership_type"]),
-                share=1.0,
-                votes=votes_val,
-                excel_row_number=row_data["row_idx"],
-            )
-            db.add(owner_unit)
-            links_created += 1
+    unit_values = list(new_units.values())
+    unit_ids = _insert_returning_ids(db, Unit, unit_values, batch_size)
+    for values, uid in zip(unit_values, unit_ids):
+        unit_map[values["unit_number"]] = (uid, values["podil_scd"])
+
+    # Owners
+    groups = list(owner_groups.values())
+    owner_ids = _insert_returning_ids(db, Owner, [_owner_values(rows) for rows in groups], batch_size)
+
+    # Owner-unit links
+    links = []
+    for owner_id, rows in zip(owner_ids, groups):
+        for row_data in rows:
+            unit_id, podil = unit_map[row_data["unit_kn"]]
+            links.append({
+                "owner_id": owner_id,
+                "unit_id": unit_id,
+                "ownership_type": _normalize_ownership_type(row_data["ownership_type"]),
+                "share": 1.0,
+                "votes": podil or 0,
+                "excel_row_number": row_data["row_idx"],
+            })
+    for chunk in _chunks(links, batch_size):
+        db.execute(insert(OwnerUnit), chunk)
 
     # NOTE: caller is responsible for db.commit() — allows transactional control
-    db.flush()
+    elapsed = time.perf_counter() - started
 
     return {
-        "owners_created": owners_created,
-        "units_created": units_created,
-        "links_created": links_created,
+        "owners_created": len(owner_ids),
+        "units_created": len(unit_ids),
+        "links_created": len(links),
         "rows_processed": rows_processed,
         "errors": errors,
+        "elapsed": elapsed,
+        "rows_per_second": rows_processed / elapsed if elapsed > 0 else 0.0,
     }
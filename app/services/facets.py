@@ -0,0 +1,126 @@
+"""Filter-bubble counts for the owner, unit and audit log list pages.
+
+Each page's counts come from one aggregate query per table (conditional
+SUMs for owners, one GROUP BY for units) instead of a count() per bubble.
+Results are cached per engine and data set, tagged with the set's
+``DataVersion``; any write to the underlying tables bumps the version
+(SQLite triggers), so a stale entry is recomputed on the next read.
+"""
+import threading
+import weakref
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models.common import AuditLog, DataVersion
+from app.models.owner import Owner, OwnerUnit, Unit
+
+_cache: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()  # engine -> {name: (version, facets)}
+_cache_lock = threading.Lock()
+
+
+def data_version(db: Session, name: str) -> int:
+    """Current write counter of a data set (0 before its first write)."""
+    return db.query(DataVersion.version).filter(DataVersion.name == name).scalar() or 0
+
+
+def _cached(db: Session, name: str, compute) -> dict:
+    version = data_version(db, name)
+    engine = db.get_bind()
+    with _cache_lock:
+        hit = _cache.get(engine, {}).get(name)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    facets = compute(db)
+    with _cache_lock:
+        _cache.setdefault(engine, {})[name] = (version, facets)
+    return facets
+
+
+def clear_facet_cache() -> None:
+    """Drop all cached counts (the database file was replaced by a restore)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _filled(column):
+    return case(((column.isnot(None)) & (column != ""), 1), else_=0)
+
+
+def _compute_owner_facets(db: Session) -> dict:
+    total, physical, legal, with_email, with_phone = (
+        db.query(
+            func.count(Owner.id),
+            func.coalesce(func.sum(case((Owner.owner_type == "physical", 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Owner.owner_type == "legal", 1), else_=0)), 0),
+            func.coalesce(func.sum(_filled(Owner.email)), 0),
+            func.coalesce(func.sum(_filled(Owner.phone)), 0),
+        )
+        .filter(Owner.is_active == True)  # noqa: E712
+        .one()
+    )
+    ownership_types = [
+        r[0] for r in db.query(OwnerUnit.ownership_type).filter(
+            OwnerUnit.ownership_type.isnot(None),
+            OwnerUnit.ownership_type != "",
+            OwnerUnit.valid_to.is_(None),
+        ).group_by(OwnerUnit.ownership_type).order_by(OwnerUnit.ownership_type).all()
+    ]
+    return {
+        "total": total,
+        "fyzicka_count": physical,
+        "pravnicka_count": legal,
+        "s_emailem_count": with_email,
+        "bez_emailu_count": total - with_email,
+        "s_telefonem_count": with_phone,
+        "bez_telefonu_count": total - with_phone,
+        "ownership_types": ownership_types,
+    }
+
+
+def owner_facets(db: Session) -> dict:
+    """Bubble counts for /vlastnici (active owners) and ownership types."""
+    return _cached(db, "owners", _compute_owner_facets)
+
+
+def _compute_unit_facets(db: Session) -> dict:
+    rows = (
+        db.query(Unit.building_number, Unit.space_type, Unit.section, func.count(Unit.id))
+        .group_by(Unit.building_number, Unit.space_type, Unit.section)
+        .all()
+    )
+    total = 0
+    buildings: set = set()
+    space_types: dict = {}
+    sections: dict = {}
+    for building, space_type, section, count in rows:
+        total += count
+        if building:
+            buildings.add(building)
+        if space_type:
+            space_types[space_type] = space_types.get(space_type, 0) + count
+        if section:
+            sections[section] = sections.get(section, 0) + count
+    return {
+        "total": total,
+        "building_list": sorted(buildings),
+        "space_type_list": [{"value": k, "count": space_types[k]} for k in sorted(space_types)],
+        "section_list": [{"value": k, "count": sections[k]} for k in sorted(sections)],
+    }
+
+
+def unit_facets(db: Session) -> dict:
+    """Total, buildings and space type / section counts for /jednotky."""
+    return _cached(db, "units", _compute_unit_facets)
+
+
+def _compute_audit_facets(db: Session) -> dict:
+    # DISTINCT over the leading column of the (action|model_name, timestamp) indexes
+    actions = [r[0] for r in db.query(AuditLog.action).distinct().order_by(AuditLog.action).all() if r[0]]
+    models = [r[0] for r in db.query(AuditLog.model_name).distinct().order_by(AuditLog.model_name).all() if r[0]]
+    return {"actions": actions, "models": models}
+
+
+def audit_facets(db: Session) -> dict:
+    """Distinct actions and models for the /sprava/audit filters."""
+    return _cached(db, "audit", _compute_audit_facets)
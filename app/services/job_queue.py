@@ -0,0 +1,286 @@
+"""In-process background job queue for long-running operations.
+
+Routes validate their input, then hand the heavy work to ``submit_job`` and
+redirect to the job page (/ulohy/{id}), which polls the progress partial via
+HTMX until the job finishes. Every job is a ``Job`` row: status, final
+progress, flash message and JSON result are persisted when it ends.
+
+A job function has the signature ``func(db, ctx, *args) -> dict``. It runs in
+its own session on a worker thread, reports progress via
+``ctx.progress(done, total)`` (written to the Job row at most once per
+PROGRESS_WRITE_INTERVAL, so a poll served by another worker sees it too) and
+returns a dict whose ``message`` (and
+optional ``flash_type`` / ``redirect_url``) keys are shown to the user; the
+rest is stored as the job result. An exception marks the job as failed.
+
+With ``JOB_WORKERS = 0`` jobs run synchronously inside the request.
+
+A job submitted with a ``key`` is exclusive: while a job with the same key is
+queued or running, ``submit_job`` creates nothing and returns None. Each job
+records the process (host:pid) whose pool runs it, so a restarting uvicorn
+worker fails only jobs whose process is gone, not those of its siblings. All
+workers are expected on one host, as they share the SQLite file.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+from fastapi.responses import RedirectResponse
+from sqlalchemy import exists, insert, literal, select, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.common import Job
+
+JOB_QUEUED = "čeká"
+JOB_RUNNING = "běží"
+JOB_DONE = "dokončeno"
+JOB_FAILED = "chyba"
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+PROGRESS_WRITE_INTERVAL = 1.0  # seconds between progress writes to the Job row
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Live progress of this process's running jobs: job_id -> (done, total)
+_progress: dict = {}
+_progress_lock = threading.Lock()
+
+
+def _store_progress(bind, job_id: int, done: int, total: int) -> None:
+    """Write progress to the Job row in its own short transaction.
+
+    Never waits for the write lock: while the job's own transaction holds it
+    the write is skipped and the next report retries.
+    """
+    with bind.connect() as conn:
+        conn.exec_driver_sql("PRAGMA busy_timeout=0")
+        try:
+            conn.execute(update(Job).where(Job.id == job_id).values(progress_done=done, progress_total=total))
+            conn.commit()
+        except OperationalError:
+            conn.rollback()
+        finally:
+            conn.exec_driver_sql(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}")
+
+
+class JobContext:
+    """Handle passed to a running job function."""
+
+    def __init__(self, job_id: int, bind=None):
+        self.job_id = job_id
+        # An in-memory database is private to this process: memory is enough
+        database = bind.url.database if bind is not None else None
+        self._bind = bind if database and database != ":memory:" else None
+        self._written = 0.0
+
+    def progress(self, done: int, total: int) -> None:
+        with _progress_lock:
+            _progress[self.job_id] = (done, total)
+        if self._bind is None:
+            return
+        now = time.monotonic()
+        if now - self._written >= PROGRESS_WRITE_INTERVAL or done >= total:
+            self._written = now
+            _store_progress(self._bind, self.job_id, done, total)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.JOB_WORKERS, thread_name_prefix="job"
+            )
+        return _executor
+
+
+def shutdown_job_queue(wait: bool = True) -> None:
+    """Stop the worker pool (called on application shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+def ensure_job_columns(bind) -> None:
+    """Add Job.key and Job.worker to a database created before them.
+
+    create_all() does not alter existing tables.
+    """
+    with bind.begin() as conn:
+        existing = {row[1] for row in conn.execute(text("PRAGMA table_info(jobs)"))}
+        for name in ("key", "worker"):
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE jobs ADD COLUMN {name} VARCHAR DEFAULT ''"))
+
+
+def worker_id() -> str:
+    """host:pid of this process, as stored in Job.worker."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _worker_alive(worker: str) -> bool:
+    """Whether the process that owns a job still runs (a sibling worker, not us)."""
+    host, _, pid = (worker or "").rpartition(":")
+    if os.name != "posix" or host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return False  # a previous process that had our pid (e.g. pid 1 in a container)
+    try:
+        os.kill(int(pid), 0)
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def submit_job(
+    db: Session,
+    kind: str,
+    title: str,
+    func: Callable,
+    *args,
+    user_id: Optional[int] = None,
+    redirect_url: str = "",
+    key: str = "",
+) -> Optional[Job]:
+    """Create a Job row and schedule ``func(db, ctx, *args)`` on the worker pool.
+
+    With a ``key`` the row is inserted only if no job with that key is queued
+    or running (one INSERT ... SELECT, so concurrent requests cannot both
+    pass); returns None when one is.
+    """
+    values = {
+        "kind": kind, "title": title, "status": JOB_QUEUED, "user_id": user_id,
+        "redirect_url": redirect_url, "key": key, "worker": worker_id(), "created_at": datetime.utcnow(),
+    }
+    if key:
+        duplicate = exists().where(Job.key == key, Job.status.in_(ACTIVE_STATUSES))
+        stmt = insert(Job).from_select(
+            list(values), select(*(literal(value, Job.__table__.c[name].type) for name, value in values.items()))
+            .where(~duplicate),
+        ).returning(Job.id)
+        job_id = db.execute(stmt).scalar()
+        db.commit()
+        if job_id is None:
+            return None
+        job = db.get(Job, job_id)
+    else:
+        job = Job(**values)
+        db.add(job)
+        db.commit()
+
+    bind = db.get_bind()
+    if settings.JOB_WORKERS <= 0:
+        _run_job(bind, job.id, func, args)
+        db.refresh(job)
+    else:
+        _get_executor().submit(_run_job, bind, job.id, func, args)
+    return job
+
+
+def _run_job(bind, job_id: int, func: Callable, args: tuple) -> None:
+    """Execute one job in a fresh session and persist its outcome."""
+    db = Session(bind=bind)
+    try:
+        job = db.get(Job, job_id)
+        job.status = JOB_RUNNING
+        job.started_at = datetime.utcnow()
+        db.commit()
+
+        try:
+            result = dict(func(db, JobContext(job_id, bind), *args) or {})
+        except Exception as e:
+            db.rollback()
+            job = db.get(Job, job_id)
+            job.status = JOB_FAILED
+            job.message = str(e) or e.__class__.__name__
+        else:
+            job = db.get(Job, job_id)
+            job.status = JOB_DONE
+            job.message = result.pop("message", "")
+            job.redirect_url = result.pop("redirect_url", job.redirect_url)
+            job.result = json.dumps(result, ensure_ascii=False, default=str)
+
+        with _progress_lock:
+            done, total = _progress.pop(job_id, (0, 0))
+        job.progress_done = done or job.progress_done
+        job.progress_total = total or job.progress_total
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def job_progress(job: Job) -> tuple:
+    """Current (done, total) of a job: live when it runs in this process,
+    otherwise as last written to its row."""
+    with _progress_lock:
+        live = _progress.get(job.id)
+    return live or (job.progress_done or 0, job.progress_total or 0)
+
+
+def job_result(job: Job) -> dict:
+    """Decoded JSON result of a finished job."""
+    try:
+        return json.loads(job.result) if job.result else {}
+    except ValueError:
+        return {}
+
+
+def job_flash(job: Job) -> dict:
+    """Flash message describing a finished job."""
+    if job.status == JOB_FAILED:
+        return {"type": "error", "message": f"{job.title}: {job.message}"}
+    flash_type = job_result(job).get("flash_type", "success")
+    return {"type": flash_type, "message": job.message or f"{job.title}: hotovo."}
+
+
+def job_redirect(request, job: Job) -> RedirectResponse:
+    """Redirect after submitting a job: to its result if already finished, else to the job page."""
+    if job.status in (JOB_DONE, JOB_FAILED):
+        request.session["flash"] = job_flash(job)
+        return RedirectResponse(url=job.redirect_url or "/", status_code=303)
+    return RedirectResponse(url=f"/ulohy/{job.id}", status_code=303)
+
+
+def active_jobs(db: Session, kind: Optional[str] = None) -> int:
+    """Number of jobs still queued or running (optionally of one kind)."""
+    query = db.query(Job).filter(Job.status.in_(ACTIVE_STATUSES))
+    if kind is not None:
+        query = query.filter(Job.kind == kind)
+    return query.count()
+
+
+def recover_interrupted_jobs(db: Session) -> int:
+    """Mark jobs left queued/running by a process that no longer runs as failed.
+
+    Jobs of live sibling workers are left alone; rows without a worker
+    predate its tracking and are treated as orphaned.
+    """
+    orphaned = [
+        job_id
+        for job_id, worker in db.query(Job.id, Job.worker).filter(Job.status.in_(ACTIVE_STATUSES))
+        if not _worker_alive(worker)
+    ]
+    if not orphaned:
+        return 0
+    count = (
+        db.query(Job)
+        .filter(Job.id.in_(orphaned), Job.status.in_(ACTIVE_STATUSES))
+        .update(
+            {"status": JOB_FAILED, "message": "Přerušeno restartem aplikace.", "finished_at": datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return count
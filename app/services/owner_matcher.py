@@ -0,0 +1,225 @@
+"""Indexed fuzzy owner matching shared by tax, sync and owner exchange.
+
+Owner names are indexed once into an in-memory structure of trigram and
+token postings built from ``Owner.name_normalized``. A lookup gathers
+candidates from the postings, keeps only the best-overlapping ones and
+scores them with rapidfuzz, so a single query costs well under a
+millisecond even for thousands of owners.
+
+The index is rebuilt lazily. It is keyed by the engine and by the
+trigger-maintained ``owners`` DataVersion, so writes from any process,
+raw SQL or a restored database are seen by the next lookup; in-process ORM
+writes (flush or bulk statement) also bump a local counter, which covers
+uncommitted changes of the session doing the lookup.
+"""
+from __future__ import annotations
+
+import threading
+import weakref
+from collections import Counter
+
+from rapidfuzz import fuzz
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.owner import Owner
+from app.services.facets import data_version
+from app.services.text_utils import normalize_name
+
+# How many best-overlapping candidates are passed to the scorer
+MAX_CANDIDATES = 64
+
+_lock = threading.Lock()
+_version = 0
+_cache: dict = {"bind": None, "version": None, "index": None}
+
+
+def _trigrams(text: str) -> set[str]:
+    """Return the set of character trigrams of a padded string."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _owner_key(owner: Owner) -> str:
+    """Build the normalized 'příjmení jméno' key used for matching."""
+    if owner.name_normalized:
+        return normalize_name(owner.name_normalized)
+    parts = []
+    if owner.last_name:
+        parts.append(owner.last_name)
+    if owner.first_name and owner.first_name != owner.last_name:
+        parts.append(owner.first_name)
+    return normalize_name(" ".join(parts) or owner.name_with_titles or "")
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Similarity of two strings in range 0.0–1.0 (drop-in for SequenceMatcher.ratio)."""
+    return fuzz.ratio(a, b) / 100.0
+
+
+class OwnerIndex:
+    """In-memory trigram/token index over owner names."""
+
+    def __init__(self, rows: list[tuple[int, str, str, bool]]):
+        # rows: (owner_id, key, display_name, is_active)
+        self.ids: list[int] = []
+        self.keys: list[str] = []
+        self.reversed_keys: list[str] = []
+        self.display_names: list[str] = []
+        self.active: list[bool] = []
+        self.grams: dict[str, list[int]] = {}
+        self.tokens: dict[str, list[int]] = {}
+
+        for owner_id, key, display_name, is_active in rows:
+            if not key:
+                continue
+            pos = len(self.ids)
+            self.ids.append(owner_id)
+            self.keys.append(key)
+            self.reversed_keys.append(" ".join(reversed(key.split())))
+            self.display_names.append(display_name)
+            self.active.append(is_active)
+            for gram in _trigrams(key):
+                self.grams.setdefault(gram, []).append(pos)
+            for token in set(key.split()):
+                self.tokens.setdefault(token, []).append(pos)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _candidates(self, query: str, active_only: bool) -> list[int]:
+        """Return positions of the owners sharing the most trigrams/tokens with query."""
+        hits: Counter = Counter()
+        for gram in _trigrams(query):
+            hits.update(self.grams.get(gram, ()))
+        # Whole-token hits weigh more than single trigrams
+        for token in set(query.split()):
+            for pos in self.tokens.get(token, ()):
+                hits[pos] += 3
+        if active_only:
+            return [pos for pos, _ in hits.most_common() if self.active[pos]][:MAX_CANDIDATES]
+        return [pos for pos, _ in hits.most_common(MAX_CANDIDATES)]
+
+    def search(
+        self,
+        name: str,
+        limit: int = 10,
+        min_score: float = 0.0,
+        active_only: bool = False,
+    ) -> list[dict]:
+        """Return up to ``limit`` best matches for ``name`` sorted by score (desc).
+
+        Each match is a dict with keys owner_id, display_name, score (0.0–1.0).
+        Both name orderings ('příjmení jméno' and 'jméno příjmení') are tried.
+        """
+        query = normalize_name(name or "")
+        if not query:
+            return []
+
+        results = []
+        for pos in self._candidates(query, active_only):
+            score = max(
+                fuzz.ratio(query, self.keys[pos]),
+                fuzz.ratio(query, self.reversed_keys[pos]),
+            ) / 100.0
+            if score >= min_score:
+                results.append({
+                    "owner_id": self.ids[pos],
+                    "display_name": self.display_names[pos],
+                    "score": score,
+                })
+        results.sort(key=lambda m: (-m["score"], m["owner_id"]))
+        return results[:limit]
+
+    def best(self, name: str, min_score: float = 0.0, active_only: bool = False) -> dict | None:
+        """Return the single best match for ``name`` or None."""
+        matches = self.search(name, limit=1, min_score=min_score, active_only=active_only)
+        return matches[0] if matches else None
+
+
+def build_owner_index(db: Session) -> OwnerIndex:
+    """Load all owners and build a fresh index."""
+    owners = db.query(Owner).all()
+    return OwnerIndex([
+        (o.id, _owner_key(o), o.display_name, bool(o.is_active))
+        for o in owners
+    ])
+
+
+def get_owner_index(db: Session) -> OwnerIndex:
+    """Return the cached owner index, rebuilding it if owners changed."""
+    bind = db.get_bind()
+    stored_version = data_version(db, "owners")
+    with _lock:
+        version = (_version, stored_version)
+        cached_bind = _cache["bind"]() if _cache["bind"] else None
+        if cached_bind is bind and _cache["version"] == version:
+            return _cache["index"]
+    index = build_owner_index(db)
+    with _lock:
+        # Only publish if no in-process write happened while we were building
+        if version[0] == _version:
+            _cache["bind"] = weakref.ref(bind)
+            _cache["version"] = version
+            _cache["index"] = index
+    return index
+
+
+def invalidate_owner_index() -> None:
+    """Mark the cached owner index as stale."""
+    global _version
+    with _lock:
+        _version += 1
+        _cache["index"] = None
+
+
+def match_owners(
+    db: Session,
+    name: str,
+    limit: int = 10,
+    min_score: float = 0.0,
+    active_only: bool = False,
+) -> list[dict]:
+    """Return top ``limit`` owner matches for a free-form name."""
+    return get_owner_index(db).search(name, limit=limit, min_score=min_score, active_only=active_only)
+
+
+def best_owner_match(
+    db: Session, name: str, min_score: float = 0.0, active_only: bool = False
+) -> dict | None:
+    """Return the best owner match for a free-form name, or None below ``min_score``."""
+    return get_owner_index(db).best(name, min_score=min_score, active_only=active_only)
+
+
+# --- Invalidation hooks ---
+
+
+def _on_owner_flush(mapper, connection, target) -> None:
+    invalidate_owner_index()
+
+
+for _evt in ("after_insert", "after_update", "after_delete"):
+    event.listen(Owner, _evt, _on_owner_flush)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_bulk_owner_statement(orm_execute_state) -> None:
+    """Invalidate on bulk insert/update/delete statements that target owners."""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(m.class_ is Owner for m in orm_execute_state.all_mappers):
+        invalidate_owner_index()
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _on_transaction_end(session) -> None:
+    """Invalidate again at commit/rollback so no index built from uncommitted data survives."""
+    if session.info.pop("owner_index_dirty", False):
+        invalidate_owner_index()
+
+
+@event.listens_for(Session, "before_flush")
+def _on_before_flush(session, flush_context, instances) -> None:
+    if any(isinstance(obj, Owner) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["owner_index_dirty"] = True
@@ -0,0 +1,34 @@
+"""Keyset (cursor) pagination for long list pages.
+
+A page is requested with the id of the last row already shown. Its sort key
+values are looked up by primary key and the next page continues with
+``(key1, key2, ...) > (values...)`` — a row-value comparison SQLite can
+answer from the sort index, so deep pages cost the same as the first one
+(unlike OFFSET). The last key must be unique to make the order total.
+"""
+from sqlalchemy import tuple_
+
+PAGE_SIZE = 100
+
+
+def keyset_page(query, model, keys: list, cursor: int | None = None,
+                descending: bool = False, page_size: int | None = None) -> tuple:
+    """Return (rows, next_cursor) for one page of ``query`` ordered by ``keys``.
+
+    ``cursor`` is the id of the last row of the previous page (None for the
+    first page). ``next_cursor`` is None on the last page.
+    """
+    page_size = page_size or PAGE_SIZE
+    if cursor is not None:
+        anchor = query.session.query(*keys).filter(model.id == cursor).first()
+        if anchor is None:
+            return [], None
+        row, bound = tuple_(*keys), tuple_(*anchor)
+        query = query.filter(row < bound if descending else row > bound)
+
+    query = query.order_by(*[key.desc() if descending else key.asc() for key in keys])
+    rows = query.limit(page_size + 1).all()
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, rows[-1].id
+    return rows, None
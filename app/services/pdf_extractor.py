@@ -0,0 +1,136 @@
+"""Owner-name extraction from uploaded tax PDFs.
+
+Uploads are copied to disk in fixed-size chunks while being hashed, so a
+batch of hundreds of PDFs never sits in memory. Names are extracted from the
+first page's text layer only, in a process pool for larger batches (pdfminer
+is pure Python and CPU bound), and cached by the file's sha256 so the same
+document is never parsed twice.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import BinaryIO, Callable, Optional
+
+CHUNK_SIZE = 1024 * 1024
+PARALLEL_MIN_FILES = 8
+_CACHE_MAX_ENTRIES = 4096
+
+_HEADER_KEYWORDS = ["rozúčtování", "příjmů", "datum", "strana", "celkem"]
+_FILENAME_PREFIXES = ["rozuctovani_", "dane_", "tax_"]
+
+_name_cache: "OrderedDict[str, str]" = OrderedDict()  # sha256 -> extracted name
+_cache_lock = threading.Lock()
+
+
+def save_stream(source: BinaryIO, path: str) -> str:
+    """Copy ``source`` to ``path`` chunk by chunk; return the content sha256."""
+    digest = hashlib.sha256()
+    with open(path, "wb") as out:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+
+def first_page_text(file_path: str) -> str:
+    """Text layer of the first page ('' when the PDF cannot be read)."""
+    try:
+        import pdfplumber
+        with pdfplumber.open(file_path, pages=[1]) as pdf:
+            if pdf.pages:
+                return pdf.pages[0].extract_text() or ""
+    except Exception:
+        pass
+    return ""
+
+
+def name_from_text(text: str) -> str:
+    """First non-header line among the first ten lines, or ''."""
+    for line in text.strip().split("\n")[:10]:
+        line = line.strip()
+        # Skip empty lines and common headers
+        if not line or len(line) < 3:
+            continue
+        if any(kw in line.lower() for kw in _HEADER_KEYWORDS):
+            continue
+        return line
+    return ""
+
+
+def name_from_filename(filename: str) -> str:
+    """Fallback name derived from the file name (rozuctovani_novak_jan.pdf)."""
+    basename = os.path.splitext(os.path.basename(filename))[0]
+    for prefix in _FILENAME_PREFIXES:
+        if basename.lower().startswith(prefix):
+            basename = basename[len(prefix):]
+    return basename.replace("_", " ").replace("-", " ").strip()
+
+
+def extract_name(file_path: str) -> str:
+    """Owner name from the PDF text, '' when no usable line was found."""
+    return name_from_text(first_page_text(file_path))
+
+
+def _cache_get(sha256: str) -> Optional[str]:
+    with _cache_lock:
+        name = _name_cache.get(sha256)
+        if name is not None:
+            _name_cache.move_to_end(sha256)
+        return name
+
+
+def _cache_put(sha256: str, name: str) -> None:
+    with _cache_lock:
+        _name_cache[sha256] = name
+        _name_cache.move_to_end(sha256)
+        while len(_name_cache) > _CACHE_MAX_ENTRIES:
+            _name_cache.popitem(last=False)
+
+
+def extract_names(
+    files: list,
+    max_workers: int = 0,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """Extract names for ``files`` given as (sha256, path) pairs.
+
+    Identical contents are parsed once and cached results are reused.
+    Returns sha256 -> text-layer name ('' when none was found; callers fall
+    back to name_from_filename).
+    """
+    names: dict = {}
+    pending: dict = {}
+    for sha256, path in files:
+        cached = _cache_get(sha256)
+        if cached is not None:
+            names[sha256] = cached
+        else:
+            pending.setdefault(sha256, path)
+
+    total = len(pending)
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or total < PARALLEL_MIN_FILES:
+        for done, (sha256, path) in enumerate(pending.items(), 1):
+            names[sha256] = extract_name(path)
+            _cache_put(sha256, names[sha256])
+            if progress:
+                progress(done, total)
+        return names
+
+    # spawn: never fork the threaded web server process
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, total), mp_context=ctx) as pool:
+        futures = {pool.submit(extract_name, path): sha256 for sha256, path in pending.items()}
+        for done, future in enumerate(as_completed(futures), 1):
+            sha256 = futures[future]
+            names[sha256] = future.result()
+            _cache_put(sha256, names[sha256])
+            if progress:
+                progress(done, total)
+    return names
@@ -1,9 +1,15 @@
 """Generate personalized PDF ballot files for voting."""
+import io
+import multiprocessing
 import os
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional
 
 from docxtpl import DocxTemplate
 
+# Below this many ballots the process pool start-up costs more than it saves
+PARALLEL_MIN_BALLOTS = 20
+
 
 def generate_ballot_pdf(
     template_path: str,
@@ -12,18 +18,27 @@ def generate_ballot_pdf(
     owner_name: str,
     unit_numbers: str,
     items: list,
+    template_bytes: Optional[bytes] = None,
 ) -> str:
     """Generate a personalized ballot document from a .docx template.
 
     Uses docxtpl to fill in template variables and saves as .docx.
     The output is a .docx file (PDF conversion requires LibreOffice which is optional).
+    When ``template_bytes`` is given, the template is rendered from memory
+    instead of being read from ``template_path``.
 
     Returns the path to the generated file.
     """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    if template_path and os.path.exists(template_path):
-        doc = DocxTemplate(template_path)
+    template_source = None
+    if template_bytes:
+        template_source = io.BytesIO(template_bytes)
+    elif template_path and os.path.exists(template_path):
+        template_source = template_path
+
+    if template_source is not None:
+        doc = DocxTemplate(template_source)
         context = {
             "voting_name": voting_name,
             "owner_name": owner_name,
@@ -47,3 +62,85 @@ def generate_ballot_pdf(
         doc.save(output_path)
 
     return output_path
+
+
+# --- Parallel ballot generation ---
+
+# Per-process shared state of a spawned pool worker, set once by _init_worker.
+# Never set in the app process itself: concurrent ballot jobs share it.
+_worker_state: dict = {}
+
+
+def _init_worker(template_bytes: Optional[bytes], voting_name: str, items: list) -> None:
+    """Process pool initializer: keep the template and voting data in the worker."""
+    _worker_state["template_bytes"] = template_bytes
+    _worker_state["voting_name"] = voting_name
+    _worker_state["items"] = items
+
+
+def _render_job(job: dict) -> str:
+    """Render one ballot using the state loaded by _init_worker."""
+    return generate_ballot_pdf(
+        template_path="",
+        output_path=job["output_path"],
+        voting_name=_worker_state["voting_name"],
+        owner_name=job["owner_name"],
+        unit_numbers=job["unit_numbers"],
+        items=_worker_state["items"],
+        template_bytes=_worker_state["template_bytes"],
+    )
+
+
+def generate_ballots(
+    template_path: str,
+    voting_name: str,
+    items: list,
+    jobs: List[dict],
+    max_workers: int = 0,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[str]:
+    """Render many ballots, fanning the work out over a process pool.
+
+    The template is read from disk once and handed to every worker in memory.
+    Each job is a dict with keys output_path, owner_name, unit_numbers.
+    ``progress(done, total)`` is called after every finished ballot.
+    Returns output paths in the order of ``jobs``.
+    """
+    template_bytes = None
+    if template_path and os.path.exists(template_path):
+        with open(template_path, "rb") as f:
+            template_bytes = f.read()
+
+    total = len(jobs)
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or total < PARALLEL_MIN_BALLOTS:
+        paths = []
+        for done, job in enumerate(jobs, 1):
+            paths.append(generate_ballot_pdf(
+                template_path="",
+                output_path=job["output_path"],
+                voting_name=voting_name,
+                owner_name=job["owner_name"],
+                unit_numbers=job["unit_numbers"],
+                items=items,
+                template_bytes=template_bytes,
+            ))
+            if progress:
+                progress(done, total)
+        return paths
+
+    paths: List[str] = [""] * total
+    # spawn: never fork the threaded web server process
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=min(workers, total),
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(template_bytes, voting_name, items),
+    ) as pool:
+        futures = {pool.submit(_render_job, job): idx for idx, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), 1):
+            paths[futures[future]] = future.result()
+            if progress:
+                progress(done, total)
+    return paths
@@ -0,0 +1,167 @@
+"""Content-addressed store for uploaded tax PDFs.
+
+Every upload is streamed into ``UPLOAD_DIR/tax/blobs/<aa>/<bb>/<sha256>.pdf``
+(two directory levels from the hash keep directories small). The same
+content is stored once however many times it is uploaded. ``PdfBlob`` rows
+record stored contents together with the extracted owner name; references
+are counted from ``TaxDocument.content_hash`` and a blob is deleted when the
+last document using it is gone.
+
+Files are stored by the upload request but their documents are written by
+a background job, so the request reserves the hashes (``reserve_blobs``)
+until the job commits or fails (``drop_reservation``); ``release_blobs``
+keeps every reserved file. Orphaned files are removed only once the
+transaction that dropped their last reference commits, so a rollback never
+leaves rows pointing at missing files.
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, insert, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.tax import PdfBlob, PdfBlobReservation, TaxDocument
+from app.services.pdf_extractor import save_stream
+
+# Older reservations belong to a job that never finished (process restart)
+RESERVATION_TTL = timedelta(days=1)
+
+# session.info key: hashes whose files go once the session commits
+_ORPHANS = "pdf_store_orphans"
+
+
+def store_root() -> str:
+    return os.path.join(settings.UPLOAD_DIR, "tax", "blobs")
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(store_root(), sha256[:2], sha256[2:4], f"{sha256}.pdf")
+
+
+def ensure_tax_document_hash_column(bind) -> None:
+    """Add TaxDocument.content_hash to a database created before the store.
+
+    create_all() does not alter existing tables.
+    """
+    with bind.begin() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(tax_documents)"))}
+        if "content_hash" not in columns:
+            conn.execute(text("ALTER TABLE tax_documents ADD COLUMN content_hash VARCHAR DEFAULT ''"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_tax_documents_content_hash ON tax_documents (content_hash)"
+        ))
+
+
+def put_stream(source) -> tuple:
+    """Store a file object; return (sha256, path). Known content costs no disk."""
+    tmp_dir = os.path.join(store_root(), "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf", dir=tmp_dir)
+    os.close(fd)
+    try:
+        sha256 = save_stream(source, tmp_path)
+        path = blob_path(sha256)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return sha256, path
+
+
+def reserve_blobs(db: Session, token: str, hashes: list) -> None:
+    """Protect just-stored contents until the upload ``token`` is processed (caller commits)."""
+    if hashes:
+        db.execute(insert(PdfBlobReservation), [{"token": token, "sha256": h} for h in hashes])
+
+
+def drop_reservation(db: Session, token: str) -> list:
+    """Remove the reservations of upload ``token``; return their hashes (caller commits)."""
+    hashes = [row[0] for row in db.query(PdfBlobReservation.sha256).filter(PdfBlobReservation.token == token)]
+    db.query(PdfBlobReservation).filter(PdfBlobReservation.token == token).delete(synchronize_session=False)
+    return hashes
+
+
+def cached_names(db: Session, hashes: list) -> dict:
+    """Map sha256 -> extracted name for contents already in the store."""
+    if not hashes:
+        return {}
+    rows = db.query(PdfBlob.sha256, PdfBlob.extracted_name).filter(PdfBlob.sha256.in_(hashes)).all()
+    return dict(rows)
+
+
+def register_blobs(db: Session, names: dict) -> None:
+    """Record newly stored contents with their extracted names (caller commits)."""
+    if not names:
+        return
+    rows = []
+    for sha256, name in names.items():
+        path = blob_path(sha256)
+        rows.append({
+            "sha256": sha256,
+            "size": os.path.getsize(path) if os.path.exists(path) else 0,
+            "extracted_name": name or "",
+        })
+    db.execute(sqlite_insert(PdfBlob).values(rows).on_conflict_do_nothing(index_elements=["sha256"]))
+
+
+def reference_counts(db: Session, hashes: list) -> dict:
+    """Map sha256 -> number of TaxDocuments using it."""
+    rows = (
+        db.query(TaxDocument.content_hash, func.count(TaxDocument.id))
+        .filter(TaxDocument.content_hash.in_(hashes))
+        .group_by(TaxDocument.content_hash)
+        .all()
+    )
+    return dict(rows)
+
+
+def release_blobs(db: Session, hashes: list | None = None) -> int:
+    """Delete stored PDFs no TaxDocument references and no upload reserves.
+
+    Checks ``hashes`` (e.g. of just-deleted documents or a failed upload,
+    with or without a PdfBlob row), or every blob and expired reservation
+    when None. Deletes the PdfBlob rows; the files are removed after the
+    caller commits (kept on rollback). Returns the number of blobs released.
+    """
+    expired = PdfBlobReservation.created_at < datetime.utcnow() - RESERVATION_TTL
+    if hashes is not None:
+        candidates = [h for h in set(hashes) if h]
+    else:
+        candidates = [row[0] for row in db.query(PdfBlob.sha256)]
+        stale = {row[0] for row in db.query(PdfBlobReservation.sha256).filter(expired)}
+        candidates = list(set(candidates) | stale)
+        db.query(PdfBlobReservation).filter(expired).delete(synchronize_session=False)
+    if not candidates:
+        return 0
+    referenced = reference_counts(db, candidates)
+    reserved = {
+        row[0] for row in db.query(PdfBlobReservation.sha256)
+        .filter(PdfBlobReservation.sha256.in_(candidates), ~expired)
+    }
+    orphans = [sha256 for sha256 in candidates if not referenced.get(sha256) and sha256 not in reserved]
+    if orphans:
+        db.query(PdfBlob).filter(PdfBlob.sha256.in_(orphans)).delete(synchronize_session=False)
+        db.info.setdefault(_ORPHANS, set()).update(orphans)
+    return len(orphans)
+
+
+@event.listens_for(Session, "after_commit")
+def _remove_orphan_files(session: Session) -> None:
+    for sha256 in session.info.pop(_ORPHANS, ()):
+        path = blob_path(sha256)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _keep_orphan_files(session: Session, previous_transaction) -> None:
+    if not previous_transaction.nested:
+        session.info.pop(_ORPHANS, None)
@@ -0,0 +1,79 @@
+"""Ranked full-text search over the FTS5 index (see app.models.search).
+
+User input is split into words and each word becomes a quoted prefix term
+(``"nova"*``), all of which must match. Results are ordered by bm25 with
+name columns weighted above contact and address columns.
+"""
+import re
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.owner import Owner, Unit
+from app.models.voting import Voting
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# bm25 column weights, in SEARCH_TABLES column order
+_OWNER_WEIGHTS = "10.0, 10.0, 4.0, 6.0, 1.0"
+_UNIT_WEIGHTS = "10.0, 5.0, 2.0"
+
+
+def build_match_query(q: str) -> str:
+    """FTS5 MATCH expression for user input ('' when it has no words)."""
+    return " ".join(f'"{word}"*' for word in _WORD_RE.findall(q or ""))
+
+
+def owner_match_subquery(q: str):
+    """SELECT of owner ids matching ``q``, for ``Owner.id.in_(...)`` filters."""
+    return text("SELECT rowid FROM search_owners WHERE search_owners MATCH :match").bindparams(
+        match=build_match_query(q) or '""'
+    )
+
+
+def _ranked_ids(db: Session, sql: str, match: str, limit: int) -> list:
+    return [row[0] for row in db.execute(text(sql), {"match": match, "limit": limit})]
+
+
+def _load_in_order(db: Session, model, ids: list) -> list:
+    if not ids:
+        return []
+    by_id = {obj.id: obj for obj in db.query(model).filter(model.id.in_(ids)).all()}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def search_owners(db: Session, q: str, limit: int = 10) -> list:
+    """Active owners matching ``q``, best match first."""
+    match = build_match_query(q)
+    if not match:
+        return []
+    ids = _ranked_ids(db, (
+        "SELECT s.rowid FROM search_owners s JOIN owners o ON o.id = s.rowid "
+        "WHERE search_owners MATCH :match AND o.is_active = 1 "
+        f"ORDER BY bm25(search_owners, {_OWNER_WEIGHTS}) LIMIT :limit"
+    ), match, limit)
+    return _load_in_order(db, Owner, ids)
+
+
+def search_units(db: Session, q: str, limit: int = 10) -> list:
+    """Units matching ``q``, best match first."""
+    match = build_match_query(q)
+    if not match:
+        return []
+    ids = _ranked_ids(db, (
+        "SELECT rowid FROM search_units WHERE search_units MATCH :match "
+        f"ORDER BY bm25(search_units, {_UNIT_WEIGHTS}) LIMIT :limit"
+    ), match, limit)
+    return _load_in_order(db, Unit, ids)
+
+
+def search_votings(db: Session, q: str, limit: int = 10) -> list:
+    """Votings whose name matches ``q``, best match first."""
+    match = build_match_query(q)
+    if not match:
+        return []
+    ids = _ranked_ids(db, (
+        "SELECT rowid FROM search_votings WHERE search_votings MATCH :match "
+        "ORDER BY bm25(search_votings) LIMIT :limit"
+    ), match, limit)
+    return _load_in_order(db, Voting, ids)
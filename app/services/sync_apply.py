@@ -0,0 +1,171 @@
+"""Applying sync results to owners and their units in bulk.
+
+Both operations resolve everything up front with three queries — the sync
+records, their target ``OwnerUnit`` rows and the owners (``IN`` lists) —
+work out the changes in memory and write them with ORM bulk
+UPDATE-by-primary-key statements (one executemany per table) in the
+caller's transaction. Changed values are audited with ``background=True``,
+i.e. one batched insert after the commit. The caller commits.
+
+A record is applied to the co-owner its comparison matched
+(``SyncRecord.owner_unit_id``) while that ownership is still current. A
+record without one (a whole-group match, or compared before the id was
+stored) is applied only when its unit has a single current owner, so a
+co-owned unit is never written to the wrong co-owner.
+"""
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.owner import Owner, OwnerUnit
+from app.models.sync import SyncRecord
+from app.services.audit_service import log_change
+
+# CSV column -> Owner attribute for the contact transfer
+CONTACT_COLUMNS = {"email": "email", "telefon": "phone", "phone": "phone"}
+
+
+def _target_owner_units(db: Session, records: list) -> dict:
+    """record id -> [ownerunit id, owner id, votes] of the ownership it applies to.
+
+    Records sharing an OwnerUnit share the same list, so changes made for
+    one are seen by the next.
+    """
+    matched_ids = {r.owner_unit_id for r in records if r.unit_id and r.owner_unit_id}
+    unmatched_units = {r.unit_id for r in records if r.unit_id and not r.owner_unit_id}
+    if not matched_ids and not unmatched_units:
+        return {}
+    by_id: dict = {}
+    by_unit: dict = {}
+    rows = (
+        db.query(OwnerUnit.id, OwnerUnit.unit_id, OwnerUnit.owner_id, OwnerUnit.votes)
+        .filter(
+            or_(OwnerUnit.id.in_(matched_ids), OwnerUnit.unit_id.in_(unmatched_units)),
+            OwnerUnit.valid_to.is_(None),
+        )
+        .order_by(OwnerUnit.id)
+    )
+    for ou_id, unit_id, owner_id, votes in rows:
+        by_id[ou_id] = [ou_id, owner_id, votes]
+        by_unit.setdefault(unit_id, []).append(by_id[ou_id])
+
+    targets = {}
+    for rec in records:
+        if not rec.unit_id:
+            continue
+        if rec.owner_unit_id:
+            target = by_id.get(rec.owner_unit_id)
+        else:
+            current = by_unit.get(rec.unit_id, [])
+            target = current[0] if len(current) == 1 else None
+        if target is not None:
+            targets[rec.id] = target
+    return targets
+
+
+def _owners(db: Session, owner_ids: set, *columns) -> dict:
+    """owner id -> {column: value} for the requested Owner columns."""
+    if not owner_ids:
+        return {}
+    rows = db.query(Owner.id, *(getattr(Owner, c) for c in columns)).filter(Owner.id.in_(owner_ids))
+    return {row[0]: dict(zip(columns, row[1:])) for row in rows}
+
+
+def _mark_resolved(db: Session, record_ids: list) -> None:
+    if record_ids:
+        db.execute(update(SyncRecord), [{"id": rid, "is_resolved": 1} for rid in record_ids])
+
+
+def apply_selected_updates(db: Session, session_id: int, record_ids: list, user_id=None) -> int:
+    """Take over the CSV share (votes) of the selected records' ownerships.
+
+    Records with a target ownership are marked resolved; returns how many.
+    The share is written only when it is a whole number and differs.
+    """
+    records = (
+        db.query(
+            SyncRecord.id, SyncRecord.unit_id, SyncRecord.owner_unit_id,
+            SyncRecord.csv_owner_name, SyncRecord.csv_share,
+        )
+        .filter(SyncRecord.id.in_(record_ids), SyncRecord.session_id == session_id)
+        .all()
+    ) if record_ids else []
+    order = {rid: i for i, rid in enumerate(record_ids)}
+    records.sort(key=lambda r: order[r.id])  # later selections win, as submitted
+    targets = _target_owner_units(db, records)
+    owner_units = {ou[0]: ou for ou in targets.values()}
+    existing_owners = set(_owners(db, {ou[1] for ou in owner_units.values()}))
+
+    original_votes = {ou_id: ou[2] for ou_id, ou in owner_units.items()}
+    resolved = []
+    for rec in records:
+        ou = targets.get(rec.id)
+        if ou is None:
+            continue
+        if ou[1] in existing_owners and rec.csv_owner_name and rec.csv_share:
+            try:
+                ou[2] = int(rec.csv_share)
+            except ValueError:
+                pass
+        resolved.append(rec.id)
+
+    changes = [
+        {"id": ou_id, "votes": votes}
+        for ou_id, _, votes in owner_units.values()
+        if votes != original_votes[ou_id]
+    ]
+    if changes:
+        db.execute(update(OwnerUnit), changes)
+    for change in changes:
+        log_change(
+            db, user_id, "update", "OwnerUnit", change["id"], field_name="votes",
+            old_value=str(original_votes[change["id"]]), new_value=str(change["votes"]),
+            background=True,
+        )
+    _mark_resolved(db, resolved)
+    return len(resolved)
+
+
+def apply_contacts(db: Session, session_id: int, user_id=None) -> int:
+    """Copy e-mail / phone from the unresolved records' CSV rows to the
+    owner each record applies to. Returns the number of values set."""
+    records = (
+        db.query(SyncRecord)
+        .options(selectinload(SyncRecord.base_record))
+        .filter(
+            SyncRecord.session_id == session_id,
+            SyncRecord.is_resolved == 0,
+            SyncRecord.unit_id.isnot(None),
+        )
+        .order_by(SyncRecord.id)
+        .all()
+    )
+    targets = _target_owner_units(db, records)
+    owners = _owners(db, {ou[1] for ou in targets.values()}, "email", "phone")
+    original = {owner_id: dict(values) for owner_id, values in owners.items()}
+
+    transferred = 0
+    for rec in records:
+        ou = targets.get(rec.id)
+        owner = owners.get(ou[1]) if ou else None
+        if owner is None:
+            continue
+        for column, value in rec.csv_fields(*CONTACT_COLUMNS).items():
+            if value:
+                owner[CONTACT_COLUMNS[column]] = value
+                transferred += 1
+
+    changes = []
+    for owner_id, values in owners.items():
+        changed = {key: value for key, value in values.items() if value != original[owner_id][key]}
+        if not changed:
+            continue
+        changes.append({"id": owner_id, **changed})
+        for key, value in changed.items():
+            log_change(
+                db, user_id, "update", "Owner", owner_id, field_name=key,
+                old_value=original[owner_id][key] or "", new_value=value,
+                background=True,
+            )
+    if changes:
+        db.execute(update(Owner), changes)
+    return transferred
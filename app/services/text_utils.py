@@ -0,0 +1,14 @@
+"""Text normalization shared by the import and owner matching services."""
+from unicodedata import category, normalize
+
+
+def strip_diacritics(text: str) -> str:
+    """Remove diacritics from text."""
+    nfkd = normalize("NFD", text)
+    return "".join(c for c in nfkd if category(c) != "Mn")
+
+
+def normalize_name(text: str) -> str:
+    """Normalize name for matching: lowercase, no diacritics, single spaces."""
+    result = strip_diacritics(text.lower())
+    return " ".join(result.split())
@@ -0,0 +1,211 @@
+"""Voting result import from Excel — set-based matching and bulk upsert.
+
+Instead of querying units, ballots and votes row by row, the import loads
+three maps up front (unit_number -> unit_id, unit_id -> ballot ids, existing
+votes), computes the desired vote matrix in memory and writes only the
+changed votes with one ``INSERT ... ON CONFLICT`` upsert.
+"""
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.owner import Unit
+from app.models.voting import Ballot, BallotVote
+from app.services.voting_results import rebuild_tallies
+
+logger = logging.getLogger(__name__)
+
+# Rows per upsert / IN (...) statement
+BATCH_SIZE = 500
+
+VOTE_MAPPING = {
+    "pro": "PRO", "1": "PRO", "ano": "PRO", "yes": "PRO",
+    "proti": "PROTI", "0": "PROTI", "ne": "PROTI", "no": "PROTI",
+    "zdržel": "Zdržel se", "zdržel se": "Zdržel se", "abstain": "Zdržel se",
+}
+
+
+def ensure_ballot_vote_unique_index(bind) -> None:
+    """Add the (ballot_id, voting_item_id) unique index to an existing database.
+
+    create_all() only creates indexes together with new tables. When the
+    index is missing, duplicate votes from before the constraint are first
+    collapsed to the newest one; the removal is logged and the tallies of
+    the affected votings are rebuilt.
+    """
+    duplicates = (
+        "SELECT id FROM ballot_votes WHERE id NOT IN ("
+        "SELECT MAX(id) FROM ballot_votes GROUP BY ballot_id, voting_item_id)"
+    )
+    with bind.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'uq_ballot_vote_item'"
+        )).first()
+        if exists:
+            return
+        voting_ids = [row[0] for row in conn.execute(text(
+            "SELECT DISTINCT ballots.voting_id FROM ballot_votes "
+            "JOIN ballots ON ballots.id = ballot_votes.ballot_id "
+            f"WHERE ballot_votes.id IN ({duplicates}) ORDER BY ballots.voting_id"
+        ))]
+        removed = conn.execute(text(f"DELETE FROM ballot_votes WHERE id IN ({duplicates})")).rowcount
+        conn.execute(text(
+            "CREATE UNIQUE INDEX uq_ballot_vote_item ON ballot_votes (ballot_id, voting_item_id)"
+        ))
+        if not removed:
+            return
+        logger.warning(
+            "Removed %d duplicate ballot votes (kept the newest) in votings %s; rebuilding their tallies",
+            removed, voting_ids,
+        )
+        with Session(bind=conn) as db:
+            for voting_id in voting_ids:
+                rebuild_tallies(db, voting_id)
+            db.flush()
+
+
+def parse_unit_number(value) -> int | None:
+    """Unit number from an Excel cell (int, '101', 101.0), or None."""
+    if value is None or value == "":
+        return None
+    try:
+        number = float(str(value).strip())
+    except (ValueError, TypeError):
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def load_unit_map(db: Session) -> dict:
+    """Map unit_number -> unit_id (one query)."""
+    return dict(db.query(Unit.unit_number, Unit.id).all())
+
+
+def load_ballot_map(db: Session, voting_id: int) -> dict:
+    """Map unit_id -> [ballot_id, ...] for a voting (one query).
+
+    A unit may have several ballots (SJM — all co-owners get the same votes).
+    """
+    ballots: dict = {}
+    rows = (
+        db.query(Ballot.unit_id, Ballot.id)
+        .filter(Ballot.voting_id == voting_id, Ballot.unit_id.isnot(None))
+        .order_by(Ballot.id)
+        .all()
+    )
+    for unit_id, ballot_id in rows:
+        ballots.setdefault(unit_id, []).append(ballot_id)
+    return ballots
+
+
+def load_existing_votes(db: Session, voting_id: int) -> dict:
+    """Map (ballot_id, voting_item_id) -> vote for a voting (one query)."""
+    rows = (
+        db.query(BallotVote.ballot_id, BallotVote.voting_item_id, BallotVote.vote)
+        .join(Ballot, Ballot.id == BallotVote.ballot_id)
+        .filter(Ballot.voting_id == voting_id)
+        .all()
+    )
+    return {(ballot_id, item_id): vote for ballot_id, item_id, vote in rows}
+
+
+def count_matched_rows(data_rows: list, unit_col: int, unit_map: dict) -> int:
+    """Number of rows whose unit column matches an existing unit."""
+    matched = 0
+    for row in data_rows:
+        if len(row) > unit_col and parse_unit_number(row[unit_col]) in unit_map:
+            matched += 1
+    return matched
+
+
+def build_vote_matrix(
+    data_rows: list,
+    owner_col: int,
+    unit_col: int,
+    item_ids: list,
+    unit_map: dict,
+    ballot_map: dict,
+) -> tuple:
+    """Compute the votes the import wants to store.
+
+    Vote columns are all columns except the owner and unit columns, in order
+    of the voting items. Later rows for the same unit win.
+    Returns (votes, ballot_ids, imported): votes maps
+    (ballot_id, voting_item_id) -> vote, ballot_ids are all ballots matched
+    by a row and imported counts matched ballots per row.
+    """
+    max_cols = max((len(r) for r in data_rows if r), default=0)
+    vote_cols = [c for c in range(max_cols) if c != owner_col and c != unit_col]
+    item_cols = list(zip(item_ids, vote_cols))
+
+    votes: dict = {}
+    ballot_ids: set = set()
+    imported = 0
+    for row in data_rows:
+        if not row or len(row) <= unit_col:
+            continue
+        unit_id = unit_map.get(parse_unit_number(row[unit_col]))
+        ballots = ballot_map.get(unit_id)
+        if not ballots:
+            continue
+
+        row_votes = {}
+        for item_id, col_idx in item_cols:
+            if col_idx < len(row) and row[col_idx] is not None:
+                vote_val = VOTE_MAPPING.get(str(row[col_idx]).strip().lower(), "")
+                if vote_val:
+                    row_votes[item_id] = vote_val
+
+        for ballot_id in ballots:
+            for item_id, vote_val in row_votes.items():
+                votes[(ballot_id, item_id)] = vote_val
+            ballot_ids.add(ballot_id)
+            imported += 1
+    return votes, ballot_ids, imported
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def apply_vote_matrix(
+    db: Session,
+    voting_id: int,
+    votes: dict,
+    ballot_ids: set,
+    existing: dict,
+    replace_all: bool = False,
+) -> int:
+    """Write the vote matrix and mark matched ballots as processed.
+
+    With ``replace_all`` every existing vote of the voting is deleted first
+    (mode "přepsat"). Only votes that differ from ``existing`` are upserted.
+    Runs in the caller's transaction. Returns the number of votes written.
+    """
+    if replace_all:
+        voting_ballots = db.query(Ballot.id).filter(Ballot.voting_id == voting_id)
+        db.query(BallotVote).filter(BallotVote.ballot_id.in_(voting_ballots.scalar_subquery())).delete(
+            synchronize_session=False
+        )
+        existing = {}
+
+    changed = [
+        {"ballot_id": ballot_id, "voting_item_id": item_id, "vote": vote}
+        for (ballot_id, item_id), vote in votes.items()
+        if existing.get((ballot_id, item_id)) != vote
+    ]
+    for chunk in _chunks(changed, BATCH_SIZE):
+        stmt = sqlite_insert(BallotVote).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["ballot_id", "voting_item_id"],
+            set_={"vote": stmt.excluded.vote},
+        )
+        db.execute(stmt)
+
+    for chunk in _chunks(sorted(ballot_ids), BATCH_SIZE):
+        db.query(Ballot).filter(Ballot.id.in_(chunk)).update(
+            {"status": "zpracován"}, synchronize_session=False
+        )
+    return len(changed)
@@ -0,0 +1,267 @@
+"""Voting results: per-item tallies weighted by owners' votes (podíl SČD).
+
+A ballot weighs as much as the sum of ``OwnerUnit.votes`` of its owner's
+active units. Per-item results are kept precomputed in ``VotingTally``
+(count and weight per item and vote): ballot processing replaces votes via
+``record_ballot_votes``, which updates the tallies by the difference in the
+same transaction. ``rebuild_tallies`` recomputes them from ``ballot_votes``
+with one ``GROUP BY voting_item_id, vote`` query, for bulk imports and
+consistency checks (e.g. after owners' votes changed).
+
+Quorum is counted per unit, as co-owners (SJM) each carry the unit's full
+votes on their ownership: the voting is quorate when the shares of units
+with a processed ballot from a current owner reach ``Voting.quorum`` percent
+of all shares in the SVJ — ``SvjInfo.total_shares`` when set, else the sum
+of the units' podíl SČD. An item is accepted when the voting is quorate and
+PRO holds more than half of the weight cast on it.
+"""
+from sqlalchemy import case, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.administration import SvjInfo
+from app.models.owner import OwnerUnit, Unit
+from app.models.voting import Ballot, BallotVote, Voting, VotingItem, VotingTally
+
+VOTE_PRO = "PRO"
+VOTE_PROTI = "PROTI"
+VOTE_ZDRZEL = "Zdržel se"
+
+_VOTE_KEYS = {VOTE_PRO: "pro", VOTE_PROTI: "proti", VOTE_ZDRZEL: "zdrzel"}
+
+
+def owner_weights_subquery():
+    """Subquery (owner_id, weight): sum of votes over each owner's active units."""
+    return (
+        select(OwnerUnit.owner_id, func.sum(OwnerUnit.votes).label("weight"))
+        .where(OwnerUnit.valid_to.is_(None))
+        .group_by(OwnerUnit.owner_id)
+        .subquery("owner_weights")
+    )
+
+
+def unit_shares_subquery():
+    """Subquery (unit_id, share): the unit's podíl SČD, or for a unit without
+    one the votes recorded on its current ownerships (once, not per co-owner)."""
+    ownership_votes = (
+        select(OwnerUnit.unit_id, func.max(OwnerUnit.votes).label("votes"))
+        .where(OwnerUnit.valid_to.is_(None))
+        .group_by(OwnerUnit.unit_id)
+        .subquery("ownership_votes")
+    )
+    share = case((Unit.podil_scd > 0, Unit.podil_scd), else_=func.coalesce(ownership_votes.c.votes, 0))
+    return (
+        select(Unit.id.label("unit_id"), share.label("share"))
+        .outerjoin(ownership_votes, ownership_votes.c.unit_id == Unit.id)
+        .subquery("unit_shares")
+    )
+
+
+def _pct(part: float, whole: float) -> float:
+    return round(part / whole * 100, 1) if whole > 0 else 0
+
+
+def ballot_weights(db: Session, ballot_ids: list) -> dict:
+    """Map ballot_id -> weight (owner's active votes) for the given ballots."""
+    if not ballot_ids:
+        return {}
+    weights = owner_weights_subquery()
+    rows = (
+        db.query(Ballot.id, func.coalesce(weights.c.weight, 0))
+        .outerjoin(weights, weights.c.owner_id == Ballot.owner_id)
+        .filter(Ballot.id.in_(ballot_ids))
+        .all()
+    )
+    return dict(rows)
+
+
+def _grouped_votes(db: Session, voting_id: int) -> list:
+    """(voting_item_id, vote, count, weight) computed from ballot_votes."""
+    weights = owner_weights_subquery()
+    return (
+        db.query(
+            BallotVote.voting_item_id,
+            BallotVote.vote,
+            func.count(BallotVote.id),
+            func.coalesce(func.sum(func.coalesce(weights.c.weight, 0)), 0),
+        )
+        .join(Ballot, Ballot.id == BallotVote.ballot_id)
+        .outerjoin(weights, weights.c.owner_id == Ballot.owner_id)
+        .filter(Ballot.voting_id == voting_id)
+        .group_by(BallotVote.voting_item_id, BallotVote.vote)
+        .all()
+    )
+
+
+def _has_tallies(db: Session, voting_id: int) -> bool:
+    return db.query(VotingTally.id).filter(VotingTally.voting_id == voting_id).first() is not None
+
+
+def rebuild_tallies(db: Session, voting_id: int) -> list:
+    """Recompute the VotingTally rows of a voting from its ballot votes.
+
+    Runs in the caller's transaction (the caller commits). Returns the
+    (voting_item_id, vote) keys whose stored tally did not match.
+    """
+    fresh = {(item_id, vote): (count, weight) for item_id, vote, count, weight in _grouped_votes(db, voting_id)}
+    stored = {
+        (t.voting_item_id, t.vote): (t.count, t.weight)
+        for t in db.query(VotingTally).filter(VotingTally.voting_id == voting_id).all()
+    }
+    mismatched = sorted(
+        key for key in fresh.keys() | stored.keys()
+        if fresh.get(key, (0, 0)) != stored.get(key, (0, 0))
+    )
+
+    db.query(VotingTally).filter(VotingTally.voting_id == voting_id).delete(synchronize_session=False)
+    if fresh:
+        db.execute(insert(VotingTally), [
+            {"voting_id": voting_id, "voting_item_id": item_id, "vote": vote, "count": count, "weight": weight}
+            for (item_id, vote), (count, weight) in fresh.items()
+        ])
+    return mismatched
+
+
+def record_ballot_votes(db: Session, voting_id: int, votes_by_ballot: dict) -> None:
+    """Replace the votes of ballots and update VotingTally by the difference.
+
+    ``votes_by_ballot`` maps ballot_id -> {voting_item_id: vote}. Runs in the
+    caller's transaction (the caller commits).
+    """
+    ballot_ids = list(votes_by_ballot)
+    if not ballot_ids:
+        return
+    if not _has_tallies(db, voting_id):
+        # First change of this voting: start from the current votes
+        rebuild_tallies(db, voting_id)
+
+    weights = ballot_weights(db, ballot_ids)
+    delta: dict = {}
+
+    def _add(item_id, vote, count, weight):
+        cur = delta.setdefault((item_id, vote), [0, 0])
+        cur[0] += count
+        cur[1] += weight
+
+    old_votes = (
+        db.query(BallotVote.ballot_id, BallotVote.voting_item_id, BallotVote.vote)
+        .filter(BallotVote.ballot_id.in_(ballot_ids))
+        .all()
+    )
+    for ballot_id, item_id, vote in old_votes:
+        _add(item_id, vote, -1, -weights.get(ballot_id, 0))
+    db.query(BallotVote).filter(BallotVote.ballot_id.in_(ballot_ids)).delete(synchronize_session=False)
+
+    new_votes = []
+    for ballot_id, votes in votes_by_ballot.items():
+        for item_id, vote in votes.items():
+            new_votes.append({"ballot_id": ballot_id, "voting_item_id": item_id, "vote": vote})
+            _add(item_id, vote, 1, weights.get(ballot_id, 0))
+    if new_votes:
+        db.execute(insert(BallotVote), new_votes)
+
+    changes = [
+        {"voting_id": voting_id, "voting_item_id": item_id, "vote": vote, "count": count, "weight": weight}
+        for (item_id, vote), (count, weight) in delta.items()
+        if count or weight
+    ]
+    if changes:
+        stmt = sqlite_insert(VotingTally).values(changes)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["voting_item_id", "vote"],
+            set_={
+                "count": VotingTally.count + stmt.excluded["count"],
+                "weight": VotingTally.weight + stmt.excluded["weight"],
+            },
+        )
+        db.execute(stmt)
+
+
+def item_result(item: VotingItem, counts: dict, weights: dict) -> dict:
+    """Build the result row for one item from per-vote counts and weights.
+
+    Percentages are share-weighted when the ballots carry any weight,
+    otherwise (no votes recorded on units) they fall back to ballot counts.
+    """
+    result = {"item": item}
+    for key in _VOTE_KEYS.values():
+        result[key] = counts.get(key, 0)
+        result[f"{key}_weight"] = weights.get(key, 0)
+    result["total"] = result["pro"] + result["proti"] + result["zdrzel"]
+    result["total_weight"] = result["pro_weight"] + result["proti_weight"] + result["zdrzel_weight"]
+    result["weighted"] = result["total_weight"] > 0
+
+    suffix = "_weight" if result["weighted"] else ""
+    whole = result[f"total{suffix}"]
+    for key in _VOTE_KEYS.values():
+        result[f"{key}_pct"] = _pct(result[f"{key}{suffix}"], whole)
+    result["passed"] = whole > 0 and result[f"pro{suffix}"] * 2 > whole
+    return result
+
+
+def compute_voting_results(db: Session, voting: Voting, items: list) -> dict:
+    """Results of all items of a voting, read from VotingTally.
+
+    Returns a dict with ``items`` (one result row per item, see item_result),
+    ballot counts, SVJ/participating weights and quorum evaluation.
+    """
+    # Precomputed tallies; a voting never processed through the app (votes
+    # inserted directly) is tallied on the fly with one grouped query
+    rows = (
+        db.query(VotingTally.voting_item_id, VotingTally.vote, VotingTally.count, VotingTally.weight)
+        .filter(VotingTally.voting_id == voting.id)
+        .all()
+    )
+    if not rows:
+        rows = _grouped_votes(db, voting.id)
+    counts: dict = {}
+    sums: dict = {}
+    for item_id, vote, count, weight_sum in rows:
+        key = _VOTE_KEYS.get(vote)
+        if key is None:
+            continue
+        counts.setdefault(item_id, {})[key] = count
+        sums.setdefault(item_id, {})[key] = weight_sum or 0
+
+    processed = Ballot.status == "zpracován"
+    ballot_count, processed_count = (
+        db.query(func.count(Ballot.id), func.coalesce(func.sum(case((processed, 1), else_=0)), 0))
+        .filter(Ballot.voting_id == voting.id)
+        .one()
+    )
+
+    # Shares of the units represented by a processed ballot, each unit once
+    shares = unit_shares_subquery()
+    voted_units = (
+        select(OwnerUnit.unit_id)
+        .join(Ballot, Ballot.owner_id == OwnerUnit.owner_id)
+        .where(OwnerUnit.valid_to.is_(None), Ballot.voting_id == voting.id, processed)
+    )
+    processed_weight = (
+        db.query(func.coalesce(func.sum(shares.c.share), 0))
+        .filter(shares.c.unit_id.in_(voted_units))
+        .scalar()
+    )
+    info = db.query(SvjInfo).first()
+    total_weight = (info.total_shares if info else 0) or (
+        db.query(func.coalesce(func.sum(shares.c.share), 0)).scalar()
+    )
+
+    participation_pct = _pct(processed_weight, total_weight)
+    quorum_reached = total_weight > 0 and processed_weight * 100 >= (voting.quorum or 0) * total_weight
+
+    results = []
+    for item in items:
+        result = item_result(item, counts.get(item.id, {}), sums.get(item.id, {}))
+        result["accepted"] = quorum_reached and result["passed"]
+        results.append(result)
+
+    return {
+        "items": results,
+        "ballot_count": ballot_count,
+        "processed_count": processed_count,
+        "total_weight": total_weight,
+        "processed_weight": processed_weight,
+        "participation_pct": participation_pct,
+        "quorum_reached": quorum_reached,
+    }
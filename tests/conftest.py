@@ -12,6 +12,9 @@ os.environ["DATABASE_PATH"] = ":memory:"
 os.environ["SECRET_KEY"] = "test-secret-key"
 os.environ["UPLOAD_DIR"] = tempfile.mkdtemp()
 os.environ["GENERATED_DIR"] = tempfile.mkdtemp()
+os.environ["JOB_WORKERS"] = "0"  # run background jobs inline
+os.environ["BACKUP_SCHEDULER_INTERVAL"] = "0"  # no auto-backup thread in tests
+os.environ["AUDIT_FLUSH_INTERVAL"] = "0"  # write background audit entries inline
 
 
 @pytest.fixture
@@ -47,7 +50,7 @@ def client(db_engine):
     from fastapi.testclient import TestClient
     from sqlalchemy.orm import Session as SASession
 
-    from app.database import get_db
+    from app.database import get_db, get_read_db
     from app.main import app
 
     def override_get_db():
@@ -58,6 +61,7 @@ def client(db_engine):
             session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -230,3 +230,42 @@ def test_bulk_edits_apply(auth_client, db_engine):
     for u in updated:
         assert u.space_type == "Apartmán"
     session.close()
+
+
+def test_delete_data_takes_safety_backup(auth_client, db_engine, tmp_path, monkeypatch):
+    """Mass delete first writes a consistent pre_delete backup and aborts without one."""
+    from sqlalchemy.orm import Session as SASession
+    from app.config import settings
+    from app.models.owner import Owner
+    from app.services import backup_service
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    session = SASession(bind=db_engine)
+    session.add(Owner(first_name="Safe", last_name="Keep", owner_type="physical"))
+    session.commit()
+    session.close()
+
+    def failing_backup(bind, name, progress=None):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(backup_service, "create_backup", failing_backup)
+        resp = auth_client.post(
+            "/sprava/smazat-data",
+            data={"categories": "owners", "confirmation": "DELETE"},
+            follow_redirects=True,
+        )
+    assert "data nebyla smazána" in resp.text
+    session = SASession(bind=db_engine)
+    assert session.query(Owner).count() == 1
+    session.close()
+
+    auth_client.post(
+        "/sprava/smazat-data",
+        data={"categories": "owners", "confirmation": "DELETE"},
+        follow_redirects=False,
+    )
+    assert [name for name in backup_service.list_manifests() if name.startswith("pre_delete_")]
+    session = SASession(bind=db_engine)
+    assert session.query(Owner).count() == 0
+    session.close()
@@ -66,6 +66,130 @@ def test_audit_page_filter_by_action(auth_client, db_engine):
     assert "Owner" in resp.text
 
 
+def test_audit_page_keyset_scroll(auth_client, db_session, monkeypatch):
+    """The audit page shows the newest entries first and scrolls by cursor."""
+    from datetime import datetime
+    from app.models.common import AuditLog
+    from app.services import pagination
+
+    monkeypatch.setattr(pagination, "PAGE_SIZE", 2)
+    for day in range(1, 6):
+        db_session.add(AuditLog(action="update", model_name="Unit", record_id=day,
+                                field_name=f"pole{day}", timestamp=datetime(2026, 1, day)))
+    db_session.commit()
+
+    resp = auth_client.get("/sprava/audit?model=Unit")
+    assert "pole5" in resp.text and "pole4" in resp.text and "pole3" not in resp.text
+    cursor = db_session.query(AuditLog.id).filter(AuditLog.field_name == "pole4").scalar()
+    assert f"/sprava/audit/stranka?model=Unit&amp;cursor={cursor}" in resp.text
+
+    resp = auth_client.get(f"/sprava/audit/stranka?model=Unit&cursor={cursor}")
+    assert "pole3" in resp.text and "pole2" in resp.text and "pole5" not in resp.text
+
+
+def test_audit_facets_follow_data_version(db_session):
+    """Cached audit filter lists refresh after new entries are written."""
+    from app.models.common import AuditLog
+    from app.services.facets import audit_facets
+
+    db_session.add(AuditLog(action="create", model_name="Owner"))
+    db_session.commit()
+    assert audit_facets(db_session) == {"actions": ["create"], "models": ["Owner"]}
+    db_session.add(AuditLog(action="delete", model_name="Unit"))
+    db_session.commit()
+    assert audit_facets(db_session) == {"actions": ["create", "delete"], "models": ["Owner", "Unit"]}
+
+
+def test_audit_archive_moves_old_months(db_session, tmp_path, monkeypatch):
+    """Old entries move into monthly gzip archives, searchable and re-runnable."""
+    from datetime import datetime
+    from app.config import settings
+    from app.models.common import AuditLog
+    from app.services import audit_archive
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    db_session.add_all([
+        AuditLog(action="update", model_name="Owner", field_name="email", new_value="jan@x.cz",
+                 timestamp=datetime(2025, 1, 5)),
+        AuditLog(action="delete", model_name="Unit", timestamp=datetime(2025, 1, 20)),
+        AuditLog(action="update", model_name="Owner", timestamp=datetime(2025, 2, 3)),
+        AuditLog(action="create", model_name="Owner", timestamp=datetime(2026, 2, 1)),
+    ])
+    db_session.commit()
+
+    result = audit_archive.archive_old_entries(db_session, 12, now=datetime(2026, 3, 15))
+    assert result == {"archived": 3, "months": ["2025-01", "2025-02"]}
+    assert db_session.query(AuditLog).count() == 1
+    assert audit_archive.list_archives() == ["2025-02", "2025-01"]
+
+    hits = audit_archive.search_archive("2025-01", q="JAN@")
+    assert [h["field_name"] for h in hits] == ["email"]
+    assert [h["action"] for h in audit_archive.search_archive("2025-01")] == ["delete", "update"]
+
+    # Rows re-appearing in an archived month are merged without duplicates
+    db_session.add(AuditLog(action="create", model_name="Unit", timestamp=datetime(2025, 2, 10)))
+    db_session.commit()
+    result = audit_archive.archive_old_entries(db_session, 12, now=datetime(2026, 3, 15))
+    assert result["archived"] == 1
+    assert len(list(audit_archive.read_archive("2025-02"))) == 2
+
+
+def test_audit_archive_route_and_view(auth_client, db_session, tmp_path, monkeypatch):
+    """The archive job runs from the audit page and archived months can be viewed."""
+    from datetime import datetime
+    from app.config import settings
+    from app.models.common import AuditLog
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    db_session.add(AuditLog(action="update", model_name="Owner", field_name="telefon",
+                            timestamp=datetime(2020, 6, 1)))
+    db_session.commit()
+
+    resp = auth_client.post("/sprava/audit/archivovat", data={"months": "12"}, follow_redirects=False)
+    assert resp.status_code == 303
+    assert db_session.query(AuditLog).filter(AuditLog.field_name == "telefon").count() == 0
+
+    resp = auth_client.get("/sprava/audit?archiv=2020-06&q=telef")
+    assert resp.status_code == 200
+    assert "telefon" in resp.text
+
+
+def test_log_change_is_written_with_callers_commit(db_session):
+    """Buffered entries land in one insert on commit and vanish on rollback."""
+    from app.models.common import AuditLog
+    from app.services.audit_service import log_change
+
+    log_change(db_session, None, "update", "Owner", 1, "email", "a@x.cz", "b@x.cz")
+    log_change(db_session, None, "update", "Owner", 1, "phone", "1", "2")
+    assert db_session.query(AuditLog).count() == 0  # nothing written yet
+    db_session.commit()
+    assert [r.field_name for r in db_session.query(AuditLog).order_by(AuditLog.id)] == ["email", "phone"]
+
+    log_change(db_session, None, "delete", "Owner", 1)
+    db_session.rollback()
+    db_session.commit()
+    assert db_session.query(AuditLog).count() == 2
+
+
+def test_background_audit_writer_batches_after_commit(db_session):
+    """Deferred entries are written by the background writer once committed."""
+    from app.models.common import AuditLog
+    from app.services.audit_service import AuditWriter, log_change
+    import app.services.audit_service as audit_service
+
+    writer = AuditWriter(interval=0.05)
+    original = audit_service._writer
+    audit_service._writer = writer
+    try:
+        for i in range(50):
+            log_change(db_session, None, "exchange", "OwnerUnit", i, background=True)
+        db_session.commit()
+        writer.flush()
+    finally:
+        audit_service._writer = original
+    assert db_session.query(AuditLog).filter(AuditLog.action == "exchange").count() == 50
+
+
 # --- Backup ---
 
 
@@ -132,6 +256,67 @@ def test_backup_delete(auth_client):
             assert resp.status_code == 303
 
 
+def test_backup_download_incremental_as_zip(auth_client, db_session):
+    """A manifest backup downloads as a restorable ZIP (svj.db + uploads/)."""
+    import io
+    import sqlite3
+    import tempfile
+
+    from app.config import settings
+    from app.models.owner import Owner
+
+    db_session.add(Owner(first_name="Jan", last_name="Zálohovaný", name_with_titles="Zálohovaný Jan",
+                         name_normalized="zalohovany jan", owner_type="physical"))
+    db_session.commit()
+    os.makedirs(os.path.join(settings.UPLOAD_DIR, "docs"), exist_ok=True)
+    with open(os.path.join(settings.UPLOAD_DIR, "docs", "a.txt"), "wb") as f:
+        f.write(b"hello")
+
+    auth_client.post("/sprava/zaloha/vytvorit", data={"name": "zip-test"}, follow_redirects=False)
+    backup_dir = os.path.join(os.path.dirname(settings.UPLOAD_DIR), "backups")
+    name = sorted(f for f in os.listdir(backup_dir) if f.startswith("zip-test") and f.endswith(".json"))[-1]
+
+    resp = auth_client.get(f"/sprava/zaloha/{name}/stahnout")
+    assert resp.status_code == 200
+    assert name.replace(".json", ".zip") in resp.headers["content-disposition"]
+    with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
+        assert zf.read("uploads/docs/a.txt") == b"hello"
+        with tempfile.TemporaryDirectory() as tmp:
+            zf.extract("svj.db", tmp)
+            conn = sqlite3.connect(os.path.join(tmp, "svj.db"))
+            assert conn.execute("SELECT last_name FROM owners").fetchall() == [("Zálohovaný",)]
+            conn.close()
+
+
+def test_incremental_backup_stores_only_changes(db_engine, tmp_path, monkeypatch):
+    """A second backup reuses unchanged objects; deleting sweeps orphans."""
+    from app.config import settings
+    from app.services import backup_service
+
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    (upload_dir / "a.bin").write_bytes(os.urandom(50_000))
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(upload_dir))
+    monkeypatch.setattr(backup_service, "_GC_GRACE_SECONDS", 0)
+
+    first = backup_service.create_backup(db_engine, "first.json")
+    assert first["new_bytes"] > 50_000
+    assert [f["path"] for f in first["files"]] == ["a.bin"]
+
+    (upload_dir / "b.bin").write_bytes(os.urandom(1000))
+    second = backup_service.create_backup(db_engine, "second.json")
+    assert second["files"][0]["sha256"] == first["files"][0]["sha256"]
+    assert second["database"]["chunks"] == first["database"]["chunks"]
+    assert second["new_bytes"] < 2000
+    assert backup_service.list_manifests() == ["second.json", "first.json"]
+
+    # Everything first.json uses is still referenced by second.json
+    assert backup_service.delete_backup("first.json") == 0
+    (upload_dir / "a.bin").unlink()
+    backup_service.create_backup(db_engine, "third.json")
+    assert backup_service.delete_backup("second.json") == 1  # only a.bin was orphaned
+
+
 def test_safe_backup_path_rejects_traversal():
     """_safe_backup_path should reject path traversal attempts."""
     from app.routers.admin import _safe_backup_path
@@ -142,11 +327,13 @@ def test_safe_backup_path_rejects_traversal():
     assert _safe_backup_path("foo/../bar.zip") is None
     assert _safe_backup_path("/etc/passwd.zip") is None
     assert _safe_backup_path("valid_name.txt") is None  # not .zip
+    assert _safe_backup_path("../manifest.json") is None
 
     # Valid filenames should return a path
     result = _safe_backup_path("backup_20240101.zip")
     assert result is not None
     assert result.endswith("backup_20240101.zip")
+    assert _safe_backup_path("backup_20240101_120000.json").endswith(".json")
 
 
 def test_backup_restore_requires_admin(editor_client):
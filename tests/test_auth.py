@@ -121,3 +121,88 @@ def test_dashboard_loads_when_authenticated(auth_client):
     resp = auth_client.get("/")
     assert resp.status_code == 200
     assert "Dashboard" in resp.text
+
+
+def _user_queries(engine):
+    from sqlalchemy import event
+
+    statements = []
+
+    def _before(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    return statements
+
+
+def test_cached_principal_skips_users_query(auth_client, db_engine):
+    """Requests with a current session stamp do not query the users table."""
+    statements = _user_queries(db_engine)
+    for _ in range(3):
+        resp = auth_client.get("/notifikace/neprecetene")
+        assert resp.status_code == 200
+    assert statements == []
+
+
+def test_role_change_invalidates_cached_principal(auth_client, db_engine):
+    """user_change_role / user_toggle_active reach the target's live session."""
+    import bcrypt
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import Session as SASession
+
+    from app.main import app
+    from app.models.user import User
+
+    session = SASession(bind=db_engine)
+    pw = bcrypt.hashpw(b"heslo123", bcrypt.gensalt()).decode()
+    editor = User(username="petr", password_hash=pw, role="editor", display_name="Petr", is_active=True)
+    session.add(editor)
+    session.commit()
+    editor_id = editor.id
+    session.close()
+
+    with TestClient(app) as other:
+        other.post("/login", data={"username": "petr", "password": "heslo123"})
+        assert other.get("/sprava/uzivatele", follow_redirects=False).status_code == 403
+
+        auth_client.post(f"/sprava/uzivatele/{editor_id}/role", data={"role": "admin"})
+        assert other.get("/sprava/uzivatele", follow_redirects=False).status_code == 200
+
+        auth_client.post(f"/sprava/uzivatele/{editor_id}/stav")
+        resp = other.get("/", follow_redirects=False)
+        assert resp.status_code == 303
+        assert "/login" in resp.headers["location"]
+
+
+def test_revoked_stamp_reaches_other_workers(client, db_engine, monkeypatch):
+    """A stamp rotated by another process (no local invalidation) ends the session."""
+    import secrets
+
+    import bcrypt
+    from sqlalchemy.orm import Session as SASession
+
+    from app.auth import clear_user_cache
+    from app.config import settings
+    from app.models.user import User
+
+    monkeypatch.setattr(settings, "USER_CACHE_TTL", 0)
+    session = SASession(bind=db_engine)
+    admin = User(username="jana", role="admin", display_name="Jana", is_active=True,
+                 password_hash=bcrypt.hashpw(b"heslo123", bcrypt.gensalt()).decode())
+    session.add(admin)
+    session.commit()
+    first_stamp = admin.auth_stamp
+    assert len(first_stamp) == 32
+
+    client.post("/login", data={"username": "jana", "password": "heslo123"})
+    assert client.get("/sprava/uzivatele", follow_redirects=False).status_code == 200
+
+    # what user_change_role does in a sibling worker: new role, new stamp, one commit
+    admin.role = "reader"
+    admin.auth_stamp = secrets.token_hex(16)
+    session.commit()
+    clear_user_cache()  # a restart starts with no cached stamps either
+    assert client.get("/sprava/uzivatele", follow_redirects=False).status_code == 403
+    assert admin.auth_stamp != first_stamp
+    session.close()
@@ -2,6 +2,7 @@
 
 Covers: auto backup config page, enable/disable, frequency, cleanup.
 """
+import os
 
 
 def test_auto_backup_config_page(auth_client):
@@ -85,3 +86,188 @@ def test_auto_backup_cleanup(auth_client, db_engine):
     # Cleanup happens on save — auto_ prefixed backups should be trimmed
     auto_backups = [f for f in os.listdir(backup_dir) if f.startswith("auto_")]
     assert len(auto_backups) <= 3
+
+
+def test_compute_next_run():
+    """Next slot is the configured time after now; weekly keeps 7 days apart."""
+    from datetime import datetime
+    from app.services.backup_scheduler import compute_next_run
+
+    now = datetime(2026, 3, 10, 12, 0)
+    assert compute_next_run("daily", "14:30", now) == datetime(2026, 3, 10, 14, 30)
+    assert compute_next_run("daily", "02:00", now) == datetime(2026, 3, 11, 2, 0)
+    assert compute_next_run("weekly", "02:00", now, last_run=datetime(2026, 3, 9, 2, 0)) == datetime(2026, 3, 16, 2, 0)
+    assert compute_next_run("daily", "bad", now) == datetime(2026, 3, 11, 2, 0)
+
+
+def test_scheduler_lease_has_single_holder(db_session):
+    """Only one process holds the lease until it expires."""
+    from datetime import datetime, timedelta
+    from app.services.backup_scheduler import LEASE_SECONDS, acquire_lease
+
+    now = datetime(2026, 3, 10, 12, 0)
+    assert acquire_lease(db_session, "worker-a", now)
+    assert not acquire_lease(db_session, "worker-b", now)
+    assert acquire_lease(db_session, "worker-a", now + timedelta(seconds=10))
+    later = now + timedelta(seconds=LEASE_SECONDS + 60)
+    assert acquire_lease(db_session, "worker-b", later)
+    assert not acquire_lease(db_session, "worker-a", later)
+
+
+def test_scheduler_runs_due_backup_once(db_session, tmp_path, monkeypatch):
+    """A due slot produces one backup, advances next_run and applies retention."""
+    from datetime import datetime
+    from app.config import settings
+    from app.models.administration import AutoBackupConfig
+    from app.services import backup_service
+    from app.services.backup_scheduler import run_due_backup
+
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(upload_dir))
+    backup_dir = tmp_path / "backups"
+    backup_dir.mkdir()
+    for day in (1, 2):
+        (backup_dir / f"auto_2026030{day}_020000.zip").write_bytes(b"old")
+
+    now = datetime(2026, 3, 10, 2, 0, 30)
+    db_session.add(AutoBackupConfig(frequency="daily", time="02:00", max_backups=2, is_enabled=True,
+                                    next_run=datetime(2026, 3, 10, 2, 0)))
+    db_session.commit()
+
+    assert run_due_backup(db_session, "worker-a", now) == "auto_20260310_020030.json"
+    assert run_due_backup(db_session, "worker-a", now) is None  # slot already taken
+
+    config = db_session.query(AutoBackupConfig).one()
+    assert config.last_run == now
+    assert config.next_run == datetime(2026, 3, 11, 2, 0)
+    assert sorted(os.listdir(backup_dir)) == ["auto_20260302_020000.zip", "auto_20260310_020030.json", "store"]
+    assert backup_service.list_manifests() == ["auto_20260310_020030.json"]
+
+
+def test_scheduler_skips_without_lease(db_session):
+    """A process without the lease never runs the backup."""
+    from datetime import datetime
+    from app.models.administration import AutoBackupConfig
+    from app.services.backup_scheduler import acquire_lease, run_due_backup
+
+    now = datetime(2026, 3, 10, 2, 0, 30)
+    db_session.add(AutoBackupConfig(frequency="daily", time="02:00", max_backups=2, is_enabled=True,
+                                    next_run=datetime(2026, 3, 10, 2, 0)))
+    db_session.commit()
+    assert acquire_lease(db_session, "worker-a", now)
+    assert run_due_backup(db_session, "worker-b", now) is None
+    assert db_session.query(AutoBackupConfig).one().last_run is None
+
+
+def test_scheduler_failed_backup_stays_due(db_session, monkeypatch):
+    """A failed backup records nothing; the next tick retries the same slot."""
+    from datetime import datetime
+
+    import pytest
+
+    from app.models.administration import AutoBackupConfig
+    from app.services import backup_service
+    from app.services.backup_scheduler import run_due_backup
+
+    due = datetime(2026, 3, 10, 2, 0)
+    db_session.add(AutoBackupConfig(frequency="daily", time="02:00", max_backups=2, is_enabled=True, next_run=due))
+    db_session.commit()
+
+    def _disk_full(bind, name, progress=None):
+        raise OSError("disk plný")
+
+    monkeypatch.setattr(backup_service, "create_backup", _disk_full)
+    with pytest.raises(OSError):
+        run_due_backup(db_session, "worker-a", datetime(2026, 3, 10, 2, 0, 30))
+    config = db_session.query(AutoBackupConfig).one()
+    assert (config.last_run, config.next_run) == (None, due)
+
+    created = []
+    monkeypatch.setattr(backup_service, "create_backup", lambda bind, name, progress=None: created.append(name))
+    monkeypatch.setattr(backup_service, "prune_backups", lambda prefix, keep: None)
+    retry = datetime(2026, 3, 10, 2, 1, 30)
+    assert run_due_backup(db_session, "worker-a", retry) == "auto_20260310_020130.json"
+    db_session.refresh(config)
+    assert (config.last_run, config.next_run) == (retry, datetime(2026, 3, 11, 2, 0))
+
+
+def test_scheduler_backup_stops_when_lease_lost(db_session, monkeypatch):
+    """A backup whose lease moved to another worker is aborted and not recorded."""
+    from datetime import datetime
+
+    import pytest
+
+    from app.models.administration import AutoBackupConfig
+    from app.models.common import SchedulerLease
+    from app.services import backup_service
+    from app.services.backup_scheduler import LeaseLost, run_due_backup
+
+    due = datetime(2026, 3, 10, 2, 0)
+    db_session.add(AutoBackupConfig(frequency="daily", time="02:00", max_backups=2, is_enabled=True, next_run=due))
+    db_session.commit()
+    pruned = []
+
+    def _slow_backup(bind, name, progress=None):
+        # the lease expired meanwhile and worker-b holds it now
+        db_session.query(SchedulerLease).update({"owner": "worker-b", "expires_at": datetime(2100, 1, 1)})
+        db_session.commit()
+        progress(1, 2)
+
+    monkeypatch.setattr(backup_service, "create_backup", _slow_backup)
+    monkeypatch.setattr(backup_service, "prune_backups", lambda prefix, keep: pruned.append(prefix))
+    with pytest.raises(LeaseLost):
+        run_due_backup(db_session, "worker-a", datetime(2026, 3, 10, 2, 0, 30))
+    config = db_session.query(AutoBackupConfig).one()
+    assert (config.last_run, config.next_run) == (None, due)
+    assert pruned == []
+
+
+def test_scheduler_waits_for_restore(db_session, monkeypatch):
+    """No backup starts while a restore holds the maintenance lease; the slot stays due."""
+    from datetime import datetime
+    from app.models.administration import AutoBackupConfig
+    from app.models.common import SchedulerLease
+    from app.services import backup_service
+    from app.services.backup_scheduler import MAINTENANCE_LEASE, acquire_lease, run_due_backup
+
+    now = datetime(2026, 3, 10, 2, 0, 30)
+    due = datetime(2026, 3, 10, 2, 0)
+    db_session.add(AutoBackupConfig(frequency="daily", time="02:00", max_backups=2, is_enabled=True, next_run=due))
+    db_session.commit()
+    assert acquire_lease(db_session, "restore:1", now, name=MAINTENANCE_LEASE)
+    created = []
+    monkeypatch.setattr(backup_service, "create_backup", lambda bind, name, progress=None: created.append(name))
+    monkeypatch.setattr(backup_service, "prune_backups", lambda prefix, keep: None)
+
+    assert run_due_backup(db_session, "worker-a", now) is None
+    assert created == []
+    assert db_session.query(AutoBackupConfig).one().next_run == due
+
+    db_session.query(SchedulerLease).filter(SchedulerLease.name == MAINTENANCE_LEASE).delete()
+    db_session.commit()
+    assert run_due_backup(db_session, "worker-a", now) == "auto_20260310_020030.json"
+    # released after the run
+    assert db_session.query(SchedulerLease).filter(SchedulerLease.name == MAINTENANCE_LEASE).count() == 0
+
+
+def test_auto_backup_save_sets_next_run(auth_client, db_session):
+    """Saving an enabled config schedules the next run; disabling clears it."""
+    from app.models.administration import AutoBackupConfig
+
+    auth_client.post(
+        "/sprava/auto-zalohy",
+        data={"frequency": "daily", "time": "02:00", "max_backups": "7", "is_enabled": "on"},
+        follow_redirects=False,
+    )
+    config = db_session.query(AutoBackupConfig).one()
+    assert config.next_run is not None
+    assert (config.next_run.hour, config.next_run.minute) == (2, 0)
+
+    auth_client.post(
+        "/sprava/auto-zalohy",
+        data={"frequency": "daily", "time": "02:00", "max_backups": "7"},
+        follow_redirects=False,
+    )
+    db_session.expire_all()
+    assert db_session.query(AutoBackupConfig).one().next_run is None
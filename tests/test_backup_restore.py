@@ -77,3 +77,138 @@ def test_restore_from_db_file_rejects_non_db(auth_client):
     assert resp.status_code == 200
     # Flash message says "Neplatný soubor — není SQLite databáze."
     assert "neplatn" in resp.text.lower() or "sqlite" in resp.text.lower() or "error" in resp.text.lower()
+
+
+def _write_db(path, name):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE test_table (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("INSERT INTO test_table VALUES (1, ?)", (name,))
+    conn.commit()
+    conn.close()
+
+
+def test_stage_database_rejects_oversized_and_corrupt(tmp_path):
+    """Staging enforces the size limit and the integrity check, leaving no temp files."""
+    import pytest
+    from app.services.backup_service import stage_database
+
+    live = tmp_path / "svj.db"
+    good = tmp_path / "upload.db"
+    _write_db(str(good), "new")
+
+    with pytest.raises(ValueError, match="příliš velký"):
+        stage_database(io.BytesIO(good.read_bytes()), str(live), max_size=100)
+
+    corrupt = bytearray(good.read_bytes())
+    corrupt[100:] = b"\xff" * (len(corrupt) - 100)
+    with pytest.raises(ValueError):
+        stage_database(io.BytesIO(bytes(corrupt)), str(live))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["upload.db"]
+
+
+def test_restore_db_file_swaps_live_database(auth_client, tmp_path, monkeypatch):
+    """A verified upload replaces the live file and the engine sees it at once."""
+    from sqlalchemy import create_engine, text
+    from app.config import settings
+    from app.routers import admin
+
+    live = tmp_path / "svj.db"
+    _write_db(str(live), "old")
+    live_engine = create_engine(f"sqlite:///{live}")
+    with live_engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM test_table")).scalar() == "old"
+
+    upload = tmp_path / "upload.db"
+    _write_db(str(upload), "restored")
+    monkeypatch.setattr(settings, "DATABASE_PATH", str(live))
+    monkeypatch.setattr(admin, "engine", live_engine)
+    monkeypatch.setattr(admin, "read_engine", live_engine)
+
+    with open(upload, "rb") as f:
+        resp = auth_client.post(
+            "/sprava/zaloha/obnovit-soubor",
+            files={"file": ("svj.db", f, "application/octet-stream")},
+            follow_redirects=True,
+        )
+    assert "Obnova z .db souboru dokončena" in resp.text
+    with live_engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM test_table")).scalar() == "restored"
+        # A database from an old backup is upgraded to the current schema
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master"))}
+        assert {"data_versions", "jobs", "owners", "search_owners"} <= tables
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(sync_records)"))}
+        assert "csv_values" in columns
+    assert not any(p.name.endswith(".restore") for p in tmp_path.iterdir())
+    live_engine.dispose()
+
+
+def test_restore_refused_while_jobs_run(auth_client, db_engine, tmp_path, monkeypatch):
+    """A queued/running job would keep writing to the replaced file: restore waits."""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session as SASession
+    from app.config import settings
+    from app.models.common import Job
+    from app.routers import admin
+    from app.services.job_queue import JOB_RUNNING
+
+    live = tmp_path / "svj.db"
+    _write_db(str(live), "old")
+    live_engine = create_engine(f"sqlite:///{live}")
+    upload = tmp_path / "upload.db"
+    _write_db(str(upload), "restored")
+    monkeypatch.setattr(settings, "DATABASE_PATH", str(live))
+    monkeypatch.setattr(admin, "engine", live_engine)
+    monkeypatch.setattr(admin, "read_engine", live_engine)
+    session = SASession(bind=db_engine)
+    session.add(Job(kind="ballots", title="Generování", status=JOB_RUNNING))
+    session.commit()
+    session.close()
+
+    with open(upload, "rb") as f:
+        resp = auth_client.post(
+            "/sprava/zaloha/obnovit-soubor",
+            files={"file": ("svj.db", f, "application/octet-stream")},
+            follow_redirects=True,
+        )
+    assert "běží úlohy" in resp.text
+    with live_engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM test_table")).scalar() == "old"
+    assert not any(p.name.endswith(".restore") for p in tmp_path.iterdir())
+    live_engine.dispose()
+
+
+def test_restore_refused_during_automatic_backup(auth_client, db_engine, tmp_path, monkeypatch):
+    """The scheduler's backup holds the maintenance lease: restore must not swap the file."""
+    from datetime import datetime
+
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session as SASession
+    from app.config import settings
+    from app.routers import admin
+    from app.services.backup_scheduler import MAINTENANCE_LEASE, acquire_lease
+
+    live = tmp_path / "svj.db"
+    _write_db(str(live), "old")
+    live_engine = create_engine(f"sqlite:///{live}")
+    upload = tmp_path / "upload.db"
+    _write_db(str(upload), "restored")
+    monkeypatch.setattr(settings, "DATABASE_PATH", str(live))
+    monkeypatch.setattr(admin, "engine", live_engine)
+    monkeypatch.setattr(admin, "read_engine", live_engine)
+    session = SASession(bind=db_engine)
+    assert acquire_lease(session, "worker-a", datetime.now(), name=MAINTENANCE_LEASE)
+    session.close()
+
+    with open(upload, "rb") as f:
+        resp = auth_client.post(
+            "/sprava/zaloha/obnovit-soubor",
+            files={"file": ("svj.db", f, "application/octet-stream")},
+            follow_redirects=True,
+        )
+    assert "probíhá automatická záloha" in resp.text
+    with live_engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM test_table")).scalar() == "old"
+    assert not any(p.name.endswith(".restore") for p in tmp_path.iterdir())
+    live_engine.dispose()
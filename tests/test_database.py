@@ -129,3 +129,112 @@ def test_create_voting(db_session):
     result = db_session.query(Voting).first()
     assert result.name == "Test hlasování"
     assert result.status == "koncept"
+
+
+def test_sqlite_pragmas_applied(tmp_path):
+    """Connect hook should switch file DBs to WAL with the tuning profile."""
+    import sqlite3
+
+    from app.database import apply_sqlite_pragmas
+
+    conn = sqlite3.connect(str(tmp_path / "test.db"))
+    apply_sqlite_pragmas(conn)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    conn.close()
+
+
+def test_sqlite_read_only_connection(tmp_path):
+    """Read-only profile should reject writes."""
+    import sqlite3
+
+    import pytest
+
+    from app.database import apply_sqlite_pragmas
+
+    db_file = tmp_path / "test.db"
+    writer = sqlite3.connect(str(db_file))
+    apply_sqlite_pragmas(writer)
+    writer.execute("CREATE TABLE t (x INTEGER)")
+    writer.commit()
+
+    reader = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    apply_sqlite_pragmas(reader, read_only=True)
+    assert reader.execute("SELECT count(*) FROM t").fetchone()[0] == 0
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("INSERT INTO t VALUES (1)")
+    reader.close()
+    writer.close()
+
+
+def test_read_only_engine_serves_list_routes(tmp_path, monkeypatch):
+    """GET routes on get_read_db work over the real mode=ro / query_only engine."""
+    import bcrypt
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session as SASession, sessionmaker
+
+    import app.database as database
+    from app.main import app
+    from app.models.owner import Owner, OwnerUnit, Unit
+    from app.models.user import User
+    from app.services import pagination
+
+    db_file = str(tmp_path / "svj.db")
+    writer = database.create_sqlite_engine(f"sqlite:///{db_file}")
+    database.upgrade_schema(writer)
+    session = SASession(bind=writer)
+    session.add(User(username="admin", role="admin", display_name="Admin", is_active=True,
+                     password_hash=bcrypt.hashpw(b"testpass123", bcrypt.gensalt()).decode()))
+    owners = [
+        Owner(first_name=first, last_name=last, name_with_titles=f"{last} {first}",
+              name_normalized=f"{last} {first}".lower(), owner_type="physical")
+        for first, last in [("Adam", "Antoš"), ("Bára", "Benešová"), ("Cyril", "Cibulka")]
+    ]
+    units = [Unit(unit_number=n, space_type="byt") for n in (901, 902, 903)]
+    session.add_all(owners + units)
+    session.flush()
+    session.add_all(OwnerUnit(owner_id=o.id, unit_id=u.id, votes=100) for o, u in zip(owners, units))
+    session.commit()
+    owner_cursor, unit_cursor = owners[1].id, units[1].id
+    session.close()
+
+    reader = database.create_read_engine(db_file)
+    reads = []
+    event.listen(reader, "before_cursor_execute", lambda *args: reads.append(args[2]))
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=reader))
+    monkeypatch.setattr(pagination, "PAGE_SIZE", 2)
+
+    def writer_db():
+        db = SASession(bind=writer)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[database.get_db] = writer_db
+    try:
+        with TestClient(app) as client:
+            client.post("/login", data={"username": "admin", "password": "testpass123"})
+            for url, expected in [
+                ("/", "SVJ"),
+                ("/hledani?q=cibul", "Cibulka"),
+                ("/vlastnici", "Antoš"),
+                (f"/vlastnici/stranka?cursor={owner_cursor}", "Cibulka"),
+                ("/jednotky", "901"),
+                (f"/jednotky/stranka?cursor={unit_cursor}", "903"),
+            ]:
+                reads.clear()
+                resp = client.get(url)
+                assert resp.status_code == 200, url
+                assert expected in resp.text, url
+                assert reads, url
+    finally:
+        app.dependency_overrides.clear()
+        reader.dispose()
+        writer.dispose()
+
+    with reader.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
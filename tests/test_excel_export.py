@@ -0,0 +1,57 @@
+"""Tests for excel_export service — streaming owners .xlsx."""
+import io
+
+from openpyxl import load_workbook
+
+
+def _owner(i, **kw):
+    from app.models.owner import Owner
+
+    defaults = dict(
+        id=i, first_name=f"Jan{i}", last_name="Novák", title="Ing.",
+        owner_type="physical", email=f"jan{i}@test.cz", phone="602123456",
+    )
+    defaults.update(kw)
+    return Owner(**defaults)
+
+
+def test_stream_owners_xlsx_roundtrip():
+    """Streamed chunks should form a valid workbook with header and data rows."""
+    from app.services.excel_export import HEADERS, stream_owners_xlsx
+
+    owners = [_owner(1), _owner(2, owner_type="legal", note="x", company_id="45277991")]
+    data = b"".join(stream_owners_xlsx(owners))
+
+    wb = load_workbook(io.BytesIO(data))
+    ws = wb.active
+    assert ws.title == "Vlastníci"
+    rows = list(ws.iter_rows(values_only=True))
+    assert list(rows[0]) == HEADERS
+    assert rows[1][:3] == (1, "Novák", "Jan1")
+    assert rows[2][4] == "Právnická"
+    assert rows[2][6] == "45277991"
+    assert rows[1][5] is None  # empty RČ stays empty
+    assert ws["A1"].font.bold
+    assert ws["B2"].border.left.style == "thin"
+    assert ws.column_dimensions["H"].width == len("jan1@test.cz") + 2
+
+
+def test_stream_owners_xlsx_escapes_and_caps_width():
+    """Special characters are escaped and widths are capped at 40."""
+    from app.services.excel_export import stream_owners_xlsx
+
+    owners = [_owner(1, last_name="<Novák & syn>", perm_street="x" * 100)]
+    wb = load_workbook(io.BytesIO(b"".join(stream_owners_xlsx(owners))))
+    ws = wb.active
+    assert ws["B2"].value == "<Novák & syn>"
+    assert ws.column_dimensions["J"].width == 40
+
+
+def test_stream_owners_xlsx_many_rows_in_chunks():
+    """Large exports are produced as multiple chunks."""
+    from app.services.excel_export import stream_owners_xlsx
+
+    chunks = list(stream_owners_xlsx(_owner(i) for i in range(1, 20001)))
+    assert len(chunks) > 2
+    wb = load_workbook(io.BytesIO(b"".join(chunks)), read_only=True)
+    assert wb.active.max_row == 20001
@@ -58,10 +58,10 @@ def test_clean_name_keeps_normal_slash():
 
 
 def test_normalize_name():
-    from app.services.excel_import import _normalize_name
-    assert _normalize_name("Novák Jan") == "novak jan"
-    assert _normalize_name("  Šťastný   Petr  ") == "stastny petr"
-    assert _normalize_name("VELKÝ") == "velky"
+    from app.services.text_utils import normalize_name
+    assert normalize_name("Novák Jan") == "novak jan"
+    assert normalize_name("  Šťastný   Petr  ") == "stastny petr"
+    assert normalize_name("VELKÝ") == "velky"
 
 
 def test_is_birth_number():
@@ -476,3 +476,58 @@ def test_import_confirm_no_token(auth_client):
     resp = auth_client.post("/vlastnici/import/potvrdit", follow_redirects=True)
     assert resp.status_code == 200
     assert "Žádná data" in resp.text or "import" in resp.text.lower()
+
+
+def test_import_bulk_benchmark_50k_rows(db_engine):
+    """Regression benchmark: bulk import of a synthetic 50k-row workbook."""
+    from sqlalchemy.orm import Session as SASession
+    from app.services.excel_import import import_owners_from_excel
+    from app.models.owner import Owner, Unit, OwnerUnit
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Vlastnici_SVJ")
+    ws.append(["header"] * 31)
+    for i in range(50_000):
+        # Every owner holds two consecutive units
+        ws.append([f"1098/{i + 1}", f"A {i}", 1000 + i % 500, 50.5, "2+kk", "byt", "A", 22,
+                   "Štěpařská", 3504, "VL", f"Jméno{i // 2}", f"Příjmení{i // 2}", None, None]
+                  + [None] * 16)
+    tmp = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+    wb.save(tmp.name)
+
+    db = SASession(bind=db_engine)
+    result = import_owners_from_excel(db, tmp.name)
+    db.commit()
+
+    assert result["rows_processed"] == 50_000
+    assert result["owners_created"] == 25_000
+    assert result["units_created"] == 50_000
+    assert result["links_created"] == 50_000
+    assert db.query(Owner).count() == 25_000
+    assert db.query(Unit).count() == 50_000
+    assert db.query(OwnerUnit).count() == 50_000
+    assert result["rows_per_second"] > 500
+
+    db.close()
+    os.unlink(tmp.name)
+
+
+def test_import_reuses_existing_units(simple_excel, db_engine):
+    """Bulk import should link to preloaded units instead of creating duplicates."""
+    from sqlalchemy.orm import Session as SASession
+    from app.services.excel_import import import_owners_from_excel
+    from app.models.owner import Unit, OwnerUnit
+
+    db = SASession(bind=db_engine)
+    db.add(Unit(unit_number=1, podil_scd=999))
+    db.commit()
+
+    result = import_owners_from_excel(db, simple_excel, batch_size=1)
+    db.commit()
+
+    assert result["units_created"] == 1
+    assert db.query(Unit).count() == 2
+    existing = db.query(Unit).filter(Unit.unit_number == 1).first()
+    link = db.query(OwnerUnit).filter(OwnerUnit.unit_id == existing.id).first()
+    assert link.votes == 999
+    db.close()
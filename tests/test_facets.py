@@ -0,0 +1,76 @@
+"""Tests for list-page facet counts and their data-version cache."""
+from sqlalchemy import event, insert
+
+
+def _count_statements(engine):
+    statements = []
+
+    def _before(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    return statements, lambda: event.remove(engine, "before_cursor_execute", _before)
+
+
+def test_owner_facets_counts_and_cache(db_session, db_engine):
+    """Counts come from one aggregate query and are recomputed after any write."""
+    from app.models.owner import Owner, OwnerUnit, Unit
+    from app.services.facets import owner_facets
+
+    unit = Unit(unit_number=1)
+    physical = Owner(first_name="Jan", owner_type="physical", email="jan@example.cz", is_active=True)
+    legal = Owner(first_name="Firma", owner_type="legal", phone="123", is_active=True)
+    gone = Owner(first_name="Starý", owner_type="physical", email="x@example.cz", is_active=False)
+    db_session.add_all([unit, physical, legal, gone])
+    db_session.flush()
+    db_session.add(OwnerUnit(owner_id=physical.id, unit_id=unit.id, ownership_type="SJM"))
+    db_session.commit()
+
+    facets = owner_facets(db_session)
+    assert facets["total"] == 2
+    assert (facets["fyzicka_count"], facets["pravnicka_count"]) == (1, 1)
+    assert (facets["s_emailem_count"], facets["bez_emailu_count"]) == (1, 1)
+    assert (facets["s_telefonem_count"], facets["bez_telefonu_count"]) == (1, 1)
+    assert facets["ownership_types"] == ["SJM"]
+
+    # Cached: only the version lookup runs
+    statements, stop = _count_statements(db_engine)
+    assert owner_facets(db_session) == facets
+    stop()
+    assert len(statements) == 1
+
+    # A bulk Core insert bumps the version through the triggers
+    db_session.execute(insert(Owner), [{"first_name": "Nový", "owner_type": "legal", "is_active": True}])
+    db_session.commit()
+    facets = owner_facets(db_session)
+    assert facets["total"] == 3
+    assert facets["pravnicka_count"] == 2
+
+
+def test_unit_facets_single_group_by(db_session, db_engine):
+    """Unit bubbles are built from one GROUP BY instead of a count() per value."""
+    from app.models.owner import Unit
+    from app.services.facets import unit_facets
+
+    db_session.add_all([
+        Unit(unit_number=1, building_number="A", space_type="byt", section="I"),
+        Unit(unit_number=2, building_number="A", space_type="byt", section="II"),
+        Unit(unit_number=3, building_number="B", space_type="garáž", section="II"),
+        Unit(unit_number=4, building_number="", space_type="", section=""),
+    ])
+    db_session.commit()
+
+    statements, stop = _count_statements(db_engine)
+    facets = unit_facets(db_session)
+    stop()
+    assert len(statements) == 2  # version lookup + GROUP BY
+
+    assert facets["total"] == 4
+    assert facets["building_list"] == ["A", "B"]
+    assert facets["space_type_list"] == [{"value": "byt", "count": 2}, {"value": "garáž", "count": 1}]
+    assert facets["section_list"] == [{"value": "I", "count": 1}, {"value": "II", "count": 2}]
+
+    unit = db_session.query(Unit).filter_by(unit_number=4).one()
+    unit.space_type = "byt"
+    db_session.commit()
+    assert unit_facets(db_session)["space_type_list"][0] == {"value": "byt", "count": 3}
@@ -0,0 +1,197 @@
+"""Tests for the background job queue and job status routes."""
+
+
+def _ok_job(db, ctx, value):
+    ctx.progress(1, 2)
+    ctx.progress(2, 2)
+    return {"message": f"Hotovo {value}.", "value": value}
+
+
+def _failing_job(db, ctx):
+    raise RuntimeError("disk plný")
+
+
+def test_submit_job_inline_persists_result(db_session):
+    """With JOB_WORKERS=0 the job runs inside submit_job and its outcome is stored."""
+    from app.services.job_queue import JOB_DONE, job_result, submit_job
+
+    job = submit_job(db_session, "test", "Testovací úloha", _ok_job, 42, redirect_url="/x")
+
+    assert job.status == JOB_DONE
+    assert job.message == "Hotovo 42."
+    assert job_result(job) == {"value": 42}
+    assert (job.progress_done, job.progress_total) == (2, 2)
+    assert job.started_at is not None and job.finished_at is not None
+
+
+def test_submit_job_failure(db_session):
+    """An exception in the job function marks the job as failed with its message."""
+    from app.services.job_queue import JOB_FAILED, job_flash, submit_job
+
+    job = submit_job(db_session, "test", "Záloha", _failing_job)
+
+    assert job.status == JOB_FAILED
+    assert job.message == "disk plný"
+    assert job_flash(job) == {"type": "error", "message": "Záloha: disk plný"}
+
+
+def test_submit_job_worker_thread(tmp_path, monkeypatch):
+    """With a worker pool the job runs off the request thread and is persisted."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session as SASession
+
+    from app.config import settings
+    from app.models import Base
+    from app.models.common import Job
+    from app.services import job_queue
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "JOB_WORKERS", 1)
+
+    session = SASession(bind=engine)
+    try:
+        job = job_queue.submit_job(session, "test", "Vlákno", _ok_job, 7)
+        job_id = job.id
+    finally:
+        job_queue.shutdown_job_queue(wait=True)
+        session.close()
+
+    session = SASession(bind=engine)
+    job = session.get(Job, job_id)
+    assert job.status == job_queue.JOB_DONE
+    assert job_queue.job_result(job) == {"value": 7}
+    session.close()
+    engine.dispose()
+
+
+def test_job_progress_written_to_row(tmp_path, monkeypatch):
+    """Progress lands on the Job row for pollers in other processes, without
+    waiting while the job's own transaction holds the write lock."""
+    import time
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session as SASession
+
+    from app.models import Base
+    from app.models.common import Job, Notification
+    from app.services import job_queue
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(engine)
+    seen = {}
+
+    def _reporting_job(db, ctx):
+        ctx.progress(3, 10)
+        with SASession(bind=engine) as other:  # a poll served by another worker
+            job = other.get(Job, ctx.job_id)
+            with job_queue._progress_lock:
+                job_queue._progress.pop(ctx.job_id)
+            seen["row"] = job_queue.job_progress(job)
+        db.add(Notification(message="x"))
+        db.flush()  # the job now holds the write lock
+        started = time.monotonic()
+        ctx.progress(10, 10)
+        seen["blocked"] = time.monotonic() - started
+        return {}
+
+    session = SASession(bind=engine)
+    job = job_queue.submit_job(session, "test", "Průběh", _reporting_job)
+    assert job.status == job_queue.JOB_DONE
+    assert seen["row"] == (3, 10)
+    assert seen["blocked"] < 1
+    assert (job.progress_done, job.progress_total) == (10, 10)
+    session.close()
+    engine.dispose()
+
+
+def test_recover_interrupted_jobs(db_session):
+    """Jobs left queued/running by a dead process are failed on startup."""
+    from app.models.common import Job
+    from app.services.job_queue import JOB_FAILED, recover_interrupted_jobs
+
+    db_session.add_all([
+        Job(kind="test", title="a", status="běží"),
+        Job(kind="test", title="b", status="čeká"),
+        Job(kind="test", title="c", status="dokončeno"),
+    ])
+    db_session.commit()
+
+    assert recover_interrupted_jobs(db_session) == 2
+    statuses = sorted(j.status for j in db_session.query(Job).all())
+    assert statuses == sorted([JOB_FAILED, JOB_FAILED, "dokončeno"])
+
+
+def test_recover_interrupted_jobs_spares_live_workers(db_session):
+    """Jobs of a sibling worker that still runs survive another worker's startup."""
+    import os
+    import socket
+    import subprocess
+    import sys
+
+    from app.models.common import Job
+    from app.services.job_queue import JOB_FAILED, JOB_RUNNING, recover_interrupted_jobs, worker_id
+
+    host = socket.gethostname()
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    jobs = {
+        "sibling": Job(kind="test", title="a", status="běží", worker=f"{host}:{os.getppid()}"),
+        "dead": Job(kind="test", title="b", status="běží", worker=f"{host}:{exited.pid}"),
+        "same_pid": Job(kind="test", title="c", status="čeká", worker=worker_id()),
+        "other_host": Job(kind="test", title="d", status="běží", worker=f"{host}-old:{os.getppid()}"),
+    }
+    db_session.add_all(jobs.values())
+    db_session.commit()
+
+    assert recover_interrupted_jobs(db_session) == 3
+    assert {name: job.status for name, job in jobs.items()} == {
+        "sibling": JOB_RUNNING, "dead": JOB_FAILED, "same_pid": JOB_FAILED, "other_host": JOB_FAILED,
+    }
+
+
+def test_submit_job_with_key_is_exclusive(db_session):
+    """A keyed job is not created while another job with that key is queued or running."""
+    from app.models.common import Job
+    from app.services.job_queue import JOB_DONE, submit_job
+
+    db_session.add(Job(kind="test", title="Běží", status="běží", key="test:1"))
+    db_session.commit()
+
+    assert submit_job(db_session, "test", "Znovu", _ok_job, 1, key="test:1") is None
+    job = submit_job(db_session, "test", "Jiný klíč", _ok_job, 2, key="test:2")
+    assert job.status == JOB_DONE and job.key == "test:2" and job.worker
+    assert submit_job(db_session, "test", "Po dokončení", _ok_job, 3, key="test:2").status == JOB_DONE
+    assert db_session.query(Job).count() == 3
+
+
+def test_job_status_partial(auth_client, db_engine):
+    """GET /ulohy/{id}/stav polls while running and HX-Redirects once finished."""
+    from sqlalchemy.orm import Session as SASession
+    from app.models.common import Job
+
+    session = SASession(bind=db_engine)
+    running = Job(kind="test", title="Běžící", status="běží", progress_done=3, progress_total=10)
+    done = Job(kind="test", title="Hotová", status="dokončeno", message="Vše hotovo.", redirect_url="/vlastnici")
+    session.add_all([running, done])
+    session.commit()
+    running_id, done_id = running.id, done.id
+    session.close()
+
+    resp = auth_client.get(f"/ulohy/{running_id}/stav")
+    assert resp.status_code == 200
+    assert 'hx-trigger="every 1s"' in resp.text
+    assert "10" in resp.text
+
+    resp = auth_client.get(f"/ulohy/{done_id}/stav")
+    assert resp.headers["HX-Redirect"] == "/vlastnici"
+
+    resp = auth_client.get("/vlastnici")
+    assert "Vše hotovo." in resp.text
+
+    resp = auth_client.get(f"/ulohy/{done_id}")
+    assert resp.status_code == 200
+    assert "Zobrazit výsledek" in resp.text
+
+    resp = auth_client.get("/ulohy")
+    assert "Běžící" in resp.text and "Hotová" in resp.text
@@ -0,0 +1,104 @@
+"""Tests for the indexed fuzzy owner matcher."""
+import time
+
+
+def _add_owners(session, names):
+    from app.models.owner import Owner
+    from app.services.excel_import import _build_name_normalized
+
+    owners = []
+    for last, first in names:
+        o = Owner(
+            first_name=first,
+            last_name=last,
+            name_with_titles=f"{last} {first}",
+            name_normalized=_build_name_normalized(first, last),
+            owner_type="physical",
+        )
+        session.add(o)
+        owners.append(o)
+    session.commit()
+    return owners
+
+
+def test_match_exact_and_diacritics(db_session):
+    from app.services.owner_matcher import best_owner_match
+
+    owners = _add_owners(db_session, [("Novák", "Jan"), ("Svoboda", "Petr"), ("Dvořáková", "Marie")])
+
+    match = best_owner_match(db_session, "Novak Jan")
+    assert match["owner_id"] == owners[0].id
+    assert match["score"] == 1.0
+
+    # Reversed order "Jméno Příjmení" matches too
+    match = best_owner_match(db_session, "Marie Dvořáková")
+    assert match["owner_id"] == owners[2].id
+    assert match["score"] == 1.0
+
+
+def test_match_threshold_and_limit(db_session):
+    from app.services.owner_matcher import match_owners
+
+    _add_owners(db_session, [("Novák", "Jan"), ("Nováková", "Jana"), ("Svoboda", "Petr")])
+
+    matches = match_owners(db_session, "Novák Jan", limit=2, min_score=0.5)
+    assert len(matches) == 2
+    assert matches[0]["score"] >= matches[1]["score"]
+    assert match_owners(db_session, "Zcela Jiný", min_score=0.9) == []
+
+
+def test_match_active_only(db_session):
+    from app.services.owner_matcher import best_owner_match
+
+    owners = _add_owners(db_session, [("Novák", "Jan")])
+    owners[0].is_active = False
+    db_session.commit()
+
+    assert best_owner_match(db_session, "Novák Jan", active_only=True) is None
+    assert best_owner_match(db_session, "Novák Jan")["owner_id"] == owners[0].id
+
+
+def test_index_invalidated_on_owner_change(db_session):
+    from app.services.owner_matcher import best_owner_match, get_owner_index
+
+    owners = _add_owners(db_session, [("Novák", "Jan")])
+    index = get_owner_index(db_session)
+    assert get_owner_index(db_session) is index
+
+    owners[0].name_normalized = "horak karel"
+    db_session.commit()
+    assert get_owner_index(db_session) is not index
+    assert best_owner_match(db_session, "Horák Karel")["owner_id"] == owners[0].id
+
+    db_session.delete(owners[0])
+    db_session.commit()
+    assert best_owner_match(db_session, "Horák Karel") is None
+
+
+def test_index_sees_writes_bypassing_the_orm(db_session):
+    """Raw SQL (another process, a restored DB) bumps the owners DataVersion."""
+    from sqlalchemy import text
+    from app.services.owner_matcher import best_owner_match, get_owner_index
+
+    owners = _add_owners(db_session, [("Novák", "Jan")])
+    index = get_owner_index(db_session)
+    with db_session.get_bind().begin() as conn:
+        conn.execute(text("UPDATE owners SET name_normalized = 'horak karel' WHERE id = :id"), {"id": owners[0].id})
+    assert get_owner_index(db_session) is not index
+    assert best_owner_match(db_session, "Horák Karel")["owner_id"] == owners[0].id
+
+
+def test_index_lookup_is_fast(db_session):
+    from app.services.owner_matcher import get_owner_index
+
+    names = [(f"Příjmení{i}", f"Jméno{i % 97}") for i in range(2000)]
+    _add_owners(db_session, names)
+    index = get_owner_index(db_session)
+    assert len(index) == 2000
+
+    start = time.perf_counter()
+    for i in range(200):
+        index.search(f"Prijmeni{i * 7} Jmeno{(i * 7) % 97}", limit=5)
+    per_query = (time.perf_counter() - start) / 200
+    assert per_query < 0.005
+    assert index.best("Příjmení1234 Jméno70")["score"] == 1.0
@@ -174,3 +174,33 @@ def test_excel_export(auth_client, db_engine):
     resp = auth_client.get("/vlastnici/export")
     assert resp.status_code == 200
     assert "spreadsheet" in resp.headers.get("content-type", "") or "octet-stream" in resp.headers.get("content-type", "")
+
+
+def test_owners_list_keyset_pages(auth_client, db_engine, monkeypatch):
+    """The list renders one page and the scroll partial continues after the cursor."""
+    import re
+
+    from sqlalchemy.orm import Session as SASession
+    from app.services import pagination
+
+    monkeypatch.setattr(pagination, "PAGE_SIZE", 2)
+    session = SASession(bind=db_engine)
+    for name in ["Adam", "Beran", "Cibulka", "Dvořák", "Erben"]:
+        session.add(_make_owner(last_name=name, name_with_titles=f"{name} Jan", name_normalized=f"{name.lower()} jan"))
+    session.add(_make_owner(last_name="Fiala", name_normalized="fiala jan", owner_type="legal"))
+    session.commit()
+    session.close()
+
+    resp = auth_client.get("/vlastnici?typ=physical")
+    assert "Adam" in resp.text and "Beran" in resp.text and "Cibulka" not in resp.text
+    next_url = re.search(r'hx-get="(/vlastnici/stranka\?[^"]+)"', resp.text).group(1).replace("&amp;", "&")
+    assert "typ=physical" in next_url
+
+    resp = auth_client.get(next_url)
+    assert "Cibulka" in resp.text and "Dvořák" in resp.text and "Adam" not in resp.text
+    next_url = re.search(r'hx-get="([^"]+)"', resp.text).group(1).replace("&amp;", "&")
+
+    resp = auth_client.get(next_url)
+    assert "Erben" in resp.text
+    assert "Fiala" not in resp.text  # filter still applied
+    assert "hx-get" not in resp.text  # last page
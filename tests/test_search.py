@@ -33,3 +33,55 @@ def test_search_empty_query(auth_client):
     resp = auth_client.get("/hledani?q=")
     assert resp.status_code == 200
     assert "min. 2 znaky" in resp.text
+
+
+def test_search_index_diacritics_and_prefix(auth_client, db_session):
+    """The FTS index matches word prefixes regardless of case and diacritics."""
+    from app.models.owner import Owner, Unit
+    from app.models.voting import Voting
+
+    db_session.add_all([
+        Owner(first_name="Jiří", last_name="Dvořák", name_with_titles="Dvořák Jiří",
+              name_normalized="dvorak jiri", owner_type="physical", perm_city="Brno", is_active=True),
+        Owner(first_name="Eva", last_name="Dvořáková", name_with_titles="Dvořáková Eva",
+              owner_type="physical", is_active=False),
+        Unit(unit_number=101, building_number="1098", address="Štěpánská 12"),
+        Voting(name="Schválení účetní závěrky"),
+    ])
+    db_session.commit()
+
+    resp = auth_client.get("/hledani?q=dvor jir")
+    assert "Dvořák Jiří" in resp.text
+    assert "Dvořáková" not in resp.text  # inactive owners are skipped
+
+    resp = auth_client.get("/hledani?q=stepansk")
+    assert "Jednotka č. 101" in resp.text
+
+    resp = auth_client.get("/hledani?q=ucetni")
+    assert "Schválení účetní závěrky" in resp.text
+
+
+def test_search_index_follows_writes(db_session):
+    """Triggers keep the index in sync on update and delete, ranked by bm25."""
+    from app.models.owner import Owner
+    from app.services.search_index import search_owners
+
+    exact = Owner(first_name="Petr", last_name="Svoboda", name_with_titles="Svoboda Petr", is_active=True)
+    other = Owner(first_name="Jana", last_name="Malá", name_with_titles="Malá Jana",
+                  perm_street="Svobodova 5", is_active=True)
+    db_session.add_all([exact, other])
+    db_session.commit()
+
+    # Name hit ranks above an address hit
+    assert [o.id for o in search_owners(db_session, "svobod")] == [exact.id, other.id]
+
+    exact.last_name = "Novotný"
+    exact.name_with_titles = "Novotný Petr"
+    db_session.commit()
+    assert [o.id for o in search_owners(db_session, "novotn")] == [exact.id]
+    assert [o.id for o in search_owners(db_session, "svobod")] == [other.id]
+
+    db_session.delete(other)
+    db_session.commit()
+    assert search_owners(db_session, "svobod") == []
+    assert search_owners(db_session, "!!") == []
@@ -199,3 +199,213 @@ def test_sync_detail_not_found(auth_client):
     """GET /synchronizace/9999 should return 404."""
     resp = auth_client.get("/synchronizace/9999")
     assert resp.status_code == 404
+
+
+def test_compare_unit_co_owners():
+    """Co-owned units match any co-owner or the whole owner group."""
+    from app.services.csv_comparator import compare_unit
+
+    owners = [("Novák Jan", 50), ("Nováková Marie", 50)]
+    assert compare_unit(owners, "Nováková Marie", "50") == ("shoda", "Nováková Marie", "50")
+    assert compare_unit(owners, "Nováková Marie, Novák Jan", "100") == (
+        "shoda", "Novák Jan, Nováková Marie", "100",
+    )
+    assert compare_unit(owners, "Dvořák Petr", "")[0] == "rozdílní"
+    assert compare_unit([], "Dvořák Petr", "") == ("chybí", "", "")
+
+
+def test_compare_csv_file_batches(db_session, tmp_path, monkeypatch):
+    """The CSV is compared against one ownership snapshot and bulk inserted."""
+    from app.models.owner import Owner, Unit, OwnerUnit
+    from app.models.sync import SyncSession, SyncRecord
+    from app.services import csv_comparator
+
+    monkeypatch.setattr(csv_comparator, "BATCH_SIZE", 2)
+    jan = Owner(first_name="Jan", last_name="Novák", name_with_titles="Novák Jan", name_normalized="novak jan")
+    marie = Owner(first_name="Marie", last_name="Nováková", name_with_titles="Nováková Marie",
+                  name_normalized="novakova marie")
+    u101, u102 = Unit(unit_number=101), Unit(unit_number=102)
+    db_session.add_all([jan, marie, u101, u102])
+    db_session.flush()
+    db_session.add_all([
+        OwnerUnit(owner_id=jan.id, unit_id=u101.id, votes=100),
+        OwnerUnit(owner_id=jan.id, unit_id=u102.id, votes=60, ownership_type="SJM"),
+        OwnerUnit(owner_id=marie.id, unit_id=u102.id, votes=60, ownership_type="SJM"),
+    ])
+    ss = SyncSession(name="test")
+    db_session.add(ss)
+    db_session.commit()
+
+    path = tmp_path / "katastr.csv"
+    path.write_text(
+        "jednotka;vlastnik;podil\n"
+        "101;Novák Jan;100\n"
+        "102;Nováková Marie;60\n"
+        "103;Dvořák Petr;10\n"
+        ";;\n",
+        encoding="utf-8",
+    )
+    mapping = {"unit_col": "jednotka", "owner_col": "vlastnik", "share_col": "podil",
+               "first_name_col": "", "last_name_col": ""}
+    calls = []
+    count = csv_comparator.compare_csv_file(db_session, ss.id, str(path), ";", mapping,
+                                            progress=lambda d, t: calls.append((d, t)))
+    db_session.commit()
+
+    assert count == 3
+    records = db_session.query(SyncRecord).order_by(SyncRecord.id).all()
+    assert [(r.unit_id, r.status, r.db_owner_name) for r in records] == [
+        (u101.id, "shoda", "Novák Jan"),
+        (u102.id, "shoda", "Nováková Marie"),
+        (None, "chybí", ""),
+    ]
+    assert calls[-1][0] == calls[-1][1]
+
+
+def test_sync_upload_cp1250_comma_csv(auth_client):
+    """A CP1250 export with ',' delimiter is detected and decoded."""
+    csv_content = "jednotka,vlastnik,podil\n101,Jan Novák,1/1\n102,Eva Šťastná,1/2\n".encode("cp1250")
+    resp = auth_client.post(
+        "/synchronizace/nova",
+        data={"name": "Test sync"},
+        files=[("file", ("test.csv", csv_content, "text/csv"))],
+        follow_redirects=False,
+    )
+    assert resp.status_code == 200
+    assert "Mapování sloupců" in resp.text
+    assert "Novák" in resp.text
+    assert "Šťastná" in resp.text
+
+
+def test_ingest_csv_single_pass(tmp_path):
+    """ingest_csv transcodes to UTF-8 and gathers headers, samples and row count."""
+    import io
+    from app.services import csv_ingest
+
+    lines = ["jednotka;vlastnik;podil"] + [f"{i};Vlastník {i};1/1" for i in range(1, 21)]
+    source = io.BytesIO(("\r\n".join(lines) + "\r\n\r\n").encode("cp1250"))
+    dest = str(tmp_path / "upload.csv")
+    meta = csv_ingest.ingest_csv(source, dest)
+
+    assert meta["encoding"] == "cp1250"
+    assert meta["delimiter"] == ";"
+    assert meta["headers"] == ["jednotka", "vlastnik", "podil"]
+    assert meta["total_rows"] == 20
+    assert len(meta["sample_rows"]) == csv_ingest.SAMPLE_ROWS
+    assert meta["sample_rows"][0] == {"jednotka": "1", "vlastnik": "Vlastník 1", "podil": "1/1"}
+    with open(dest, encoding="utf-8") as f:
+        assert "Vlastník 20" in f.read()
+
+    csv_ingest.save_meta(dest, meta)
+    assert csv_ingest.load_meta(dest)["delimiter"] == ";"
+    csv_ingest.discard(dest)
+    assert not (tmp_path / "upload.csv").exists()
+    assert csv_ingest.load_meta(dest) is None
+
+
+def test_detect_encoding_tolerates_cut_utf8():
+    """A UTF-8 character split at the end of the sniffed block stays UTF-8."""
+    from app.services.csv_ingest import detect_encoding
+
+    head = "Novák Šťastný".encode("utf-8")
+    assert detect_encoding(head[:-1]) == "utf-8"
+    assert detect_encoding("Novák".encode("cp1250")) == "cp1250"
+    assert detect_encoding(b"\xef\xbb\xbfjednotka") == "utf-8-sig"
+
+
+def test_compare_csv_file_delta(db_session, tmp_path):
+    """Delta mode compares only changed rows and links unchanged ones to the base session."""
+    from app.models.owner import Owner, Unit, OwnerUnit
+    from app.models.sync import SyncSession, SyncRecord
+    from app.services import csv_comparator
+
+    jan = Owner(first_name="Jan", last_name="Novák", name_with_titles="Novák Jan", name_normalized="novak jan")
+    u101, u102 = Unit(unit_number=101), Unit(unit_number=102)
+    db_session.add_all([jan, u101, u102])
+    db_session.flush()
+    db_session.add(OwnerUnit(owner_id=jan.id, unit_id=u101.id, votes=100))
+    db_session.commit()
+    mapping = {"unit_col": "jednotka", "owner_col": "vlastnik", "share_col": "podil",
+               "first_name_col": "", "last_name_col": ""}
+
+    def run(content: str) -> SyncSession:
+        path = tmp_path / "katastr.csv"
+        path.write_text("jednotka;vlastnik;podil;email\n" + content, encoding="utf-8")
+        ss = SyncSession(name="test", source_format="interní")
+        db_session.add(ss)
+        db_session.flush()
+        base_id = csv_comparator.previous_session_id(db_session, "interní", ss.id)
+        csv_comparator.compare_csv_file(db_session, ss.id, str(path), ";", mapping, base_session_id=base_id)
+        db_session.commit()
+        db_session.refresh(ss)
+        return ss
+
+    first = run("101;Novák Jan;100;jan@example.cz\n102;Dvořák Petr;10;\n")
+    assert first.base_session_id is None
+    second = run("101;Novák Jan;100;jan@example.cz\n102;Dvořák Pavel;10;\n")
+    assert second.base_session_id == first.id
+    assert second.reused_count == 1
+
+    first_101 = db_session.query(SyncRecord).filter(SyncRecord.session_id == first.id).first()
+    second_101, second_102 = (
+        db_session.query(SyncRecord).filter(SyncRecord.session_id == second.id).order_by(SyncRecord.id).all()
+    )
+    assert second_101.base_record_id == first_101.id
+    assert second_101.csv_values is None
+    assert second_101.status == "shoda"
+    assert second_101.row_data["email"] == "jan@example.cz"
+    assert second_102.base_record_id is None
+    assert second_102.csv_owner_name == "Dvořák Pavel"
+
+    # Ownership change invalidates the fingerprint of the unit
+    db_session.add(OwnerUnit(owner_id=jan.id, unit_id=u102.id, votes=10))
+    db_session.commit()
+    third = run("101;Novák Jan;100;jan@example.cz\n102;Dvořák Pavel;10;\n")
+    assert third.reused_count == 1
+
+    # Deleting the session holding the payload hands it to the dependent record
+    csv_comparator.detach_session(db_session, first.id)
+    db_session.delete(first)
+    db_session.commit()
+    db_session.expire_all()
+    holder = db_session.get(SyncRecord, second_101.id)
+    assert holder.base_record_id is None
+    assert holder.row_data["email"] == "jan@example.cz"
+    third_101 = db_session.query(SyncRecord).filter(
+        SyncRecord.session_id == third.id, SyncRecord.unit_id == u101.id
+    ).one()
+    assert third_101.base_record_id == holder.id
+    assert db_session.get(SyncSession, second.id).base_session_id is None
+
+
+def test_sync_record_columnar_payload(db_session, tmp_path):
+    """Column names are stored once per session, row values as packed arrays."""
+    import json
+    from app.models.sync import SyncSession, SyncRecord, pack_values, unpack_values
+    from app.services import csv_comparator
+
+    long_row = ["x" * 50] * 20
+    assert unpack_values(pack_values(long_row)) == long_row
+    assert len(pack_values(long_row)) < len(json.dumps(long_row))
+    assert pack_values(["101", None]) == b'["101",null]'
+
+    path = tmp_path / "katastr.csv"
+    path.write_text("jednotka;vlastnik;email;telefon\n101;Novák Jan;jan@example.cz;777\n", encoding="utf-8")
+    ss = SyncSession(name="test")
+    db_session.add(ss)
+    db_session.flush()
+    mapping = {"unit_col": "jednotka", "owner_col": "vlastnik"}
+    csv_comparator.compare_csv_file(db_session, ss.id, str(path), ";", mapping)
+    db_session.commit()
+    db_session.expire_all()
+
+    session = db_session.get(SyncSession, ss.id)
+    assert json.loads(session.csv_columns) == ["jednotka", "vlastnik", "email", "telefon"]
+    record = db_session.query(SyncRecord).filter(SyncRecord.session_id == ss.id).one()
+    assert record.csv_data == ""
+    assert record.csv_fields("email", "phone") == {"email": "jan@example.cz"}
+    assert record.row_data == {"jednotka": "101", "vlastnik": "Novák Jan", "email": "jan@example.cz", "telefon": "777"}
+
+    # Records written before the columnar format still read from csv_data
+    legacy = SyncRecord(session_id=ss.id, csv_data=json.dumps({"email": "old@example.cz"}))
+    assert legacy.csv_fields("email") == {"email": "old@example.cz"}
@@ -112,3 +112,150 @@ def test_sync_accept_requires_login(client, db_engine):
     """Accept endpoint requires authentication."""
     resp = client.post("/synchronizace/1/prijmout/1", follow_redirects=False)
     assert resp.status_code == 303
+
+
+def _create_bulk_sync_session(db_engine, units: int) -> int:
+    """Sync session with one record per unit, each with contacts and a new share."""
+    import json
+    from sqlalchemy.orm import Session as SASession
+    from app.models.sync import SyncSession, SyncRecord
+    from app.models.owner import Owner, Unit, OwnerUnit
+
+    session = SASession(bind=db_engine)
+    ss = SyncSession(name="Bulk", source_format="interní")
+    session.add(ss)
+    session.flush()
+    for i in range(units):
+        owner = Owner(first_name="Jan", last_name=f"Novák{i}", owner_type="physical", email="")
+        unit = Unit(unit_number=200 + i)
+        session.add_all([owner, unit])
+        session.flush()
+        session.add(OwnerUnit(owner_id=owner.id, unit_id=unit.id, votes=10))
+        session.add(SyncRecord(
+            session_id=ss.id, unit_id=unit.id, status="rozdílné_podíly",
+            csv_owner_name=f"Novák{i} Jan", csv_share="25",
+            csv_data=json.dumps({"email": f"jan{i}@example.cz", "telefon": f"77700{i}"}),
+        ))
+    session.commit()
+    session_id = ss.id
+    session.close()
+    return session_id
+
+
+def test_sync_bulk_apply_query_count(auth_client, db_engine):
+    """Selective update and contact transfer touch all records in a constant number of queries."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session as SASession
+    from app.models.common import AuditLog
+    from app.models.owner import Owner, OwnerUnit
+    from app.models.sync import SyncRecord
+
+    session_id = _create_bulk_sync_session(db_engine, 30)
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine, "before_cursor_execute", _count)
+    try:
+        resp = auth_client.post(f"/synchronizace/{session_id}/aplikovat-kontakty", follow_redirects=False)
+    finally:
+        event.remove(db_engine, "before_cursor_execute", _count)
+    assert resp.status_code == 303
+    # 30 records used to cost ~90 queries
+    assert len(statements) < 15
+
+    session = SASession(bind=db_engine)
+    owners = session.query(Owner).filter(Owner.last_name.like("Novák%")).order_by(Owner.id).all()
+    assert [(o.email, o.phone) for o in owners[:2]] == [("jan0@example.cz", "777000"), ("jan1@example.cz", "777001")]
+    assert session.query(AuditLog).filter(AuditLog.model_name == "Owner").count() == 60
+    record_ids = [r.id for r in session.query(SyncRecord.id).filter(SyncRecord.session_id == session_id)]
+    session.close()
+
+    statements.clear()
+    event.listen(db_engine, "before_cursor_execute", _count)
+    try:
+        resp = auth_client.post(
+            f"/synchronizace/{session_id}/aktualizovat",
+            data={"record_ids": [str(rid) for rid in record_ids]},
+            follow_redirects=False,
+        )
+    finally:
+        event.remove(db_engine, "before_cursor_execute", _count)
+    assert resp.status_code == 303
+    assert len(statements) < 15
+
+    session = SASession(bind=db_engine)
+    assert {ou.votes for ou in session.query(OwnerUnit).all()} == {25}
+    assert session.query(SyncRecord).filter(
+        SyncRecord.session_id == session_id, SyncRecord.is_resolved == 1
+    ).count() == 30
+    assert session.query(AuditLog).filter(AuditLog.model_name == "OwnerUnit").count() == 30
+    session.close()
+
+
+def test_sync_apply_targets_matched_co_owner(auth_client, db_engine, tmp_path):
+    """Share and contacts go to the co-owner the comparison matched, not the first one."""
+    from sqlalchemy.orm import Session as SASession
+    from app.models.owner import Owner, Unit, OwnerUnit
+    from app.models.sync import SyncSession, SyncRecord
+    from app.services import csv_comparator
+
+    session = SASession(bind=db_engine)
+    jan = Owner(first_name="Jan", last_name="Novák", name_with_titles="Novák Jan",
+                name_normalized="novak jan", owner_type="physical")
+    marie = Owner(first_name="Marie", last_name="Nováková", name_with_titles="Nováková Marie",
+                  name_normalized="novakova marie", owner_type="physical")
+    shared, group = Unit(unit_number=301), Unit(unit_number=302)
+    session.add_all([jan, marie, shared, group])
+    session.flush()
+    jan_ou = OwnerUnit(owner_id=jan.id, unit_id=shared.id, votes=60, ownership_type="SJM")
+    marie_ou = OwnerUnit(owner_id=marie.id, unit_id=shared.id, votes=60, ownership_type="SJM")
+    session.add_all([
+        jan_ou, marie_ou,
+        OwnerUnit(owner_id=jan.id, unit_id=group.id, votes=40, ownership_type="SJM"),
+        OwnerUnit(owner_id=marie.id, unit_id=group.id, votes=40, ownership_type="SJM"),
+    ])
+    ss = SyncSession(name="SJM")
+    session.add(ss)
+    session.commit()
+
+    path = tmp_path / "katastr.csv"
+    path.write_text(
+        "jednotka;vlastnik;podil;email;telefon\n"
+        "301;Nováková Marie;70;marie@example.cz;777111\n"
+        "302;Novák Jan, Nováková Marie;90;oba@example.cz;\n",
+        encoding="utf-8",
+    )
+    mapping = {"unit_col": "jednotka", "owner_col": "vlastnik", "share_col": "podil",
+               "first_name_col": "", "last_name_col": ""}
+    csv_comparator.compare_csv_file(session, ss.id, str(path), ";", mapping)
+    session.commit()
+    records = session.query(SyncRecord).filter(SyncRecord.session_id == ss.id).order_by(SyncRecord.id).all()
+    assert [r.owner_unit_id for r in records] == [marie_ou.id, None]
+    ids = {
+        "session": ss.id, "records": [str(r.id) for r in records],
+        "jan": jan.id, "marie": marie.id, "jan_ou": jan_ou.id, "marie_ou": marie_ou.id,
+    }
+    session.close()
+
+    resp = auth_client.post(f"/synchronizace/{ids['session']}/aplikovat-kontakty", follow_redirects=False)
+    assert resp.status_code == 303
+    resp = auth_client.post(
+        f"/synchronizace/{ids['session']}/aktualizovat",
+        data={"record_ids": ids["records"]},
+        follow_redirects=False,
+    )
+    assert resp.status_code == 303
+
+    session = SASession(bind=db_engine)
+    jan, marie = session.get(Owner, ids["jan"]), session.get(Owner, ids["marie"])
+    assert (marie.email, marie.phone) == ("marie@example.cz", "777111")
+    assert not jan.email and not jan.phone
+    assert session.get(OwnerUnit, ids["marie_ou"]).votes == 70
+    assert session.get(OwnerUnit, ids["jan_ou"]).votes == 60
+    # a whole-group match names no single co-owner: left for manual resolution
+    assert {ou.votes for ou in session.query(OwnerUnit).filter(OwnerUnit.votes.in_([40, 90]))} == {40}
+    group_record = session.get(SyncRecord, int(ids["records"][1]))
+    assert group_record.is_resolved == 0
+    session.close()
@@ -1,5 +1,7 @@
 """Tests for tax distribution module — Blok 6."""
 
+import pytest
+
 
 def test_tax_list_requires_login(client):
     """GET /dane should redirect to login for unauthenticated users."""
@@ -158,3 +160,226 @@ def test_tax_delete(auth_client, db_engine):
     session = SASession(bind=db_engine)
     assert session.query(TaxSession).filter(TaxSession.id == ts_id).first() is None
     session.close()
+
+
+def _text_pdf(*lines: str) -> bytes:
+    """Minimal one-page PDF with a Helvetica text layer (ASCII lines)."""
+    text_ops = " ".join(f"({line}) Tj 0 -14 Td" for line in lines)
+    stream = f"BT /F1 12 Tf 72 720 Td {text_ops} ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for num, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (num, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+def test_tax_upload_extracts_and_matches_in_batch(auth_client, db_engine):
+    """Uploaded PDFs are named from the first page and matched to owners."""
+    from sqlalchemy.orm import Session as SASession
+    from app.models.owner import Owner
+    from app.models.tax import TaxSession, TaxDocument, TaxDistribution
+
+    session = SASession(bind=db_engine)
+    ts = TaxSession(name="Dane 2025")
+    session.add_all([
+        ts,
+        Owner(first_name="Jan", last_name="Novak", name_with_titles="Novak Jan",
+              name_normalized="novak jan", owner_type="physical", is_active=True),
+    ])
+    session.commit()
+    ts_id = ts.id
+    session.close()
+
+    pdf = _text_pdf("Strana 1", "Novak Jan", "Celkem 1000")
+    resp = auth_client.post(
+        f"/dane/{ts_id}/upload",
+        files=[
+            ("files", ("a.pdf", pdf, "application/pdf")),
+            ("files", ("b.pdf", pdf, "application/pdf")),  # same content, parsed once
+            ("files", ("rozuctovani_svoboda_petr.pdf", b"%PDF-1.4\nbroken", "application/pdf")),
+        ],
+        follow_redirects=False,
+    )
+    assert resp.status_code == 303
+
+    session = SASession(bind=db_engine)
+    docs = {d.filename: d for d in session.query(TaxDocument).filter_by(session_id=ts_id).all()}
+    assert docs["a.pdf"].extracted_name == "Novak Jan"
+    assert docs["b.pdf"].extracted_name == "Novak Jan"
+    assert docs["rozuctovani_svoboda_petr.pdf"].extracted_name == "svoboda petr"
+    matched = {d.document_id for d in session.query(TaxDistribution).all()}
+    assert matched == {docs["a.pdf"].id, docs["b.pdf"].id}
+    session.close()
+
+
+def test_extract_names_process_pool(tmp_path):
+    """Larger batches are parsed in worker processes and cached by hash."""
+    import io
+    import os
+
+    from app.services import pdf_extractor
+
+    files = []
+    for i in range(pdf_extractor.PARALLEL_MIN_FILES):
+        path = str(tmp_path / f"{i}.pdf")
+        sha256 = pdf_extractor.save_stream(io.BytesIO(_text_pdf(f"Vlastnik Cislo{i}")), path)
+        files.append((sha256, path))
+
+    names = pdf_extractor.extract_names(files, max_workers=2)
+    assert [names[sha] for sha, _ in files] == [f"Vlastnik Cislo{i}" for i in range(len(files))]
+
+    for _, path in files:
+        os.remove(path)
+    assert pdf_extractor.extract_names(files, max_workers=2) == names  # served from cache
+
+
+def test_tax_pdf_store_dedups_and_refcounts(auth_client, db_engine, monkeypatch):
+    """The same PDF uploaded twice is stored and parsed once; deleting the
+    last referencing session removes the blob."""
+    import os
+
+    from sqlalchemy.orm import Session as SASession
+    from app.models.tax import PdfBlob, TaxDocument, TaxSession
+    from app.services import pdf_extractor
+    from app.services.pdf_store import blob_path
+
+    session = SASession(bind=db_engine)
+    first, second = TaxSession(name="2024"), TaxSession(name="2025")
+    session.add_all([first, second])
+    session.commit()
+    first_id, second_id = first.id, second.id
+    session.close()
+
+    pdf = _text_pdf("Strana 1", "Dvorak Karel Unikat")
+    auth_client.post(f"/dane/{first_id}/upload", files=[("files", ("k.pdf", pdf, "application/pdf"))])
+
+    # Second upload must come from the PdfBlob cache, not the parser
+    pdf_extractor._name_cache.clear()
+    monkeypatch.setattr(pdf_extractor, "extract_name", lambda path: pytest.fail("parsed again"))
+    auth_client.post(f"/dane/{second_id}/upload", files=[("files", ("k2.pdf", pdf, "application/pdf"))])
+
+    session = SASession(bind=db_engine)
+    docs = session.query(TaxDocument).order_by(TaxDocument.id).all()
+    assert [d.extracted_name for d in docs] == ["Dvorak Karel Unikat"] * 2
+    assert docs[0].content_hash == docs[1].content_hash
+    assert docs[0].file_path == docs[1].file_path == blob_path(docs[0].content_hash)
+    assert session.query(PdfBlob).count() == 1
+    path = docs[0].file_path
+    session.close()
+
+    assert auth_client.get(f"/dane/{second_id}/pdf/{docs[1].id}").content == pdf
+
+    auth_client.post(f"/dane/{first_id}/smazat")
+    assert os.path.exists(path)  # still referenced by the second session
+    auth_client.post(f"/dane/{second_id}/smazat")
+    assert not os.path.exists(path)
+    session = SASession(bind=db_engine)
+    assert session.query(PdfBlob).count() == 0
+    session.close()
+
+
+def test_tax_upload_reserves_blobs_until_job_commits(auth_client, db_engine, monkeypatch):
+    """A failed processing job releases its blobs; a pending upload's blob
+    survives the deletion of another session sharing it."""
+    import hashlib
+    import os
+
+    from sqlalchemy.orm import Session as SASession
+    from app.models.tax import PdfBlobReservation, TaxDocument, TaxSession
+    from app.routers import tax
+    from app.services import pdf_store
+
+    session = SASession(bind=db_engine)
+    first, second = TaxSession(name="2024"), TaxSession(name="2025")
+    session.add_all([first, second])
+    session.commit()
+    first_id, second_id = first.id, second.id
+    session.close()
+
+    pdf = _text_pdf("Strana 1", "Rezervace Karel")
+
+    # Job fails: nothing references the stored file any more
+    def failing(*args):
+        raise RuntimeError("extraction crashed")
+
+    with monkeypatch.context() as m:
+        m.setattr(tax, "_process_uploaded_pdfs", failing)
+        auth_client.post(f"/dane/{first_id}/upload", files=[("files", ("k.pdf", pdf, "application/pdf"))])
+    session = SASession(bind=db_engine)
+    assert session.query(PdfBlobReservation).count() == 0
+    assert session.query(TaxDocument).count() == 0
+    session.close()
+    path = pdf_store.blob_path(hashlib.sha256(pdf).hexdigest())
+    assert not os.path.exists(path)
+
+    auth_client.post(f"/dane/{first_id}/upload", files=[("files", ("k.pdf", pdf, "application/pdf"))])
+    session = SASession(bind=db_engine)
+    assert session.query(TaxDocument.file_path).scalar() == path
+    session.close()
+
+    # Upload to the second session is stored but its job has not run yet
+    pending = []
+    monkeypatch.setattr(tax, "submit_job", lambda db, kind, title, func, *args, **kw: pending.append(args))
+    monkeypatch.setattr(tax, "job_redirect", lambda request, job: tax.RedirectResponse("/dane", status_code=303))
+    auth_client.post(f"/dane/{second_id}/upload", files=[("files", ("k2.pdf", pdf, "application/pdf"))])
+    auth_client.post(f"/dane/{first_id}/smazat")
+    assert os.path.exists(path)  # reserved by the pending upload
+
+    session = SASession(bind=db_engine)
+    tax._process_uploaded_pdfs_job(session, type("Ctx", (), {"progress": lambda *a: None})(), *pending[0])
+    assert session.query(PdfBlobReservation).count() == 0
+    assert session.query(TaxDocument).filter(TaxDocument.session_id == second_id).count() == 1
+    session.close()
+
+
+def test_release_blobs_removes_files_only_after_commit(db_session):
+    """A rolled-back release keeps the file its restored rows point at."""
+    import io
+    import os
+
+    from app.models.tax import PdfBlob
+    from app.services import pdf_store
+
+    sha256, path = pdf_store.put_stream(io.BytesIO(_text_pdf("Strana 1", "Odvolaný Petr")))
+    pdf_store.register_blobs(db_session, {sha256: "Odvolaný Petr"})
+    db_session.commit()
+
+    assert pdf_store.release_blobs(db_session, [sha256]) == 1
+    assert os.path.exists(path)
+    db_session.rollback()
+    assert os.path.exists(path)
+    assert db_session.query(PdfBlob).count() == 1
+
+    assert pdf_store.release_blobs(db_session, [sha256]) == 1
+    db_session.commit()
+    assert not os.path.exists(path)
+    assert db_session.query(PdfBlob).count() == 0
+
+
+def test_ensure_tax_document_hash_column_on_legacy_table():
+    """Databases from before the PDF store get the content_hash column."""
+    from sqlalchemy import create_engine, text
+    from app.services.pdf_store import ensure_tax_document_hash_column
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE tax_documents (id INTEGER PRIMARY KEY, filename VARCHAR)"))
+        conn.execute(text("INSERT INTO tax_documents (filename) VALUES ('a.pdf')"))
+    ensure_tax_document_hash_column(engine)
+    ensure_tax_document_hash_column(engine)  # idempotent
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT content_hash FROM tax_documents")).scalar() == ""
+    engine.dispose()
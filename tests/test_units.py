@@ -101,3 +101,27 @@ def test_unit_detail_shows_owners(auth_client, db_engine):
     resp = auth_client.get(f"/jednotky/{unit_id}")
     assert resp.status_code == 200
     assert "Novák" in resp.text
+
+
+def test_units_list_keyset_pages_by_area(auth_client, db_engine, monkeypatch):
+    """Descending sorts page with (floor_area, unit_number) < cursor row."""
+    import re
+
+    from sqlalchemy.orm import Session as SASession
+    from app.models.owner import Unit
+    from app.services import pagination
+
+    monkeypatch.setattr(pagination, "PAGE_SIZE", 2)
+    session = SASession(bind=db_engine)
+    for number, area in [(101, 50.0), (102, 80.0), (103, 50.0), (104, 65.0)]:
+        session.add(Unit(unit_number=number, floor_area=area))
+    session.commit()
+    session.close()
+
+    resp = auth_client.get("/jednotky?sort=area")
+    assert re.findall(r'/jednotky/\d+" class="font-medium[^>]*>\s*(\d+)', resp.text) == ["102", "104"]
+    next_url = re.search(r'hx-get="(/jednotky/stranka\?[^"]+)"', resp.text).group(1).replace("&amp;", "&")
+
+    resp = auth_client.get(next_url)
+    assert re.findall(r'/jednotky/\d+" class="font-medium[^>]*>\s*(\d+)', resp.text) == ["103", "101"]
+    assert "hx-get" not in resp.text
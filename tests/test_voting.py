@@ -193,3 +193,138 @@ def test_voting_filter_by_status(auth_client, db_engine):
     resp = auth_client.get("/hlasovani?status=koncept")
     assert resp.status_code == 200
     assert "Koncept" in resp.text
+
+
+def test_voting_generate_ballots(auth_client, db_engine, tmp_path, monkeypatch):
+    """POST /hlasovani/{id}/generovat should render one ballot per owner and activate voting."""
+    from sqlalchemy.orm import Session as SASession
+    from app.config import settings
+    from app.models.owner import Owner, OwnerUnit, Unit
+    from app.models.voting import Voting, VotingItem, Ballot
+
+    monkeypatch.setattr(settings, "GENERATED_DIR", str(tmp_path))
+
+    session = SASession(bind=db_engine)
+    v = Voting(name="Výroční schůze", status="koncept", quorum=50.0)
+    session.add(v)
+    session.flush()
+    session.add(VotingItem(voting_id=v.id, number=1, text="Schválení rozpočtu"))
+    owners = []
+    for i, name in enumerate(["Novák Jan", "Svoboda Petr"]):
+        o = Owner(first_name=name.split()[1], last_name=name.split()[0],
+                  name_with_titles=name, name_normalized=name.lower())
+        session.add(o)
+        owners.append(o)
+    u1, u2, u3 = Unit(unit_number=1), Unit(unit_number=2), Unit(unit_number=3)
+    session.add_all([u1, u2, u3])
+    session.flush()
+    session.add_all([
+        OwnerUnit(owner_id=owners[0].id, unit_id=u1.id),
+        OwnerUnit(owner_id=owners[0].id, unit_id=u2.id),
+        OwnerUnit(owner_id=owners[1].id, unit_id=u3.id),
+    ])
+    session.commit()
+    voting_id, first_unit_id = v.id, u1.id
+    session.close()
+
+    resp = auth_client.post(f"/hlasovani/{voting_id}/generovat", follow_redirects=False)
+    assert resp.status_code == 303
+
+    session = SASession(bind=db_engine)
+    assert session.get(Voting, voting_id).status == "aktivní"
+    ballots = session.query(Ballot).order_by(Ballot.owner_id).all()
+    assert len(ballots) == 2
+    assert ballots[0].unit_id == first_unit_id
+    assert all(b.status == "vygenerován" and b.created_at for b in ballots)
+    for b in ballots:
+        assert b.pdf_path.startswith(str(tmp_path))
+        assert (tmp_path / f"voting-{voting_id}" / f"ballot-{voting_id}-{b.owner_id}.docx").exists()
+    session.close()
+
+
+def test_voting_generate_ballots_rejects_duplicate(auth_client, db_engine):
+    """A second generate request while the voting's job is queued creates no job."""
+    from sqlalchemy.orm import Session as SASession
+    from app.models.common import Job
+    from app.models.owner import Owner, OwnerUnit, Unit
+    from app.models.voting import Ballot, Voting, VotingItem
+
+    session = SASession(bind=db_engine)
+    v = Voting(name="Schůze", status="koncept")
+    owner, unit = Owner(first_name="Jan", last_name="Novák"), Unit(unit_number=1)
+    session.add_all([v, owner, unit])
+    session.flush()
+    session.add_all([
+        VotingItem(voting_id=v.id, number=1, text="Rozpočet"),
+        OwnerUnit(owner_id=owner.id, unit_id=unit.id),
+        Job(kind="ballots", title="Generování", status="čeká", key=f"ballots:{v.id}"),
+    ])
+    session.commit()
+    voting_id = v.id
+    session.close()
+
+    resp = auth_client.post(f"/hlasovani/{voting_id}/generovat", follow_redirects=False)
+    assert resp.status_code == 303
+    assert resp.headers["location"] == f"/hlasovani/{voting_id}"
+
+    session = SASession(bind=db_engine)
+    assert session.query(Job).count() == 1
+    assert session.query(Ballot).count() == 0
+    assert session.get(Voting, voting_id).status == "koncept"
+    session.close()
+
+
+def test_generate_ballots_process_pool(tmp_path, monkeypatch):
+    """generate_ballots should render through the process pool and keep job order."""
+    from docx import Document
+    from app.services import pdf_generator
+
+    monkeypatch.setattr(pdf_generator, "PARALLEL_MIN_BALLOTS", 1)
+
+    template = Document()
+    template.add_paragraph("{{ voting_name }} / {{ owner_name }} / {{ unit_numbers }}")
+    template_path = tmp_path / "template.docx"
+    template.save(template_path)
+
+    jobs = [
+        {"output_path": str(tmp_path / "out" / f"b{i}.docx"), "owner_name": f"Vlastník {i}",
+         "unit_numbers": str(i)}
+        for i in range(4)
+    ]
+    progress = []
+    paths = pdf_generator.generate_ballots(
+        str(template_path), "Schůze", ["Bod 1"], jobs,
+        max_workers=2, progress=lambda done, total: progress.append((done, total)),
+    )
+
+    assert paths == [job["output_path"] for job in jobs]
+    assert progress[-1] == (4, 4)
+    text = Document(paths[3]).paragraphs[0].text
+    assert text == "Schůze / Vlastník 3 / 3"
+
+
+def test_generate_ballots_inline_concurrent(tmp_path):
+    """Inline rendering of two votings at once keeps each voting's own data."""
+    from concurrent.futures import ThreadPoolExecutor
+    from docx import Document
+    from app.services import pdf_generator
+
+    template = Document()
+    template.add_paragraph("{{ voting_name }} / {{ owner_name }}")
+    template_path = tmp_path / "template.docx"
+    template.save(template_path)
+
+    def render(name: str) -> list:
+        jobs = [
+            {"output_path": str(tmp_path / name / f"b{i}.docx"), "owner_name": f"Vlastník {i}",
+             "unit_numbers": str(i)}
+            for i in range(5)
+        ]
+        return pdf_generator.generate_ballots(str(template_path), name, ["Bod"], jobs, max_workers=1)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = dict(zip(("A", "B"), pool.map(render, ["A", "B"])))
+
+    for name, paths in results.items():
+        assert [Document(p).paragraphs[0].text.split(" / ")[0] for p in paths] == [name] * 5
+    assert pdf_generator._worker_state == {}
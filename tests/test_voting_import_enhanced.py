@@ -236,3 +236,106 @@ def test_sjm_matching(auth_client, db_engine):
     assert b1_votes == 2  # 2 items
     assert b2_votes == 2  # SJM co-owner gets same votes
     session.close()
+
+
+def test_import_confirm_is_set_based(auth_client, db_engine):
+    """Confirm should use a constant number of queries and upsert existing votes."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session as SASession
+    from app.models.voting import Voting, VotingItem, Ballot, BallotVote
+    from app.models.owner import Owner, Unit
+
+    session = SASession(bind=db_engine)
+    voting = Voting(name="Velké hlasování", status="aktivní", quorum=50)
+    session.add(voting)
+    session.flush()
+    items = [VotingItem(voting_id=voting.id, number=n, text=f"Bod {n}") for n in range(1, 6)]
+    owner = Owner(first_name="Jan", last_name="Novák", owner_type="physical", name_normalized="novák jan")
+    units = [Unit(unit_number=n) for n in range(1, 61)]
+    session.add_all(items + units + [owner])
+    session.flush()
+    ballots = [Ballot(voting_id=voting.id, owner_id=owner.id, unit_id=u.id) for u in units]
+    session.add_all(ballots)
+    session.flush()
+    # Existing vote that the import changes (doplnit mode → upsert, no duplicate)
+    session.add(BallotVote(ballot_id=ballots[0].id, voting_item_id=items[0].id, vote="PROTI"))
+    session.commit()
+    voting_id, first_ballot, first_item = voting.id, ballots[0].id, items[0].id
+    session.close()
+
+    excel = _create_excel_with_headers(
+        ["Jméno", "Jednotka"] + [f"Bod {n}" for n in range(1, 6)],
+        [["Novák Jan", n, "PRO", "proti", "ano", "zdržel se", "ne"] for n in range(1, 61)],
+    )
+    auth_client.post(
+        f"/hlasovani/{voting_id}/import",
+        files={"file": ("test.xlsx", excel, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+    )
+    auth_client.post(
+        f"/hlasovani/{voting_id}/import/mapovani",
+        data={"owner_col": "0", "unit_col": "1", "start_row": "2", "import_mode": "doplnit"},
+    )
+
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine, "before_cursor_execute", _count)
+    try:
+        resp = auth_client.post(f"/hlasovani/{voting_id}/import/potvrdit", follow_redirects=False)
+    finally:
+        event.remove(db_engine, "before_cursor_execute", _count)
+    assert resp.status_code == 303
+    # 60 units x 5 items used to take hundreds of queries
+    assert len(statements) < 25
+
+    session = SASession(bind=db_engine)
+    assert session.query(BallotVote).count() == 300
+    vote = session.query(BallotVote).filter_by(ballot_id=first_ballot, voting_item_id=first_item).one()
+    assert vote.vote == "PRO"
+    assert session.query(Ballot).filter(Ballot.status == "zpracován").count() == 60
+    session.close()
+
+
+def test_ensure_ballot_vote_unique_index_dedups(db_engine, caplog):
+    """Existing databases get the unique index; duplicate votes keep the newest,
+    the removal is logged and the voting's tallies are rebuilt."""
+    import logging
+
+    from sqlalchemy import text
+
+    with db_engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_ballot_vote_item"))
+        conn.execute(text("INSERT INTO votings (id, name, status) VALUES (7, 'Schůze', 'aktivní')"))
+        conn.execute(text("INSERT INTO ballots (id, voting_id, owner_id, status) VALUES (1, 7, 1, 'zpracován')"))
+        conn.execute(text(
+            "INSERT INTO ballot_votes (ballot_id, voting_item_id, vote) VALUES (1, 1, 'PROTI'), (1, 1, 'PRO')"
+        ))
+        # tallies counted both duplicates
+        conn.execute(text(
+            "INSERT INTO voting_tallies (voting_id, voting_item_id, vote, count, weight) "
+            "VALUES (7, 1, 'PROTI', 1, 0), (7, 1, 'PRO', 1, 0)"
+        ))
+
+    from app.services.voting_import import ensure_ballot_vote_unique_index
+    with caplog.at_level(logging.WARNING, logger="app.services.voting_import"):
+        ensure_ballot_vote_unique_index(db_engine)
+    assert "Removed 1 duplicate ballot votes" in caplog.text
+
+    with db_engine.begin() as conn:  # with the index in place nothing is touched
+        conn.execute(text("INSERT INTO voting_tallies (voting_id, voting_item_id, vote, count, weight) "
+                          "VALUES (8, 2, 'PRO', 5, 0)"))
+    ensure_ballot_vote_unique_index(db_engine)
+
+    with db_engine.connect() as conn:
+        rows = conn.execute(text("SELECT vote FROM ballot_votes")).all()
+        index = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type='index' AND name='uq_ballot_vote_item'"
+        )).all()
+        tallies = conn.execute(text(
+            "SELECT voting_id, vote, count FROM voting_tallies ORDER BY voting_id"
+        )).all()
+    assert rows == [("PRO",)]
+    assert index == [("uq_ballot_vote_item",)]
+    assert tallies == [(7, "PRO", 1), (8, "PRO", 5)]
@@ -219,3 +219,182 @@ def test_bulk_processing(auth_client, db_engine):
     assert b1_check.status == "zpracován"
     assert b2_check.status == "zpracován"
     session.close()
+
+
+def test_voting_results_weighted_by_votes(db_session):
+    """compute_voting_results should weight tallies by OwnerUnit.votes and evaluate quorum."""
+    from app.models.owner import OwnerUnit, Unit
+    from app.models.voting import Voting, VotingItem, Ballot, BallotVote
+    from app.services.voting_results import compute_voting_results
+
+    big = _make_owner(db_session, "Jan", "Novák")
+    small = _make_owner(db_session, "Eva", "Malá")
+    absent = _make_owner(db_session, "Petr", "Dvořák")
+    units = [Unit(unit_number=n) for n in (1, 2, 3, 4)]
+    db_session.add_all(units)
+    db_session.flush()
+    db_session.add_all([
+        OwnerUnit(owner_id=big.id, unit_id=units[0].id, votes=300),
+        OwnerUnit(owner_id=big.id, unit_id=units[1].id, votes=100),
+        OwnerUnit(owner_id=small.id, unit_id=units[2].id, votes=100),
+        OwnerUnit(owner_id=absent.id, unit_id=units[3].id, votes=500),
+    ])
+    v = Voting(name="Test", status="aktivní", quorum=50.0)
+    db_session.add(v)
+    db_session.flush()
+    item = VotingItem(voting_id=v.id, number=1, text="Bod 1")
+    db_session.add(item)
+    db_session.flush()
+    b_big = Ballot(voting_id=v.id, owner_id=big.id, unit_id=units[0].id, status="zpracován")
+    b_small = Ballot(voting_id=v.id, owner_id=small.id, unit_id=units[2].id, status="zpracován")
+    b_absent = Ballot(voting_id=v.id, owner_id=absent.id, unit_id=units[3].id, status="vygenerován")
+    db_session.add_all([b_big, b_small, b_absent])
+    db_session.flush()
+    db_session.add_all([
+        BallotVote(ballot_id=b_big.id, voting_item_id=item.id, vote="PROTI"),
+        BallotVote(ballot_id=b_small.id, voting_item_id=item.id, vote="PRO"),
+    ])
+    db_session.commit()
+
+    summary = compute_voting_results(db_session, v, [item])
+    r = summary["items"][0]
+
+    # One ballot each, but PROTI carries 400 of 500 cast votes
+    assert (r["pro"], r["proti"]) == (1, 1)
+    assert (r["pro_weight"], r["proti_weight"]) == (100, 400)
+    assert (r["pro_pct"], r["proti_pct"]) == (20.0, 80.0)
+    assert r["accepted"] is False
+
+    assert summary["ballot_count"] == 3
+    assert summary["processed_count"] == 2
+    assert summary["total_weight"] == 1000
+    assert summary["processed_weight"] == 500
+    assert summary["participation_pct"] == 50.0
+    assert summary["quorum_reached"] is True
+
+    v.quorum = 60.0
+    assert compute_voting_results(db_session, v, [item])["quorum_reached"] is False
+
+
+def test_voting_quorum_counts_co_owned_units_once(db_session):
+    """Co-owners each carry the unit's votes; quorum counts the unit's share once."""
+    from app.models.administration import SvjInfo
+    from app.models.owner import OwnerUnit, Unit
+    from app.models.voting import Voting, Ballot
+    from app.services.voting_results import compute_voting_results
+
+    jan = _make_owner(db_session, "Jan", "Novák")
+    marie = _make_owner(db_session, "Marie", "Nováková")
+    petr = _make_owner(db_session, "Petr", "Dvořák")
+    shared, other = Unit(unit_number=1, podil_scd=400), Unit(unit_number=2, podil_scd=600)
+    db_session.add_all([shared, other])
+    db_session.flush()
+    db_session.add_all([
+        OwnerUnit(owner_id=jan.id, unit_id=shared.id, votes=400, ownership_type="SJM"),
+        OwnerUnit(owner_id=marie.id, unit_id=shared.id, votes=400, ownership_type="SJM"),
+        OwnerUnit(owner_id=petr.id, unit_id=other.id, votes=600),
+    ])
+    v = Voting(name="Test", status="aktivní", quorum=50.0)
+    db_session.add(v)
+    db_session.flush()
+    db_session.add_all([
+        Ballot(voting_id=v.id, owner_id=jan.id, unit_id=shared.id, status="zpracován"),
+        Ballot(voting_id=v.id, owner_id=marie.id, unit_id=shared.id, status="zpracován"),
+        Ballot(voting_id=v.id, owner_id=petr.id, unit_id=other.id, status="vygenerován"),
+    ])
+    db_session.commit()
+
+    summary = compute_voting_results(db_session, v, [])
+    assert summary["total_weight"] == 1000
+    assert summary["processed_weight"] == 400
+    assert summary["participation_pct"] == 40.0
+    assert summary["quorum_reached"] is False
+
+    db_session.add(SvjInfo(name="SVJ", total_shares=800))
+    db_session.commit()
+    summary = compute_voting_results(db_session, v, [])
+    assert summary["total_weight"] == 800
+    assert summary["quorum_reached"] is True
+
+
+def test_voting_tally_updated_on_processing(auth_client, db_engine):
+    """Processing ballots should keep VotingTally in sync; rebuild finds no drift."""
+    from sqlalchemy.orm import Session as SASession
+    from app.models.owner import OwnerUnit, Unit
+    from app.models.voting import Voting, VotingItem, Ballot, VotingTally
+
+    session = SASession(bind=db_engine)
+    owner1 = _make_owner(session, "Jan", "Novák")
+    owner2 = _make_owner(session, "Eva", "Malá")
+    u1, u2 = Unit(unit_number=101), Unit(unit_number=102)
+    session.add_all([u1, u2])
+    session.flush()
+    session.add_all([
+        OwnerUnit(owner_id=owner1.id, unit_id=u1.id, votes=300),
+        OwnerUnit(owner_id=owner2.id, unit_id=u2.id, votes=200),
+    ])
+    v = Voting(name="Test", status="aktivní", quorum=50.0)
+    session.add(v)
+    session.flush()
+    item = VotingItem(voting_id=v.id, number=1, text="Bod 1")
+    session.add(item)
+    session.flush()
+    b1 = Ballot(voting_id=v.id, owner_id=owner1.id, unit_id=u1.id, status="vygenerován")
+    b2 = Ballot(voting_id=v.id, owner_id=owner2.id, unit_id=u2.id, status="vygenerován")
+    session.add_all([b1, b2])
+    session.commit()
+    vid, item_id, b1_id, b2_id = v.id, item.id, b1.id, b2.id
+    session.close()
+
+    def tallies():
+        s = SASession(bind=db_engine)
+        rows = {t.vote: (t.count, t.weight) for t in s.query(VotingTally).filter_by(voting_item_id=item_id) if t.count}
+        s.close()
+        return rows
+
+    auth_client.post(
+        f"/hlasovani/{vid}/zpracovat-hromadne",
+        data={"ballot_ids": [str(b1_id), str(b2_id)], f"vote_{item_id}": "PRO"},
+    )
+    assert tallies() == {"PRO": (2, 500)}
+
+    # Re-processing one ballot moves its weight to the other option
+    auth_client.post(f"/hlasovani/{vid}/zpracovat/{b2_id}", data={f"vote_{item_id}": "PROTI"})
+    assert tallies() == {"PRO": (1, 300), "PROTI": (1, 200)}
+
+    resp = auth_client.post(f"/hlasovani/{vid}/prepocitat", follow_redirects=False)
+    assert resp.status_code == 303
+    assert tallies() == {"PRO": (1, 300), "PROTI": (1, 200)}
+    resp = auth_client.get(f"/hlasovani/{vid}")
+    assert "součty souhlasí" in resp.text
+
+
+def test_rebuild_tallies_reports_drift(db_session):
+    """rebuild_tallies should fix and report tallies that no longer match the votes."""
+    from app.models.owner import OwnerUnit, Unit
+    from app.models.voting import Voting, VotingItem, Ballot, BallotVote, VotingTally
+    from app.services.voting_results import rebuild_tallies
+
+    owner = _make_owner(db_session)
+    unit = Unit(unit_number=1)
+    db_session.add(unit)
+    db_session.flush()
+    db_session.add(OwnerUnit(owner_id=owner.id, unit_id=unit.id, votes=100))
+    v = Voting(name="Test", status="aktivní")
+    db_session.add(v)
+    db_session.flush()
+    item = VotingItem(voting_id=v.id, number=1, text="Bod 1")
+    db_session.add(item)
+    db_session.flush()
+    ballot = Ballot(voting_id=v.id, owner_id=owner.id, unit_id=unit.id, status="zpracován")
+    db_session.add(ballot)
+    db_session.flush()
+    db_session.add(BallotVote(ballot_id=ballot.id, voting_item_id=item.id, vote="PRO"))
+    db_session.add(VotingTally(voting_id=v.id, voting_item_id=item.id, vote="PRO", count=5, weight=1))
+    db_session.commit()
+
+    assert rebuild_tallies(db_session, v.id) == [(item.id, "PRO")]
+    db_session.commit()
+    tally = db_session.query(VotingTally).one()
+    assert (tally.count, tally.weight) == (1, 100)
+    assert rebuild_tallies(db_session, v.id) == []